@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e controlli di parità per le parti critiche di webscraper_NEW.
+
+Uso (dalla cartella code/):
+    python benchmark.py signature [pagina.html ...]
+    python benchmark.py similarity [vecchio.txt nuovo.txt] [--change 0.05]
+    python benchmark.py importtime [--repeat 3] [--top 12]
+    python benchmark.py raster [documento.pdf] [--pages 100] [--dpi 150] [--workers N]
+    python benchmark.py printtopdf [--size-mb 200]
+    python benchmark.py diff [vecchio.txt nuovo.txt] [--size-mb 5] [--change 0.02]
+"""
+import argparse
+import base64
+import difflib
+import hashlib
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bs4 import BeautifulSoup
+
+import webscraper_NEW as ws
+
+
+def legacy_signature_hash(html_content):
+    """Implementazione originale basata su BeautifulSoup, usata come riferimento."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    for tag in soup(["script", "style", "meta", "noscript"]):
+        tag.decompose()
+    clean_text = soup.get_text(separator=" ", strip=True)
+    return hashlib.sha256(clean_text.encode("utf-8")).hexdigest()
+
+
+def synthetic_page(blocks=20000):
+    body = "".join(
+        f"<div class='c{i}'><p>Paragrafo {i} &amp; testo <b>grassetto</b> &#8364;</p>"
+        f"<ul><li>a</li><li>b</li></ul><!-- commento --></div>"
+        for i in range(blocks)
+    )
+    return f"<html><head><script>var a = 1;</script><style>p {{}}</style></head><body>{body}</body></html>"
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def bench_signature(args):
+    pages = []
+    for path in args.files:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((path, f.read()))
+    if not pages:
+        pages.append(("<pagina sintetica>", synthetic_page()))
+
+    mismatches = 0
+    for name, html_content in pages:
+        expected, legacy_time = timed(legacy_signature_hash, html_content)
+        actual, stream_time = timed(ws.generate_signature_hash, html_content)
+        same = expected == actual
+        mismatches += not same
+        print(f"{name}: {len(html_content)} caratteri | bs4 {legacy_time:.3f}s | "
+              f"streaming {stream_time:.3f}s | x{legacy_time / max(stream_time, 1e-9):.1f} | "
+              f"{'OK' if same else 'HASH DIVERSO'}")
+    return 1 if mismatches else 0
+
+
+def synthetic_text_pair(size=200_000, change=0.05, seed=1):
+    """Coppia di testi tipo 'pagina normativa' con una frazione di righe modificate."""
+    rng = random.Random(seed)
+    vocabulary = ["articolo", "comma", "decreto", "legge", "disposizione", "ai", "sensi", "del",
+                  "presente", "regolamento", "entro", "termini", "previsti", "autorità", "modifica"]
+    lines = []
+    while sum(map(len, lines)) < size:
+        lines.append(f"Art. {len(lines) + 1} - " + " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 25))))
+    new_lines = [
+        " ".join(rng.choice(vocabulary) for _ in range(12)) if rng.random() < change else line
+        for line in lines
+    ]
+    return "\n".join(lines), "\n".join(new_lines)
+
+
+def bench_similarity(args):
+    if args.files:
+        with open(args.files[0], "r", encoding="utf-8") as f:
+            old_text = f.read()
+        with open(args.files[1], "r", encoding="utf-8") as f:
+            new_text = f.read()
+    else:
+        old_text, new_text = synthetic_text_pair(change=args.change)
+    print(f"Testi: {len(old_text)} / {len(new_text)} caratteri | soglia {args.threshold}")
+
+    site_config = {"detection_threshold": args.threshold}
+    reference = None
+    for method in ["char", "lines", "tokens", "minhash", "simhash", "auto"]:
+        value, elapsed = timed(ws.compute_text_similarity, old_text, new_text,
+                               {**site_config, "similarity_method": method}, repeat=1)
+        if method == "char":
+            reference = value
+        print(f"{method:8} {value:.4f} (delta {value - reference:+.4f}) {elapsed:.3f}s | "
+              f"{'cambiata' if value < args.threshold else 'invariata'}")
+    return 0
+
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FIRST_WINDOW_SCRIPT = """
+import webscraper_NEW as ws
+ws.get_startup_config()
+root = ws.TkinterDnD.Tk()
+app = ws.App(root)
+root.update()
+print("FIRST_WINDOW", flush=True)
+root.destroy()
+"""
+
+
+def import_profile(module="webscraper_NEW"):
+    """
+    Esegue 'python -X importtime -c "import <module>"' in un interprete pulito.
+    Restituisce (cumulativo del modulo, {import diretto: cumulativo}) in secondi.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=CODE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, direct = 0.0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        name = name.strip()
+        if depth == 0 and name == module:
+            total = int(cumulative) / 1e6
+        elif depth == 1:
+            direct[name] = int(cumulative) / 1e6
+    return total, direct
+
+
+def time_to_first_line(command, marker=None, timeout=120):
+    """Secondi dall'avvio del processo alla prima riga (o alla riga che inizia con 'marker')."""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=CODE_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, encoding="utf-8", errors="replace")
+    try:
+        lines = []
+        for line in process.stdout:
+            lines.append(line.rstrip())
+            if marker is None or line.startswith(marker):
+                return time.perf_counter() - start, line.rstrip()
+            if time.perf_counter() - start > timeout:
+                break
+        raise RuntimeError(lines[-1] if lines else f"codice di uscita {process.wait()}")
+    finally:
+        process.kill()
+        process.wait()
+
+
+def bench_importtime(args):
+    imports = [import_profile() for _ in range(args.repeat)]
+    total, direct = min(imports, key=lambda item: item[0])
+    print(f"import webscraper_NEW: {total:.3f}s (migliore di {args.repeat})")
+    for name, cumulative in sorted(direct.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:32} {cumulative:.3f}s")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, "vuoto.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("Url;Nome Nazione;Data precedentemente rilevata;Data Ultimo Aggiornamento\n")
+        cli = [sys.executable, "webscraper_cli.py", "run", "--csv", csv_path, "--output", work_dir, "--progress", "text"]
+        measures = [
+            ("prima riga della CLI", cli, None),
+            ("prima finestra", [sys.executable, "-c", FIRST_WINDOW_SCRIPT], "FIRST_WINDOW"),
+        ]
+        for label, command, marker in measures:
+            try:
+                elapsed = min(time_to_first_line(command, marker)[0] for _ in range(args.repeat))
+                print(f"{label}: {elapsed:.3f}s")
+            except Exception as e:
+                print(f"{label}: non disponibile ({e})")
+    return 0
+
+
+def legacy_rasterize(pdf_path, dpi=150):
+    """Pipeline originale: PNG su disco per ogni pagina, poi PIL ricompone il PDF."""
+    from PIL import Image
+    image_paths = []
+    with ws.fitz.open(pdf_path) as doc:
+        for i, page in enumerate(doc):
+            img_path = f"{os.path.splitext(pdf_path)[0]}_page{i + 1}.png"
+            page.get_pixmap(dpi=dpi).save(img_path)
+            image_paths.append(img_path)
+    images = [Image.open(p).convert("RGB") for p in image_paths]
+    images[0].save(pdf_path, save_all=True, append_images=images[1:])
+    for img_path in image_paths:
+        os.remove(img_path)
+    return len(images)
+
+
+def synthetic_pdf(path, pages=100, seed=1):
+    """Pagine A4 tipo 'pagina web stampata': testo, tabelle e un riquadro sfumato."""
+    rng = random.Random(seed)
+    with ws.fitz.open() as doc:
+        for number in range(pages):
+            page = doc.new_page(width=595, height=842)
+            y = 50
+            while y < 780:
+                words = " ".join(rng.choice(["articolo", "comma", "decreto", "legge", "entro", "termini"])
+                                 for _ in range(rng.randint(6, 14)))
+                page.insert_text((50, y), f"{number + 1}.{y} {words}", fontsize=10)
+                y += 14
+            for row in range(6):
+                page.draw_rect(ws.fitz.Rect(50, 600 + row * 20, 545, 620 + row * 20), color=(0.3, 0.3, 0.3))
+            if number % 5 == 0:
+                for band in range(60):
+                    shade = band / 60
+                    page.draw_rect(ws.fitz.Rect(300, 80 + band * 3, 545, 83 + band * 3),
+                                   fill=(shade, 0.5, 1 - shade), color=None)
+        doc.save(path)
+
+
+class PeakMemory:
+    """Picco di RSS del processo (allocazioni C di MuPDF comprese) campionato in un thread."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.process = ws.psutil.Process()
+
+    def __enter__(self):
+        self.base = self.peak = self.process.memory_info().rss
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def _sample(self):
+        while self.running:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def __exit__(self, *exc):
+        self.running = False
+        self.thread.join()
+
+    @property
+    def delta_mb(self):
+        return (self.peak - self.base) / 2 ** 20
+
+
+RASTER_METHODS = {
+    "legacy": lambda path, dpi, workers: legacy_rasterize(path, dpi),
+    "auto": lambda path, dpi, workers: ws.rasterize_pdf_fitz(path, dpi, {"raster_format": "auto"}),
+    "jpeg": lambda path, dpi, workers: ws.rasterize_pdf_fitz(path, dpi, {"raster_format": "jpeg"}),
+    "png": lambda path, dpi, workers: ws.rasterize_pdf_fitz(path, dpi, {"raster_format": "png"}),
+    "parallel": lambda path, dpi, workers: ws.rasterize_pdf_fitz(path, dpi, {"raster_format": "auto"}, workers),
+}
+
+
+def bench_raster(args):
+    if args.method:
+        # Un metodo per processo: il picco di memoria non risente delle esecuzioni precedenti
+        with PeakMemory() as memory:
+            start = time.perf_counter()
+            pages = RASTER_METHODS[args.method](args.file, args.dpi, args.workers)
+            elapsed = time.perf_counter() - start
+        print(f"{pages} pagine | {elapsed:.2f}s | {os.path.getsize(args.file) / 2 ** 20:.1f} MB | "
+              f"picco RSS +{memory.delta_mb:.0f} MB")
+        return 0
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = os.path.join(work_dir, "sorgente.pdf")
+        if args.file:
+            shutil.copyfile(args.file, source)
+        else:
+            synthetic_pdf(source, pages=args.pages)
+        print(f"Documento: {os.path.getsize(source) / 2 ** 20:.1f} MB | {args.dpi} dpi | parallel: {args.workers} processi")
+
+        for method in RASTER_METHODS:
+            target = os.path.join(work_dir, "copia.pdf")
+            shutil.copyfile(source, target)
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), "raster", target,
+                                     "--dpi", str(args.dpi), "--workers", str(args.workers), "--method", method],
+                                    cwd=CODE_DIR, capture_output=True, text=True)
+            output = result.stdout.strip().splitlines() or result.stderr.strip().splitlines()[-1:]
+            leftovers = [name for name in os.listdir(work_dir) if name.endswith(".png")]
+            print(f"{method:8} {output[-1] if output else '?'}{' | PNG rimasti!' if leftovers else ''}")
+    return 0
+
+
+class FakeCdpDriver:
+    """
+    Risponde a Page.printToPDF come Chrome, con un PDF di 'size' byte: intero in base64
+    oppure come stream da leggere con IO.read. I blocchi vengono generati al volo,
+    così la memoria misurata è solo quella del percorso di cattura.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.position = 0
+
+    def _payload(self, start, length):
+        return (b"%PDF-1.7 " * (length // 9 + 1))[:length] if start == 0 else b"\x00" * length
+
+    def execute_script(self, script):
+        return "testo della pagina"
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Page.printToPDF":
+            if params.get("transferMode") == "ReturnAsStream":
+                return {"stream": "fake-stream"}
+            return {"data": base64.b64encode(self._payload(0, self.size)).decode()}
+        if command == "IO.read":
+            length = min(params.get("size", ws.CDP_STREAM_CHUNK_SIZE), self.size - self.position)
+            data = base64.b64encode(self._payload(self.position, length)).decode()
+            self.position += length
+            return {"base64Encoded": True, "data": data, "eof": self.position >= self.size}
+        return {}
+
+
+def legacy_print_to_pdf(driver, output_path):
+    """Cattura originale: base64 intero, byte decodificati e scrittura in un colpo solo."""
+    result = driver.execute_cdp_cmd("Page.printToPDF", {"printBackground": True, "preferCSSPageSize": True})
+    pdf_bytes = base64.b64decode(result["data"])
+    with open(output_path, "wb") as f:
+        f.write(pdf_bytes)
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+PRINT_METHODS = {
+    "legacy": lambda driver, path: legacy_print_to_pdf(driver, path),
+    "stream": lambda driver, path: ws.capture_page_as_pdf(driver, "https://example.org", path),
+}
+
+
+def bench_printtopdf(args):
+    size = args.size_mb * 2 ** 20
+    if args.method:
+        with tempfile.TemporaryDirectory() as work_dir, PeakMemory() as memory:
+            start = time.perf_counter()
+            PRINT_METHODS[args.method](FakeCdpDriver(size), os.path.join(work_dir, "pagina.pdf"))
+            elapsed = time.perf_counter() - start
+        print(f"{elapsed:.2f}s | picco RSS +{memory.delta_mb:.0f} MB")
+        return 0
+
+    print(f"PDF simulato: {args.size_mb} MB")
+    for method in PRINT_METHODS:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "printtopdf",
+                                 "--size-mb", str(args.size_mb), "--method", method],
+                                cwd=CODE_DIR, capture_output=True, text=True)
+        output = result.stdout.strip().splitlines() or result.stderr.strip().splitlines()[-1:]
+        print(f"{method:8} {output[-1] if output else '?'}")
+    return 0
+
+
+def apply_opcodes(old_lines, new_lines, opcodes):
+    """Ricostruisce il testo nuovo dalle operazioni, controllando che siano contigue e coerenti."""
+    result, i, j = [], 0, 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if (i1, j1) != (i, j) or (tag == "equal" and old_lines[i1:i2] != new_lines[j1:j2]):
+            return None
+        result.extend(old_lines[i1:i2] if tag == "equal" else new_lines[j1:j2])
+        i, j = i2, j2
+    return result if (i, j) == (len(old_lines), len(new_lines)) else None
+
+
+def bench_diff(args):
+    if args.files:
+        with open(args.files[0], "r", encoding="utf-8") as f:
+            old_text = f.read()
+        with open(args.files[1], "r", encoding="utf-8") as f:
+            new_text = f.read()
+    else:
+        old_text, new_text = synthetic_text_pair(size=int(args.size_mb * 2 ** 20), change=args.change)
+    old_lines, new_lines = old_text.splitlines(), new_text.splitlines()
+    print(f"Testi: {len(old_text)} / {len(new_text)} caratteri, {len(old_lines)} / {len(new_lines)} righe")
+
+    opcodes, elapsed = timed(ws.diff_lines, old_lines, new_lines, repeat=1)
+    changed = sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in opcodes if tag != "equal")
+    same = apply_opcodes(old_lines, new_lines, opcodes) == new_lines
+    hunks = ws.group_diff_hunks(opcodes)
+    print(f"diff_lines {elapsed:.3f}s | {len(hunks)} blocchi, {changed} righe diverse | "
+          f"{'OK' if same else 'RICOSTRUZIONE ERRATA'}")
+
+    # ndiff (storico) è quadratico sui blocchi riscritti: si misura un blocco di righe tutte ritoccate
+    old_part = old_lines[:args.rewritten_lines]
+    new_part = [line + " (modificato)" for line in old_part]
+    _, legacy_time = timed(lambda: list(difflib.ndiff(old_part, new_part)), repeat=1)
+    _, part_time = timed(ws.diff_lines, old_part, new_part, repeat=1)
+    print(f"blocco riscritto di {len(old_part)} righe: ndiff {legacy_time:.3f}s | diff_lines {part_time:.3f}s")
+    return 0 if same else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    signature = commands.add_parser("signature", help="generate_signature_hash: parità con BeautifulSoup e tempi")
+    signature.add_argument("files", nargs="*", help="File HTML da confrontare (default: pagina sintetica)")
+    signature.set_defaults(func=bench_signature)
+
+    similarity = commands.add_parser("similarity", help="compute_text_similarity: metodi a confronto con ratio() storico")
+    similarity.add_argument("files", nargs="*", help="Testo vecchio e nuovo (default: coppia sintetica da 200 KB)")
+    similarity.add_argument("--change", type=float, default=0.05, help="Frazione di righe modificate nei testi sintetici")
+    similarity.add_argument("--threshold", type=float, default=0.9, help="detection_threshold simulata")
+    similarity.set_defaults(func=bench_similarity)
+
+    importtime = commands.add_parser("importtime", help="Tempi di import (-X importtime), prima riga della CLI e prima finestra")
+    importtime.add_argument("--repeat", type=int, default=3, help="Ripetizioni, si tiene la migliore")
+    importtime.add_argument("--top", type=int, default=12, help="Import diretti più costosi da elencare")
+    importtime.set_defaults(func=bench_importtime)
+
+    raster = commands.add_parser("raster", help="pdf_mode 'image': rasterizzazione in memoria contro PNG su disco")
+    raster.add_argument("file", nargs="?", help="PDF da rasterizzare (default: documento sintetico)")
+    raster.add_argument("--pages", type=int, default=100, help="Pagine del documento sintetico")
+    raster.add_argument("--dpi", type=int, default=150, help="Risoluzione di rasterizzazione")
+    raster.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Processi per il metodo 'parallel'")
+    raster.add_argument("--method", choices=list(RASTER_METHODS), help=argparse.SUPPRESS)
+    raster.set_defaults(func=bench_raster)
+
+    printtopdf = commands.add_parser("printtopdf", help="Page.printToPDF: base64 intero contro stream IO.read su disco")
+    printtopdf.add_argument("--size-mb", type=int, default=200, help="Dimensione del PDF simulato")
+    printtopdf.add_argument("--method", choices=list(PRINT_METHODS), help=argparse.SUPPRESS)
+    printtopdf.set_defaults(func=bench_printtopdf)
+
+    diff = commands.add_parser("diff", help="diff_lines (patience/Myers) contro ndiff storico")
+    diff.add_argument("files", nargs="*", help="Testo vecchio e nuovo (default: coppia sintetica)")
+    diff.add_argument("--size-mb", type=float, default=5, help="Dimensione dei testi sintetici")
+    diff.add_argument("--change", type=float, default=0.02, help="Frazione di righe modificate nei testi sintetici")
+    diff.add_argument("--rewritten-lines", type=int, default=1000, help="Righe del blocco riscritto su cui misurare ndiff")
+    diff.set_defaults(func=bench_diff)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    ws.multiprocessing.freeze_support()
+    sys.exit(main())
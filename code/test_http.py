@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Controlli del pre-check HTTP (GET condizionale) e del client HTTP condiviso contro un
+server locale (http.server), senza rete né browser.
+
+Uso (dalla cartella code/):
+    python -m unittest test_http
+"""
+import gzip
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import webscraper_NEW as ws
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 21 Oct 2015 07:28:00 GMT"
+PAGE = b"<html><head><meta charset='utf-8'></head><body><p>Articolo 1</p></body></html>"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Pagine statiche con i comportamenti usati dal pre-check."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, come i server reali
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address[1], dict(self.headers)))
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == ETAG:
+                return self._reply(304, {"ETag": ETAG})
+            return self._reply(200, {"ETag": ETAG}, PAGE)
+        if self.path == "/last-modified":
+            if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                return self._reply(304, {})
+            return self._reply(200, {"Last-Modified": LAST_MODIFIED}, PAGE)
+        if self.path == "/plain":
+            return self._reply(200, {}, PAGE)
+        if self.path == "/gzip":
+            return self._reply(200, {"Content-Encoding": "gzip"}, gzip.compress(PAGE))
+        if self.path == "/redirect-out":
+            return self._reply(302, {"Location": "http://esterno.invalid/"})
+        if self.path == "/slow":
+            time.sleep(2)
+            return self._reply(200, {}, PAGE)
+        return self._reply(404, {}, b"not found")
+
+    def _reply(self, status, headers, body=b""):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpPrecheckTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+
+    def test_200_returns_validators(self):
+        not_modified, validators, response = ws.http_conditional_check(self.base + "/etag")
+        self.assertFalse(not_modified)
+        self.assertEqual(validators, {"etag": ETAG})
+        self.assertEqual(response.status, 200)
+        self.assertIn("Articolo 1", response.text())
+
+    def test_etag_round_trip_gives_304(self):
+        _, validators, _ = ws.http_conditional_check(self.base + "/etag")
+        not_modified, kept, response = ws.http_conditional_check(self.base + "/etag", validators)
+        self.assertTrue(not_modified)
+        self.assertEqual(kept, {"etag": ETAG})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(self.server.requests[-1][2].get("If-None-Match"), ETAG)
+
+    def test_last_modified_round_trip_gives_304(self):
+        _, validators, _ = ws.http_conditional_check(self.base + "/last-modified")
+        self.assertEqual(validators, {"last_modified": LAST_MODIFIED})
+        not_modified, kept, _ = ws.http_conditional_check(self.base + "/last-modified", validators)
+        self.assertTrue(not_modified)
+        self.assertEqual(kept, validators)
+
+    def test_stale_validators_give_200(self):
+        not_modified, validators, _ = ws.http_conditional_check(self.base + "/etag", {"etag": '"v0"'})
+        self.assertFalse(not_modified)
+        self.assertEqual(validators, {"etag": ETAG})
+
+    def test_no_validators(self):
+        not_modified, validators, _ = ws.http_conditional_check(self.base + "/plain")
+        self.assertFalse(not_modified)
+        self.assertEqual(validators, {})
+
+    def test_http_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            ws.http_conditional_check(self.base + "/missing")
+
+    def test_timeout_is_raised(self):
+        started = time.monotonic()
+        with self.assertRaises(OSError):
+            ws.http_conditional_check(self.base + "/slow", timeout=0.3)
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_keep_alive_connection_is_reused(self):
+        client = ws.HttpClient()
+        try:
+            for _ in range(5):
+                self.assertEqual(client.get(self.base + "/plain").status, 200)
+        finally:
+            client.close()
+        self.assertEqual(len({port for _, port, _ in self.server.requests}), 1)
+
+    def test_gzip_body_is_decompressed(self):
+        self.assertEqual(ws.get_http_client().get(self.base + "/gzip").body, PAGE)
+
+    def test_redirect_outside_allowed_domains_is_refused(self):
+        with self.assertRaises(ValueError):
+            ws.get_http_client().get(self.base + "/redirect-out", allowed_domains=["127.0.0.1"])
+
+    def test_detection_from_fetched_html(self):
+        response = ws.get_http_client().get(self.base + "/plain")
+        site_config = {"detection_type": "hash"}
+        changed, signature, _, _ = ws.detect_page_change_from_html(response.text(), site_config, None, "test_http")
+        self.assertTrue(changed)
+        changed_again, _, _, _ = ws.detect_page_change_from_html(response.text(), site_config, signature, "test_http")
+        self.assertFalse(changed_again)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Parità di generate_signature_hash (SignatureTextHasher) con l'implementazione storica
+basata su BeautifulSoup: un cambio di hash farebbe risultare modificate tutte le pagine
+monitorate al primo giro.
+
+Uso (dalla cartella code/):
+    python -m unittest test_signature_hash
+"""
+import random
+import unittest
+
+import webscraper_NEW as ws
+from benchmark import legacy_signature_hash, synthetic_page
+
+# Markup al limite: annidamenti errati, tag vuoti, entità, CDATA, testo di rt/template
+EDGE_CASES = [
+    "",
+    "solo testo",
+    "<p>a<script>x</script>b</p>",
+    "<p>a</p><p>b",
+    "<table><tr><td>a<td>b</table>",
+    "<div>a<br>b</div>",
+    "<p>&amp;&nbsp;x &notin; &notit; &#x41; &#65 &#128; &#0;</p>",
+    "<![CDATA[hello]]><p>x</p>",
+    "<script>a</p>b</script>c",
+    "<p>x<meta>y</meta>z</p>",
+    "<noscript><p>hidden</p></noscript>visible",
+    "<b><i>a</b>c</i>d",
+    "<ruby>漢<rt>kan</rt><rp>(</rp></ruby>",
+    "<template><p>t</p></template>after",
+    "<br/>x<br></br>y",
+    "<textarea><b>x</b></textarea>",
+    "<title>T</title><body>B</body>",
+    "<p>a &lt;b&gt; c</p>",
+    "<!DOCTYPE html><?xml x?><!-- c -->text",
+    "<style>p{}</style><p>s</p></style>q",
+    "<select><option>a<option>b</select>",
+    "a<p>\n\n  b  \n</p>  c",
+    "<p>&#xD800; &#1114112; &#x; &#99999999; &#12</p>",
+    "<img src=x>text</img>more",
+    "<p>&ampx &amp; &AMP &AMP; &foo; &foo &lt</p>",
+    "a < b & c </> <!x> d",
+    "riga\r\nsuccessiva\tcon tab",
+]
+
+FUZZ_TAGS = ["p", "div", "b", "span", "rt", "rp", "ruby", "template", "script", "style", "noscript",
+             "meta", "br", "img", "li", "table", "td", "a", "svg", "html", "body", "head", "title",
+             "textarea", "pre"]
+FUZZ_BITS = ["ciao", " ", "\n", "  x y ", "&amp;", "&nbsp;", "&foo;", "&foo", "&#65;", "&#x41;", "&#150;",
+             "&#129;", "&#0;", "&#xD800;", "&#99999999;", "&#12", "&lt", "<!-- c -->", "<!DOCTYPE html>",
+             "<![CDATA[ cd ]]>", "<?pi x?>", "<", "&", "</>", "<!x>", "\r\n", "\t", "é", "€"]
+FUZZ_DOCUMENTS = 20000
+
+
+def fuzz_document(rng):
+    parts = []
+    for _ in range(rng.randint(1, 40)):
+        r, tag = rng.random(), rng.choice(FUZZ_TAGS)
+        if r < 0.3:
+            parts.append(f"<{tag}>")
+        elif r < 0.5:
+            parts.append(f"</{tag}>")
+        elif r < 0.55:
+            parts.append(f"<{tag}/>")
+        elif r < 0.6:
+            parts.append(f"<{tag} a='1' b>")
+        else:
+            parts.append(rng.choice(FUZZ_BITS))
+    return "".join(parts)
+
+
+class SignatureHashParityTest(unittest.TestCase):
+
+    def assertSameHash(self, html_content):
+        self.assertEqual(ws.generate_signature_hash(html_content), legacy_signature_hash(html_content),
+                         f"hash diverso per {html_content!r}")
+
+    def test_edge_cases(self):
+        for html_content in EDGE_CASES:
+            with self.subTest(html=html_content):
+                self.assertSameHash(html_content)
+
+    def test_fuzzed_documents(self):
+        rng = random.Random(1)
+        mismatches = [html_content for html_content in (fuzz_document(rng) for _ in range(FUZZ_DOCUMENTS))
+                      if ws.generate_signature_hash(html_content) != legacy_signature_hash(html_content)]
+        self.assertEqual(mismatches[:5], [], f"{len(mismatches)} documenti su {FUZZ_DOCUMENTS} con hash diverso")
+
+    def test_large_page(self):
+        self.assertSameHash(synthetic_page(blocks=2000))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Controlli di SignatureStore con più istanze sullo stesso database, come process_pages
+insieme alla rielaborazione dalla GUI o al daemon della CLI.
+
+Uso (dalla cartella code/):
+    python -m unittest test_signature_store
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+import webscraper_NEW as ws
+
+
+class SignatureStoreConcurrencyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.work_dir.name, "signatures.db")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_writes_are_visible_to_other_instances(self):
+        first, second = ws.SignatureStore(self.path, timeout=1), ws.SignatureStore(self.path, timeout=1)
+        try:
+            first.record_result("https://ec.europa.eu/a", "date", "2024-01-01 00:00:00", "ok", 0.1)
+            second.record_result("https://ec.europa.eu/b", "date", "2024-02-01 00:00:00", "ok", 0.1)
+            self.assertEqual(second.get_signature("https://ec.europa.eu/a"), "2024-01-01 00:00:00")
+            self.assertEqual(first.get_signature("https://ec.europa.eu/b"), "2024-02-01 00:00:00")
+        finally:
+            first.close()
+            second.close()
+
+    def test_concurrent_writers_do_not_lock_each_other_out(self):
+        stores = [ws.SignatureStore(self.path, timeout=5) for _ in range(3)]
+        errors = []
+
+        def write(store, n):
+            try:
+                for i in range(100):
+                    store.record_result(f"https://ec.europa.eu/{n}/{i}", "date", f"2024-01-01 00:00:{i % 60:02d}",
+                                        "ok", 0.1)
+                    store.save_text(f"https://ec.europa.eu/{n}/{i}", "testo " * 50)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(store, n)) for n, store in enumerate(stores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        try:
+            self.assertEqual(errors, [])
+            self.assertEqual(stores[0].get_signature("https://ec.europa.eu/2/99"), "2024-01-01 00:00:39")
+        finally:
+            for store in stores:
+                store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Controlli di compute_text_similarity con il metodo "auto": sui testi brevi deve dare
+lo stesso risultato del confronto storico carattere per carattere, sui testi lunghi
+restare vicino a ratio() senza calcolarlo.
+
+Uso (dalla cartella code/):
+    python -m unittest test_similarity
+"""
+import difflib
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+import webscraper_NEW as ws
+from benchmark import synthetic_text_pair
+
+SITE_CONFIG = {"detection_threshold": 0.9}
+
+
+def char_ratio(old_text, new_text):
+    return difflib.SequenceMatcher(None, old_text, new_text).ratio()
+
+
+class AutoSimilarityTest(unittest.TestCase):
+
+    def test_identical_texts(self):
+        self.assertEqual(ws.compute_text_similarity("a b c", "a b c", SITE_CONFIG), 1.0)
+
+    def test_one_word_edit_in_short_sentence_is_not_a_change(self):
+        old_text = "Il presente regolamento entra in vigore il giorno successivo alla sua pubblicazione ufficiale."
+        new_text = old_text.replace("successivo", "seguente")
+        similarity = ws.compute_text_similarity(old_text, new_text, SITE_CONFIG)
+        self.assertAlmostEqual(similarity, char_ratio(old_text, new_text))
+        self.assertGreater(similarity, SITE_CONFIG["detection_threshold"])
+
+    def test_single_shingle_texts(self):
+        # Un solo shingle per lato: MinHash darebbe 0.0
+        self.assertAlmostEqual(ws.compute_text_similarity("a b", "a b c", SITE_CONFIG), char_ratio("a b", "a b c"))
+
+    def test_one_line_text_uses_char_fallback(self):
+        old_text = " ".join(synthetic_text_pair(size=1500)[0].splitlines())
+        new_text = old_text.replace("comma", "paragrafo", 1)
+        similarity = ws.compute_text_similarity(old_text, new_text, SITE_CONFIG)
+        self.assertAlmostEqual(similarity, char_ratio(old_text, new_text))
+        self.assertGreater(similarity, SITE_CONFIG["detection_threshold"])
+
+    def test_lines_engine_only_when_requested(self):
+        self.assertEqual(ws.SIMILARITY_DEFAULTS["similarity_exact"], "char")
+        old_text, new_text = "una riga sola", "una riga diversa"
+        config = {**SITE_CONFIG, "similarity_exact": "lines"}
+        self.assertEqual(ws.compute_text_similarity(old_text, new_text, config), 0.0)
+
+    def test_long_texts_use_estimate(self):
+        old_text, new_text = synthetic_text_pair(size=200_000, change=0.02)
+        estimate = ws.similarity_minhash(old_text, new_text, ws.SIMILARITY_DEFAULTS)
+        self.assertEqual(ws.compute_text_similarity(old_text, new_text, SITE_CONFIG), estimate)
+        self.assertGreater(estimate, SITE_CONFIG["detection_threshold"] + ws.SIMILARITY_DEFAULTS["similarity_margin"])
+
+    def test_long_near_threshold_pair_uses_token_engine(self):
+        # Stima MinHash entro il margine dalla soglia: ricalcolo per parole, non per caratteri
+        old_text, new_text = synthetic_text_pair(size=200_000, change=0.06)
+        estimate = ws.similarity_minhash(old_text, new_text, ws.SIMILARITY_DEFAULTS)
+        self.assertLessEqual(abs(estimate - SITE_CONFIG["detection_threshold"]), ws.SIMILARITY_DEFAULTS["similarity_margin"])
+        started = time.perf_counter()
+        similarity = ws.compute_text_similarity(old_text, new_text, SITE_CONFIG)
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual(similarity, ws.similarity_tokens(old_text, new_text, ws.SIMILARITY_DEFAULTS))
+        self.assertGreater(similarity, SITE_CONFIG["detection_threshold"])
+
+    def test_estimate_is_stable_across_processes(self):
+        # Gli shingle non usano hash(): la stima non cambia con PYTHONHASHSEED
+        script = ("import benchmark, webscraper_NEW as ws; o, n = benchmark.synthetic_text_pair(size=50_000, change=0.1); "
+                  "print(ws.similarity_minhash(o, n, ws.SIMILARITY_DEFAULTS), ws.similarity_simhash(o, n, ws.SIMILARITY_DEFAULTS))")
+        outputs = {
+            subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)),
+                           env={**os.environ, "PYTHONHASHSEED": seed}).stdout.strip().splitlines()[-1]
+            for seed in ("1", "2", "3")
+        }
+        self.assertEqual(len(outputs), 1, outputs)
+
+    def test_unrelated_long_texts_are_a_change(self):
+        old_text, _ = synthetic_text_pair(size=50_000, seed=1)
+        new_text, _ = synthetic_text_pair(size=50_000, seed=2)
+        self.assertLess(ws.compute_text_similarity(old_text, new_text, SITE_CONFIG), SITE_CONFIG["detection_threshold"])
+
+
+if __name__ == "__main__":
+    unittest.main()
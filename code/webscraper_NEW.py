@@ -6,29 +6,79 @@ import logging
 from logging.handlers import RotatingFileHandler
 import threading
 import subprocess
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+import atexit
+import importlib
+from contextlib import contextmanager, closing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 from datetime import datetime
-import psutil
-from webdriver_manager.chrome import ChromeDriverManager
 import sys
 import re
-from urllib.parse import urlparse
-import pikepdf
+from urllib.parse import urlparse, urljoin, urlunparse
 import hashlib
+import sqlite3
 import difflib
-from bs4 import BeautifulSoup
-from dateutil.parser import parse as parse_date
+import heapq
+import itertools
+import bisect
+from collections import OrderedDict
+import queue
+from html.parser import HTMLParser
+from html.entities import html5 as HTML5_ENTITIES
 import base64
-import fitz  # PyMuPDF
-from PIL import Image
-import imageio
-from PIL import ImageTk
+import http.client
+import ssl
+import gzip
+import zlib
 import io
-from tkinterdnd2 import TkinterDnD
+import shutil
+
+
+class LazyModule:
+    """
+    Modulo (o attributo di modulo) importato al primo utilizzo.
+    La GUI (tkinter, TkinterDnD, ImageTk, imageio) non viene caricata
+    quando il motore gira senza interfaccia, ad esempio da webscraper_cli.py;
+    selenium, fitz, bs4 e dateutil solo dalla funzione che li usa.
+    Gli attributi richiamabili (classi, funzioni) si usano come l'originale.
+    """
+
+    def __init__(self, name, attribute=None):
+        self._name = name
+        self._attribute = attribute
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            module = importlib.import_module(self._name)
+            self._target = getattr(module, self._attribute) if self._attribute else module
+        return self._target
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+
+webdriver = LazyModule("selenium.webdriver")
+Service = LazyModule("selenium.webdriver.chrome.service", "Service")
+Options = LazyModule("selenium.webdriver.chrome.options", "Options")
+WebDriverWait = LazyModule("selenium.webdriver.support.ui", "WebDriverWait")
+ChromeDriverManager = LazyModule("webdriver_manager.chrome", "ChromeDriverManager")
+psutil = LazyModule("psutil")
+fitz = LazyModule("fitz")  # PyMuPDF
+Image = LazyModule("PIL.Image")
+BeautifulSoup = LazyModule("bs4", "BeautifulSoup")
+parse_date = LazyModule("dateutil.parser", "parse")
+tk = LazyModule("tkinter")
+filedialog = LazyModule("tkinter.filedialog")
+messagebox = LazyModule("tkinter.messagebox")
+ttk = LazyModule("tkinter.ttk")
+imageio = LazyModule("imageio")
+ImageTk = LazyModule("PIL.ImageTk")
+TkinterDnD = LazyModule("tkinterdnd2", "TkinterDnD")
 AVAILABLE_LANGUAGES = ["it", "en", "fr", "de", "es", "sw"]
 
 # === Config ===
@@ -46,7 +96,20 @@ DEFAULT_CONFIG = {
     "use_debug_mode": False,
     "log_file": LOG_FILE,
     "chrome_path": "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
-    "allowed_domains": ["ec.europa.eu", "agenziaentrate.gov.it"]
+    "allowed_domains": ["ec.europa.eu", "agenziaentrate.gov.it"],
+    "driver_pool_size": 1,
+    "driver_max_pages": 50,
+    "workers": 1,
+    "domain_max_concurrency": 2,
+    "domain_min_delay": 1.0,
+    "http_precheck": True,
+    "http_timeout": 10,
+    "resume_run": False,
+    "raster_workers": 2,
+    "raster_dpi": 150,
+    "artifact_links": True,
+    "index_text_workers": 2,
+    "pdf_cache_mb": 256
 }
 
 CHROME_PATH_ALLOWED = [
@@ -67,6 +130,27 @@ def validate_config(config):
     if not isinstance(config.get("timeout", 10), int) or config["timeout"] < 0:
         errors.append("timeout deve essere un intero positivo")
 
+    # Pool WebDriver: interi positivi
+    for key in ("driver_pool_size", "driver_max_pages", "workers", "domain_max_concurrency", "raster_workers",
+                "index_text_workers", "pdf_cache_mb"):
+        value = config.get(key, 1)
+        if not isinstance(value, int) or value < 1:
+            errors.append(f"{key} deve essere un intero maggiore di zero")
+
+    # Ritardo minimo tra richieste allo stesso dominio
+    min_delay = config.get("domain_min_delay", 1.0)
+    if not isinstance(min_delay, (int, float)) or min_delay < 0:
+        errors.append("domain_min_delay deve essere un numero non negativo")
+
+    # Risoluzione dei PDF immagine
+    raster_dpi = config.get("raster_dpi", 150)
+    if not isinstance(raster_dpi, int) or not 36 <= raster_dpi <= 600:
+        errors.append("raster_dpi deve essere un intero tra 36 e 600")
+
+    # Hard link ai blob dell'archivio nelle cartelle delle esecuzioni
+    if not isinstance(config.get("artifact_links", True), bool):
+        errors.append("artifact_links deve essere true o false")
+
     # Lingua
     if not isinstance(config.get("language", "en"), str):
         errors.append("language deve essere una stringa")
@@ -99,20 +183,21 @@ def validate_config(config):
 
 
 
-# Function: load_config
-# Description: Function to load config.
-# Inputs: None
+# Function: load_validated_config
+# Description: Function to load and validate config.
+# Inputs: defaults
 # Output: Dict
-# Called by: __init__, load_sites_into_table, process_pages, save_config, save_debug_level
-# Calls: open, save_config
-def load_config():
+# Called by: get_startup_config
+# Calls: open, save_config, validate_config
+def load_validated_config(defaults=DEFAULT_CONFIG):
+    # 'defaults' fissa i valori del motore: più avanti DEFAULT_CONFIG viene ridefinito per il video
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
             config = json.load(f)
             return validate_config(config)
     else:
-        save_config(DEFAULT_CONFIG)
-        return DEFAULT_CONFIG
+        save_config(defaults)
+        return defaults
 
 
 # Function: load_locale
@@ -132,37 +217,83 @@ def load_locale(lang="en"):
         print(f"[Locale] Errore caricamento: {e}")
         return {}
 
-# Inizializzazione della variabile 'locale' con la lingua predefinita
-locale = load_locale("en")
-
-# Configurazione del logging utilizzando la variabile 'locale'
-#logging.basicConfig(
-#    level=logging.DEBUG,
-#    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-#    handlers=[
-#        logging.FileHandler(locale.get("selenium_debuglog", "selenium_debug.log")),
-#        logging.StreamHandler()
-#    ]
-#)
+
+_startup_config = None
+
+
+def get_startup_config():
+    """
+    Configurazione validata letta al primo utilizzo, non più all'import del modulo.
+    Un config.json non valido solleva ValueError come prima.
+    """
+    global _startup_config
+    if _startup_config is None:
+        _startup_config = load_validated_config()
+    return _startup_config
+
+
+def __getattr__(name):
+    # 'config' del modulo (usato da webscraper_cli) viene caricato al primo accesso
+    if name == "config":
+        return get_startup_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazyLocale:
+    """Traduzioni nella lingua di config.json, caricate al primo accesso."""
+
+    def __init__(self):
+        self._strings = None
+
+    def _load(self):
+        if self._strings is None:
+            try:
+                lang = get_startup_config().get("language", "en")
+            except Exception as e:
+                print(f"[Locale] Configurazione non leggibile, uso 'en': {e}")
+                lang = "en"
+            self._strings = load_locale(lang)
+        return self._strings
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __contains__(self, key):
+        return key in self._load()
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
 # === Logging eventi critici separato ===
-base_dir = os.path.dirname(os.path.abspath(__file__))  # Percorso corrente del file
-log_dir = os.path.join(base_dir, "log")
-os.makedirs(log_dir, exist_ok=True)
-critical_log_path = os.path.join(log_dir, "critical_security.log")
+class DeferredFileHandler(logging.FileHandler):
+    """FileHandler che crea cartella e file solo alla prima scrittura."""
 
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
 
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
 
 
+base_dir = os.path.dirname(os.path.abspath(__file__))  # Percorso corrente del file
+log_dir = os.path.join(base_dir, "log")
+critical_log_path = os.path.join(log_dir, "critical_security.log")
 
-critical_handler = logging.FileHandler(critical_log_path, encoding="utf-8")
+critical_handler = DeferredFileHandler(critical_log_path, encoding="utf-8")
 critical_handler.setLevel(logging.WARNING)  # Solo WARNING, ERROR, CRITICAL
 critical_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
 logging.getLogger().addHandler(critical_handler)
-# Caricamento della configurazione dell'applicazione
-config = load_config()  # Assicurati che questa funzione sia definita altrove nel tuo codice
 
-# Aggiornamento della variabile 'locale' con la lingua specificata nella configurazione
-locale = load_locale(config.get("language", "en"))
+# 'locale' segue la lingua di config.json; file letti al primo messaggio tradotto
+locale = LazyLocale()
 
 
 def sanitize_filename(name):
@@ -510,12 +641,52 @@ def write_log(log_file, message):
             log.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
 
 
+# Function: iter_csv_rows
+# Description: Function to stream csv rows.
+# Inputs: csv_path
+# Output: Iterator[list]
+# Called by: process_pages, count_csv_rows, read_csv
+# Calls: FileNotFoundError, open
+def iter_csv_rows(csv_path):
+    """
+    Legge il CSV in modalità posizionale una riga alla volta, ignorando l'intestazione
+    e le righe con meno di 4 campi; restituisce solo i primi 4 campi.
+    Le eccezioni su file mancante o vuoto partono alla prima next().
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    with open(csv_path, mode="r", encoding="utf-8", newline="") as file:
+        reader = csv.reader(file, delimiter=';')
+        try:
+            next(reader)  # Salta l'intestazione
+        except StopIteration:
+            raise ValueError("CSV file is empty or missing header")
+
+        for row in reader:
+            # Ignora righe vuote o incomplete
+            if len(row) < 4:
+                continue
+            yield row[:4]  # Usa solo i primi 4 campi
+
+
+# Function: count_csv_rows
+# Description: Function to count valid csv rows without keeping them in memory.
+# Inputs: csv_path
+# Output: int
+# Called by: process_pages
+# Calls: iter_csv_rows
+def count_csv_rows(csv_path):
+    """Numero di righe che iter_csv_rows produrrà (per la barra di avanzamento)."""
+    return sum(1 for _ in iter_csv_rows(csv_path))
+
+
 # Function: read_csv
 # Description: Function to read csv.
 # Inputs: csv_path
 # Output: [None]
-# Called by: process_pages
-# Calls: FileNotFoundError, list, open
+# Called by: [unknown]
+# Calls: iter_csv_rows, list
 def read_csv(csv_path):
     """
     Legge un file CSV in modalità posizionale, ignorando l'intestazione.
@@ -529,22 +700,7 @@ def read_csv(csv_path):
             - data: lista di liste (righe del CSV, escluse le intestazioni)
             - fieldnames: intestazioni fisse ["Url", "Nome Nazione", "Data precedentemente rilevata", "Data Ultimo Aggiornamento"]
     """
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError(f"CSV file not found: {csv_path}")
-
-    with open(csv_path, mode="r", encoding="utf-8") as file:
-        reader = csv.reader(file, delimiter=';')
-        try:
-            next(reader)  # Salta l'intestazione
-        except StopIteration:
-            raise ValueError("CSV file is empty or missing header")
-
-        data = []
-        for row in reader:
-            # Ignora righe vuote o incomplete
-            if len(row) < 4:
-                continue
-            data.append(row[:4])  # Usa solo i primi 4 campi
+    data = list(iter_csv_rows(csv_path))
 
     # Intestazioni fisse, indipendenti dal contenuto del file
     fieldnames = ["Url", "Nome Nazione", "Data precedentemente rilevata", "Data Ultimo Aggiornamento"]
@@ -552,6 +708,38 @@ def read_csv(csv_path):
     return data, fieldnames
 
 
+# Function: patch_csv_rows
+# Description: Function to apply several cell updates to a csv in a single pass.
+# Inputs: csv_path, updates, key_column, value_column
+# Output: int
+# Called by: reprocess_selected_row
+# Calls: open, os.replace
+def patch_csv_rows(csv_path, updates, key_column=0, value_column=3):
+    """
+    Aggiorna in un solo passaggio le righe di un CSV (separatore ';') la cui colonna
+    'key_column' è una chiave di 'updates', scrivendo il nuovo valore in 'value_column'.
+    Come nel ciclo originale viene aggiornata solo la prima riga per chiave.
+    Il file viene riscritto in streaming su un temporaneo e sostituito atomicamente.
+    Restituisce il numero di righe aggiornate.
+    """
+    remaining = dict(updates)
+    if not remaining:
+        return 0
+    tmp_path = csv_path + ".tmp"
+    patched = 0
+    with open(csv_path, "r", encoding="utf-8", newline="") as src, \
+            open(tmp_path, "w", encoding="utf-8", newline="") as dst:
+        reader = csv.reader(src, delimiter=';')
+        writer = csv.writer(dst, delimiter=';')
+        for line_number, row in enumerate(reader):
+            if line_number and remaining and len(row) > max(key_column, value_column):
+                key = row[key_column].strip()
+                if key in remaining:
+                    row[value_column] = remaining.pop(key)
+                    patched += 1
+            writer.writerow(row)
+    os.replace(tmp_path, csv_path)
+    return patched
 
 
 # Function: write_csv
@@ -682,37 +870,32 @@ def ensure_directory_exists(path):
         logging.info(f"Created directory: {path}")
 
 
-# Function: save_page_as_pdf_with_selenium
-# Description: Function to save page as pdf with selenium.
-# Inputs: url, output_path, timeout, log_file
-# Output: [None]
-# Called by: process_pages
-# Calls: FileNotFoundError, Options, Service, ensure_directory_exists, get_base_dir, open, write_log
-def save_page_as_pdf_with_selenium(url, output_path, timeout, debug_mode=False, log_file=None):
+# Function: print_page_to_pdf
+# Description: Function to print the page already loaded in a driver as PDF, streamed to a staging file.
+# Inputs: driver, url, output_path, debug_mode
+# Output: PrintedPdf | None
+# Called by: process_pages, reprocess_selected_row, capture_page_as_pdf
+# Calls: get_base_dir, read_cdp_stream, decode_cdp_pdf
+def print_page_to_pdf(driver, url, output_path, debug_mode=False):
     """
-    Salva una pagina web come PDF. Se la pagina è vuota o fallisce la generazione del PDF,
-    salva uno screenshot PNG come fallback.
+    Stampa in PDF la pagina già caricata nel driver, senza ricaricarla.
+    Il PDF arriva da Chrome a blocchi (transferMode ReturnAsStream + IO.read) e viene
+    scritto direttamente in un file di appoggio '<output_path>.part', calcolando lo
+    SHA256 durante la scrittura: la memoria usata non dipende dalla lunghezza della
+    pagina. Il file di appoggio diventa il PDF finale con finalize_pdf.
+    Se la pagina è vuota salva uno screenshot PNG come fallback.
 
     Args:
-        url (str): L'URL della pagina da salvare.
-        output_path (str): Percorso completo per il file PDF.
-        timeout (int): Tempo massimo di attesa per il caricamento della pagina.
-        log_file (str): Percorso del file di log (opzionale).
+        driver: WebDriver già posizionato sulla pagina (es. dopo la rilevazione).
+        url (str): URL della pagina, usato per log e dump di debug.
+        output_path (str): Percorso del PDF finale.
+        debug_mode (bool): Se True salva l'HTML completo in 'debug_html/'.
 
     Returns:
-        bool: True se il PDF è stato salvato correttamente, False altrimenti.
+        PrintedPdf | None: file di appoggio e SHA256 del PDF, None se il PDF non è stato generato.
     """
+    staged_path = output_path + ".part"
     try:
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-javascript")
-        driver = webdriver.Chrome(service=Service("chromedriver.exe"), options=options)
-        driver.get(url)
-
         # Rimuovi script e iframe prima della stampa
         driver.execute_script("""
             let scripts = document.querySelectorAll('script, iframe');
@@ -720,9 +903,6 @@ def save_page_as_pdf_with_selenium(url, output_path, timeout, debug_mode=False,
         """)
 
         if debug_mode:
-            from urllib.parse import urlparse
-            from datetime import datetime
-        
             parsed = urlparse(url)
             host = parsed.hostname.replace(".", "_") if parsed.hostname else "unknownhost"
             ts = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -730,14 +910,11 @@ def save_page_as_pdf_with_selenium(url, output_path, timeout, debug_mode=False,
             os.makedirs(debug_dir, exist_ok=True)
             filename = os.path.join(debug_dir, f"debug_{host}_{ts}.html")
 
-        
             html = driver.execute_script("return document.documentElement.outerHTML;")
             with open(filename, "w", encoding="utf-8") as f:
                 f.write(html)
             logging.info(f"HTML salvato per debug: {filename}")
 
-        time.sleep(timeout)
-
         # Verifica contenuto testuale
         body_text = driver.execute_script("return document.body.innerText.trim();")
         if not body_text:
@@ -745,37 +922,163 @@ def save_page_as_pdf_with_selenium(url, output_path, timeout, debug_mode=False,
             screenshot_path = output_path.replace(".pdf", ".png")
             driver.save_screenshot(screenshot_path)
             logging.info(f"Screenshot salvato come fallback: {screenshot_path}")
-            driver.quit()
-            return False
+            return None
 
         # Log HTML troncato
-        html_sample = driver.execute_script("return document.body.innerHTML;")
-        html_sample = html_sample[:200] + "..." if len(html_sample) > 200 else html_sample
         if debug_mode:
+            html_sample = driver.execute_script("return document.body.innerHTML;")
+            html_sample = html_sample[:200] + "..." if len(html_sample) > 200 else html_sample
             logging.debug(f"[{url}] HTML troncato: {html_sample}")
         else:
             logging.debug(locale.get("html_debug_deactivated", f"[{url}] Modalità debug disattivata, HTML non loggato."))
 
-
         # Genera PDF
         result = driver.execute_cdp_cmd("Page.printToPDF", {
             "printBackground": True,
-            "preferCSSPageSize": True
+            "preferCSSPageSize": True,
+            "transferMode": "ReturnAsStream"
         })
+        os.makedirs(os.path.dirname(os.path.abspath(staged_path)), exist_ok=True)
+        with open(staged_path, "wb") as f:
+            if result.get("stream"):
+                sha256, size = read_cdp_stream(driver, result["stream"], f)
+            else:
+                # Chrome che ignora transferMode: il PDF arriva intero in base64
+                sha256, size = decode_cdp_pdf(result["data"], f)
+        logging.info(f"SHA256 PDF: {sha256}")
+        return PrintedPdf(staged_path, sha256, size)
+
+    except Exception as e:
+        logging.error(f"Errore durante il salvataggio PDF da {url}: {e}")
+        discard_file(staged_path)
+        return None
+
+
+# Byte richiesti a ogni IO.read sullo stream di Page.printToPDF
+CDP_STREAM_CHUNK_SIZE = 1 << 20
+
+
+class PrintedPdf:
+    """PDF restituito da Page.printToPDF, già scritto nel file di appoggio 'path'."""
+
+    def __init__(self, path, sha256, size):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+
+def read_cdp_stream(driver, handle, out, chunk_size=CDP_STREAM_CHUNK_SIZE):
+    """
+    Copia nel file 'out' lo stream CDP 'handle' a blocchi di IO.read, aggiornando lo
+    SHA256 blocco per blocco. Lo stream viene sempre chiuso (IO.close).
+    Restituisce (SHA256, byte scritti).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = driver.execute_cdp_cmd("IO.read", {"handle": handle, "size": chunk_size})
+            data = chunk.get("data", "")
+            part = base64.b64decode(data) if chunk.get("base64Encoded") else data.encode("utf-8")
+            digest.update(part)
+            out.write(part)
+            size += len(part)
+            if chunk.get("eof") or not data:
+                break
+    finally:
+        try:
+            driver.execute_cdp_cmd("IO.close", {"handle": handle})
+        except Exception as e:
+            logging.debug(f"[PDF] IO.close fallito per lo stream {handle}: {e}")
+    return digest.hexdigest(), size
+
+
+def decode_cdp_pdf(payload, out, chunk_size=CDP_STREAM_CHUNK_SIZE):
+    """
+    Decodifica a blocchi nel file 'out' il base64 di Page.printToPDF (risposta senza
+    stream), calcolando lo SHA256 durante la decodifica. Restituisce (SHA256, byte scritti).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    step = chunk_size - chunk_size % 4  # blocchi base64 completi
+    for start in range(0, len(payload), step):
+        part = base64.b64decode(payload[start:start + step])
+        digest.update(part)
+        out.write(part)
+        size += len(part)
+    return digest.hexdigest(), size
+
+
+def discard_file(path):
+    """Rimuove un file di appoggio, se esiste."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.warning(f"Impossibile rimuovere il file temporaneo {path}: {e}")
+
 
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+def write_file_atomic(path, data):
+    """Scrive 'data' in un file temporaneo accanto a 'path' e lo sostituisce atomicamente."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        discard_file(tmp_path)
+
+
+# Function: capture_page_as_pdf
+# Description: Function to print the loaded page to a PDF file as produced by Chrome.
+# Inputs: driver, url, output_path, debug_mode
+# Output: str | None
+# Called by: save_page_as_pdf_with_selenium
+# Calls: print_page_to_pdf, discard_file
+def capture_page_as_pdf(driver, url, output_path, debug_mode=False):
+    """
+    Stampa la pagina e salva il PDF così come generato da Chrome (senza finalize_pdf).
+    Restituisce lo SHA256 del PDF salvato, None se il PDF non è stato generato.
+    """
+    printed = print_page_to_pdf(driver, url, output_path, debug_mode=debug_mode)
+    if printed is None:
+        return None
+    try:
+        os.replace(printed.path, output_path)
+    except Exception as e:
+        logging.error(f"Errore durante il salvataggio PDF da {url}: {e}")
+        discard_file(printed.path)
+        return None
+    logging.info(f"PDF salvato in {output_path}")
+    return printed.sha256
 
-        with open(output_path, "wb") as f:
-            f.write(base64.b64decode(result["data"]))
 
-        # Firma SHA256 del PDF
-        import hashlib
-        pdf_hash = hashlib.sha256(open(output_path, 'rb').read()).hexdigest()
-        logging.info(f"SHA256 PDF: {pdf_hash}")
+# Function: save_page_as_pdf_with_selenium
+# Description: Function to save page as pdf with selenium.
+# Inputs: url, output_path, timeout, log_file
+# Output: [None]
+# Called by: [unknown]
+# Calls: acquire_driver_pool, capture_page_as_pdf
+def save_page_as_pdf_with_selenium(url, output_path, timeout, debug_mode=False, log_file=None):
+    """
+    Carica una pagina con un driver del pool e la salva come PDF.
+    Da usare solo quando la pagina non è già aperta: altrimenti usare capture_page_as_pdf().
+
+    Args:
+        url (str): L'URL della pagina da salvare.
+        output_path (str): Percorso completo per il file PDF.
+        timeout (int): Tempo massimo di attesa per il caricamento della pagina.
+        log_file (str): Percorso del file di log (opzionale).
 
-        logging.info(f"PDF salvato in {output_path}")
-        driver.quit()
-        return True
+    Returns:
+        bool: True se il PDF è stato salvato correttamente, False altrimenti.
+    """
+    try:
+        with shared_driver_pool() as pool, pool.driver() as driver:
+            load_page(driver, url, timeout)
+            return capture_page_as_pdf(driver, url, output_path, debug_mode=debug_mode) is not None
 
     except Exception as e:
         logging.error(f"Errore durante il salvataggio PDF da {url}: {e}")
@@ -799,23 +1102,15 @@ def extract_last_updated_with_selenium(url, timeout):
     Returns:
         [None]
     """
-    driver_path = os.path.join(get_base_dir(), "chromedriver.exe")
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    # chrome_options.add_argument("--no-sandbox")
-
-    service = Service(driver_path)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-
     try:
         logging.info(locale.get("navigating_to_url_for_extracting", "Navigating to {url} for extracting 'Last updated' date.").format(url=url))
 
-        driver.get(url)
-        time.sleep(timeout)
+        date_selector = "//span[@class='conf-macro output-inline' and @data-macro-name='last-updated']"
+        with shared_driver_pool() as pool, pool.driver() as driver:
+            load_page(driver, url, timeout, {"date_selector": date_selector, "wait_for_date_selector": True})
 
-        element = driver.find_element("xpath", "//span[@class='conf-macro output-inline' and @data-macro-name='last-updated']")
-        last_updated_text = element.text.strip()
+            element = driver.find_element("xpath", date_selector)
+            last_updated_text = element.text.strip()
         logging.info(locale.get("last_updated_date_found", "'Last updated' date found: {last_updated_text}").format(last_updated_text=last_updated_text))
 
         return parse_date_with_translation(last_updated_text)
@@ -823,8 +1118,6 @@ def extract_last_updated_with_selenium(url, timeout):
         logging.error(locale.get("error_extracting_last_updated_date", "Error extracting 'Last updated' date for {url}: {e}").format(url=url, e=e))
 
         return None
-    finally:
-        driver.quit()
 
 def setup_secure_logging(log_file_path=LOG_FILE, max_bytes=1048576, backup_count=5):
     logger = logging.getLogger()
@@ -854,8 +1147,110 @@ def get_secure_chrome_options():
     options.add_argument("--window-size=1920,1080")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option("useAutomationExtension", False)
+    # Eventi CDP 'Network' nel performance log: servono a wait_for_page_ready()
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
     return options
 
+
+# === Attesa caricamento pagina ===
+
+# Richieste di lunga durata che non devono impedire di considerare la rete inattiva
+LONG_LIVED_REQUEST_TYPES = {"EventSource", "WebSocket"}
+
+
+def drain_network_events(driver, inflight):
+    """
+    Legge gli eventi CDP 'Network' accumulati nel performance log e aggiorna
+    l'insieme delle richieste ancora in corso.
+    Restituisce False se il driver non espone il performance log.
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return False
+
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        method = message.get("method", "")
+        params = message.get("params", {})
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if params.get("type") not in LONG_LIVED_REQUEST_TYPES:
+                inflight.add(request_id)
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            inflight.discard(request_id)
+    return True
+
+
+def wait_for_page_ready(driver, timeout, site_config=None, idle_time=0.5, poll_interval=0.1):
+    """
+    Attende che la pagina sia pronta invece di dormire per 'timeout' secondi.
+
+    La pagina è pronta quando document.readyState è 'complete' e:
+      - se il sito ha 'wait_for_date_selector', l'XPath 'date_selector' è presente;
+      - altrimenti la rete è inattiva da almeno 'idle_time' secondi (eventi CDP
+        Network, oppure conteggio Resource Timing se il performance log manca).
+    'timeout' è solo il limite massimo di attesa.
+
+    Returns:
+        bool: True se la pagina è pronta, False se è scaduto il timeout.
+    """
+    site_config = site_config or {}
+    selector = site_config.get("date_selector") if site_config.get("wait_for_date_selector") else None
+    started = time.monotonic()
+    deadline = started + max(0, timeout or 0)
+    inflight = set()
+    use_network_log = True
+    last_resource_count = -1
+    idle_since = None
+
+    while True:
+        now = time.monotonic()
+        try:
+            state = driver.execute_script("return document.readyState;")
+        except Exception:
+            state = ""
+        if use_network_log:
+            use_network_log = drain_network_events(driver, inflight)
+
+        if state == "complete":
+            if selector:
+                ready = bool(driver.find_elements("xpath", selector))
+            else:
+                if use_network_log:
+                    quiet = not inflight
+                else:
+                    resource_count = driver.execute_script("return performance.getEntriesByType('resource').length;")
+                    quiet = resource_count == last_resource_count
+                    last_resource_count = resource_count
+                if not quiet:
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = now
+                ready = idle_since is not None and now - idle_since >= idle_time
+            if ready:
+                logging.debug(f"[READY] Pagina pronta in {now - started:.2f}s")
+                return True
+
+        if now >= deadline:
+            logging.info(f"[READY] Timeout di {timeout}s raggiunto (readyState={state}, richieste in corso={len(inflight)})")
+            return False
+        time.sleep(poll_interval)
+
+
+def load_page(driver, url, timeout, site_config=None):
+    """
+    Naviga all'URL e attende che la pagina sia pronta (vedi wait_for_page_ready).
+    """
+    # Scarta gli eventi di rete delle navigazioni precedenti
+    drain_network_events(driver, set())
+    driver.get(url)
+    return wait_for_page_ready(driver, timeout, site_config)
+
 def is_domain_allowed(url, allowed_domains):
     parsed = urlparse(url)
     netloc = parsed.netloc.lower()
@@ -864,16 +1259,89 @@ def is_domain_allowed(url, allowed_domains):
             return True
     return False
 
-def sanitize_pdf_links(pdf_path):
+def strip_pdf_annotations(doc):
+    """
+    Toglie da ogni pagina l'array /Annots (link attivi compresi).
+    Restituisce il numero di pagine modificate.
+    """
+    stripped = 0
+    for page in doc:
+        if doc.xref_get_key(page.xref, "Annots")[0] != "null":
+            doc.xref_set_key(page.xref, "Annots", "null")
+            stripped += 1
+    return stripped
+
+
+def finalize_pdf(source_path, pdf_path, config):
+    """
+    Finalizzazione in un solo passaggio del PDF stampato (file di appoggio di
+    print_page_to_pdf): estrae il testo (TXT accanto al PDF), applica la modalità PDF
+    configurata (senza link o rasterizzata) e porta il risultato in 'pdf_path' con un
+    solo os.replace. Il file di appoggio viene sempre consumato.
+    Restituisce True se il PDF è stato scritto.
+    """
+    pdf_mode = config.get("pdf_mode", "with_links")
+    logging.debug(f"[FINALIZE] PDF_MODE={pdf_mode} | FILE={pdf_path}")
+    stripped_path = pdf_path + ".tmp"
+    final_path = source_path
+
     try:
-        with pikepdf.open(pdf_path, allow_overwriting_input=True) as pdf:
-            for page in pdf.pages:
-                if "/Annots" in page:
-                    page.Annots = []
-            pdf.save(pdf_path)
-            logging.info(f"Rimossi link attivi da: {pdf_path}")
+        try:
+            with fitz.open(source_path) as doc:
+                # Salva file TXT accanto al PDF, sempre e comunque (una pagina alla volta).
+                # Il TXT precedente può essere un hard link a un blob: si sostituisce, non si riscrive
+                try:
+                    txt_output_path = pdf_path.replace(".pdf", ".txt")
+                    with open(txt_output_path + ".tmp", "w", encoding="utf-8") as f:
+                        for number, page in enumerate(doc):
+                            f.write(("\n" if number else "") + page.get_text())
+                    os.replace(txt_output_path + ".tmp", txt_output_path)
+                    logging.info(f"[TXT] Creato file testo: {txt_output_path}")
+                except Exception as e:
+                    discard_file(pdf_path.replace(".pdf", ".txt") + ".tmp")
+                    logging.warning(f"[TXT] Errore durante salvataggio del TXT per {pdf_path}: {e}")
+
+                if pdf_mode == "no_links" and strip_pdf_annotations(doc):
+                    doc.save(stripped_path, garbage=1)
+                    final_path = stripped_path
+                    logging.info(f"Rimossi link attivi da: {pdf_path}")
+        except Exception as e:
+            logging.warning(f"[FINALIZE] Errore durante l'elaborazione di {pdf_path}: {e}")
+
+        if pdf_mode == "image":
+            logging.info(f"[RASTER] Modalità 'PDF immagine' attiva per: {pdf_path}")
+            raster_bytes, pages = rasterize_pdf_bytes(
+                final_path, dpi=config.get("raster_dpi", 150),
+                options={k: config[k] for k in RASTER_DEFAULTS if k in config},
+                workers=config.get("raster_workers", 1))
+            if raster_bytes is None:
+                logging.warning(f"[RASTER] Conversione PDF→immagine fallita, file originale mantenuto: {pdf_path}")
+            else:
+                write_file_atomic(pdf_path, raster_bytes)
+                try:
+                    os.chmod(pdf_path, 0o600)
+                except OSError:
+                    pass
+                final_path = pdf_path
+
+        if final_path != pdf_path:
+            os.replace(final_path, pdf_path)
     except Exception as e:
-        logging.warning(f"Errore nella sanitizzazione PDF {pdf_path}: {e}")
+        logging.error(f"Errore durante il salvataggio PDF {pdf_path}: {e}")
+        return False
+    finally:
+        discard_file(stripped_path)
+        if source_path != pdf_path:
+            discard_file(source_path)
+    logging.info(f"PDF salvato in {pdf_path}")
+    return True
+
+
+def finalize_saved_pdf(pdf_path, config):
+    """
+    Finalizzazione di un PDF già salvato in 'pdf_path' (vedi finalize_pdf).
+    """
+    return finalize_pdf(pdf_path, pdf_path, config)
 
 
 def close_chrome_debug(port=9222):
@@ -893,69 +1361,1133 @@ def close_chrome_debug(port=9222):
             continue
 
 
+# === Pool di WebDriver Chrome ===
 
-# Function: process_pages
-# Description: Function to process pages.
-# Inputs: config, progress_table, progress_bar, progress_count, pause_event, stop_event
-# Output: [None]
-# Called by: run_process_pages
-# Calls: Options, Service, ValueError, close_loggers, detect_page_change, ensure_directory_exists, enumerate, extract_date, get_base_dir, get_debug_driver, is_chrome_debug_running, len, load_config, open, read_csv, save_page_as_pdf_with_selenium, str, update_progress, urlparse, write_detection_log
-def process_pages(config, progress_table, progress_bar, progress_count, locale, pause_event=None, stop_event=None):
-    import os
-    import csv
-    import time
-    import logging
-    import psutil
-    from datetime import datetime
-    from urllib.parse import urlparse
-    from tkinter import messagebox
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
+def create_chrome_driver():
+    """
+    Avvia una nuova istanza headless di Chrome con le opzioni sicure standard.
+    """
+    service = Service(os.path.join(get_base_dir(), "chromedriver.exe"))
+    return webdriver.Chrome(service=service, options=get_secure_chrome_options())
 
-    def is_url_safe(url):
-        from urllib.parse import urlparse
-        import ipaddress
-        parsed = urlparse(url)
-        try:
-            ipaddress.ip_address(parsed.hostname)
-            return False  # Blocca URL con IP diretti
-        except:
-            pass
-        return (
-            parsed.scheme in ["http", "https"]
-            and not any(x in parsed.path for x in ["..", "%", "<", ">", "\"", "'"])
-        )
 
-    def is_chrome_debug_running():
-        for proc in psutil.process_iter(['name', 'cmdline']):
-            try:
-                if 'chrome.exe' in proc.info['name'].lower():
-                    cmdline = ' '.join(proc.info['cmdline']).lower()
-                    if '--remote-debugging-port=9222' in cmdline:
-                        return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
-        return False
+class ChromeDriverPool:
+    """
+    Pool thread-safe di WebDriver Chrome riutilizzabili.
 
-    timestamp_dir = datetime.now().strftime("%Y%m%d%H%M")
-    save_path = os.path.join(config["html_save_path"], timestamp_dir)
-    ensure_directory_exists(save_path)
+    I driver vengono creati su richiesta fino a 'size', controllati prima di
+    ogni prestito, ripuliti (cookie, cache, storage, finestre extra) alla
+    restituzione e riciclati dopo 'max_pages_per_driver' pagine.
+    In modalità debug il pool si collega all'unica istanza Chrome sulla porta 9222.
+    """
 
-    try:
-        raw_data, fieldnames = read_csv(config["csv_path"])
-    except Exception as e:
-        logging.error(locale.get("error_reading_csv", "Errore durante la lettura del CSV: {e}").format(e=e))
-        messagebox.showerror(
-            locale.get("error_title", locale.get("error", "Errore")),
-            locale.get("error_reading_csv", "Errore durante la lettura del CSV: {e}").format(e=e)
-        )
-        return
+    def __init__(self, size=1, max_pages_per_driver=50, use_debug=False, chrome_path=None):
+        self.use_debug = use_debug
+        self.chrome_path = chrome_path
+        self.size = 1 if use_debug else max(1, int(size))
+        self.max_pages_per_driver = max(1, int(max_pages_per_driver))
+        self.closed = False
+        self._idle = []
+        self._pages = {}
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def _create(self):
+        if self.use_debug:
+            return get_debug_driver(self.chrome_path)
+        return create_chrome_driver()
+
+    def _dispose(self, driver):
+        self._pages.pop(id(driver), None)
+        if self.use_debug:
+            # La sessione debug resta aperta: viene chiusa da close_chrome_debug()
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"[POOL] Errore durante la chiusura del driver: {e}")
+
+    @staticmethod
+    def is_healthy(driver):
+        """Verifica che la sessione WebDriver risponda ancora."""
+        try:
+            driver.execute_script("return 1;")
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Riporta il driver a uno stato pulito prima del prossimo utilizzo."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        if self.use_debug:
+            return
+        origin = driver.execute_script("return window.location.origin;")
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        if origin and origin != "null":
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        driver.get("about:blank")
+
+    def acquire(self):
+        """Preleva un driver sano dal pool, creandolo se c'è capacità libera."""
+        while True:
+            with self._cond:
+                if self.closed:
+                    raise RuntimeError("Pool WebDriver chiuso")
+                while not self._idle and self._created >= self.size:
+                    self._cond.wait()
+                if self._idle:
+                    driver = self._idle.pop()
+                else:
+                    self._created += 1
+                    driver = None
+
+            if driver is None:
+                try:
+                    driver = self._create()
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+                self._pages[id(driver)] = 0
+                logging.info(f"[POOL] Nuovo driver Chrome avviato ({self._created}/{self.size})")
+                return driver
+
+            if self.is_healthy(driver):
+                return driver
+
+            logging.warning("[POOL] Driver non più reattivo, sostituzione in corso.")
+            self._discard(driver)
+
+    def _discard(self, driver):
+        self._dispose(driver)
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def release(self, driver, healthy=True):
+        """Restituisce un driver al pool, riciclandolo se esausto o non sano."""
+        pages = self._pages.get(id(driver), 0) + 1
+        self._pages[id(driver)] = pages
+
+        if self.closed or not healthy or (not self.use_debug and pages >= self.max_pages_per_driver):
+            if healthy and not self.closed:
+                logging.info(f"[POOL] Driver riciclato dopo {pages} pagine.")
+            self._discard(driver)
+            return
+
+        try:
+            self._reset(driver)
+        except Exception as e:
+            logging.warning(f"[POOL] Reset del profilo fallito, driver scartato: {e}")
+            self._discard(driver)
+            return
+
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self):
+        """Context manager: presta un driver e lo restituisce al termine."""
+        driver = self.acquire()
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = self.is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, healthy)
+
+    def close(self):
+        """Chiude tutti i driver inattivi; quelli in prestito vengono chiusi alla restituzione."""
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for driver in idle:
+            self._dispose(driver)
+
+
+_driver_pool = None
+_driver_pool_users = 0
+_driver_pool_lock = threading.Lock()
+
+
+def acquire_driver_pool(config=None):
+    """
+    Restituisce il pool WebDriver condiviso, creandolo al primo utilizzo.
+    Ogni chiamata va bilanciata da release_driver_pool().
+    """
+    global _driver_pool, _driver_pool_users
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            cfg = config if config is not None else load_config()
+            _driver_pool = ChromeDriverPool(
+                # Almeno un browser per worker di scansione
+                size=max(cfg.get("driver_pool_size", 1), cfg.get("workers", 1)),
+                max_pages_per_driver=cfg.get("driver_max_pages", 50),
+                use_debug=cfg.get("use_debug_mode", False),
+                chrome_path=cfg.get("chrome_path", r"C:\Program Files\Google\Chrome\Application\chrome.exe")
+            )
+        _driver_pool_users += 1
+        return _driver_pool
+
+
+def release_driver_pool(force=False):
+    """Rilascia il pool condiviso e lo chiude quando non ha più utilizzatori."""
+    global _driver_pool, _driver_pool_users
+    with _driver_pool_lock:
+        _driver_pool_users = 0 if force else max(0, _driver_pool_users - 1)
+        if _driver_pool is not None and _driver_pool_users == 0:
+            _driver_pool.close()
+            _driver_pool = None
+
+
+atexit.register(release_driver_pool, force=True)
+
+
+@contextmanager
+def shared_driver_pool(config=None):
+    """Context manager attorno ad acquire_driver_pool()/release_driver_pool()."""
+    pool = acquire_driver_pool(config)
+    try:
+        yield pool
+    finally:
+        release_driver_pool()
+
+
+class DomainThrottle:
+    """
+    Regole di cortesia per dominio durante la scansione parallela.
+
+    Ogni dominio ha un numero massimo di pagine caricate in contemporanea e un
+    intervallo minimo (secondi) tra l'avvio di due richieste consecutive.
+    I valori si leggono da 'max_concurrency' / 'min_delay' nella sezione 'sites',
+    altrimenti dai default globali.
+    """
+
+    def __init__(self, site_configs, default_concurrency=2, default_delay=1.0):
+        self.site_configs = site_configs or {}
+        self.default_concurrency = default_concurrency
+        self.default_delay = default_delay
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    def limits(self, domain):
+        """Restituisce (concorrenza massima, ritardo minimo) per il dominio."""
+        site_config = self.site_configs.get(domain) or {}
+        concurrency = site_config.get("max_concurrency") or self.default_concurrency
+        delay = site_config.get("min_delay")
+        if delay in (None, ""):
+            delay = self.default_delay
+        return max(1, int(concurrency)), max(0.0, float(delay))
+
+    @contextmanager
+    def slot(self, domain):
+        """Blocca finché il dominio ha uno slot libero e il ritardo minimo è trascorso."""
+        concurrency, delay = self.limits(domain)
+        with self._lock:
+            semaphore = self._slots.get(domain)
+            if semaphore is None:
+                semaphore = self._slots[domain] = threading.BoundedSemaphore(concurrency)
+        semaphore.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(domain, now))
+                self._next_start[domain] = start + delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            semaphore.release()
+
+
+# === Pre-controllo HTTP condizionale ===
+
+HTTP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Galora.versia"
+
+
+def extract_http_validators(headers):
+    """Estrae ETag e Last-Modified dagli header di una risposta HTTP."""
+    validators = {}
+    if headers.get("ETag"):
+        validators["etag"] = headers["ETag"]
+    if headers.get("Last-Modified"):
+        validators["last_modified"] = headers["Last-Modified"]
+    return validators
+
+
+class HttpResponse:
+    """Risposta HTTP già letta per intero (corpo decompresso)."""
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self):
+        return decode_html_bytes(self.body, self.headers.get("Content-Type", ""))
+
+
+class HttpClient:
+    """
+    Client HTTP con connessioni keep-alive riutilizzate per host, sicuro tra thread.
+    Segue i redirect e decomprime gzip/deflate.
+    """
+
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self, max_idle_per_host=4, max_redirects=5):
+        self.max_idle_per_host = max_idle_per_host
+        self.max_redirects = max_redirects
+        self._idle = {}  # (scheme, host, port) -> [connessioni libere]
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def _checkout(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(self, url, headers, timeout):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"URL non supportato: {url}")
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+
+        for attempt in range(2):
+            conn, reused = self._checkout(key, timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # Una connessione keep-alive chiusa dal server si ritenta una volta
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return response.status, response.headers, body
+
+    def get(self, url, headers=None, timeout=10, allowed_domains=None):
+        """
+        Esegue una GET e restituisce un HttpResponse.
+        Con allowed_domains i redirect verso domini non autorizzati vengono rifiutati.
+        """
+        request_headers = {
+            "User-Agent": HTTP_USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,*/*",
+            "Accept-Encoding": "gzip, deflate",
+            **(headers or {})
+        }
+        for _ in range(self.max_redirects + 1):
+            status, response_headers, body = self._send(url, request_headers, timeout)
+            location = response_headers.get("Location")
+            if status in self.REDIRECT_CODES and location:
+                url = urljoin(url, location)
+                if allowed_domains and not is_domain_allowed(url, allowed_domains):
+                    raise ValueError(f"Redirect verso dominio non autorizzato: {url}")
+                continue
+
+            encoding = (response_headers.get("Content-Encoding") or "").lower()
+            if encoding == "gzip":
+                body = gzip.decompress(body)
+            elif encoding == "deflate":
+                try:
+                    body = zlib.decompress(body)
+                except zlib.error:
+                    body = zlib.decompress(body, -zlib.MAX_WBITS)
+            return HttpResponse(url, status, response_headers, body)
+
+        raise ValueError(f"Troppi redirect: {url}")
+
+    def close(self):
+        with self._lock:
+            connections = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Client HTTP condiviso dal processo (connessioni riutilizzate tra le esecuzioni)."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+            atexit.register(_http_client.close)
+        return _http_client
+
+
+def decode_html_bytes(body, content_type=""):
+    """Decodifica l'HTML usando il charset dell'header o del tag <meta>, altrimenti UTF-8."""
+    match = re.search(r"charset=[\"']?([\w.:-]+)", content_type or "", re.I)
+    if not match:
+        match = re.search(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", body[:4096], re.I)
+    charset = match.group(1) if match else "utf-8"
+    if isinstance(charset, bytes):
+        charset = charset.decode("ascii", "ignore")
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def http_conditional_check(url, validators=None, timeout=10, allowed_domains=None):
+    """
+    Esegue una GET condizionale (If-None-Match / If-Modified-Since) senza browser,
+    sul client HTTP condiviso.
+
+    Args:
+        url (str): URL da controllare.
+        validators (dict): Validatori salvati ('etag', 'last_modified'), anche vuoto.
+        timeout (int): Timeout della richiesta in secondi.
+        allowed_domains (list): Domini ammessi come destinazione dei redirect.
+
+    Returns:
+        (not_modified: bool, validators: dict, response: HttpResponse) — not_modified è
+        True solo con risposta 304. Errori di rete e stati HTTP >= 400 vengono propagati.
+    """
+    validators = validators or {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = get_http_client().get(url, headers, timeout=timeout, allowed_domains=allowed_domains)
+    if response.status == 304:
+        return True, {**validators, **extract_http_validators(response.headers)}, response
+    if response.status >= 400:
+        raise ValueError(f"HTTP {response.status} per {url}")
+    return False, extract_http_validators(response.headers), response
+
+
+# === Archivio firme per URL (SQLite) ===
+
+def normalize_url(url):
+    """Chiave dell'archivio: schema e host minuscoli, porta di default e frammento rimossi."""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, parsed.query, ""))
+
+
+class SemanticTextFile:
+    """Testo semantico salvato in 'semantics/<filename_base>.txt' (formato storico)."""
+
+    def __init__(self, filename_base):
+        self.path = os.path.join(get_base_dir(), "semantics", f"{filename_base}.txt")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return ""
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def save(self, text):
+        ensure_directory_exists(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+class StoredSemanticText:
+    """Testo semantico di un URL nell'archivio SQLite, con lettura del vecchio file come ripiego."""
+
+    def __init__(self, store, url, filename_base):
+        self.store = store
+        self.url = url
+        self.legacy = SemanticTextFile(filename_base)
+
+    def load(self):
+        text = self.store.load_text(self.url)
+        return text if text is not None else self.legacy.load()
+
+    def save(self, text):
+        self.store.save_text(self.url, text)
+
+
+class DeferredSemanticText:
+    """
+    Trattiene il testo semantico salvato dal rilevamento finché commit() non lo conferma:
+    se la cattura del PDF fallisce, il prossimo giro confronta ancora con il testo precedente.
+    """
+
+    def __init__(self, text_store):
+        self.text_store = text_store
+        self.pending = None
+
+    def load(self):
+        return self.text_store.load()
+
+    def save(self, text):
+        self.pending = text
+
+    def commit(self):
+        if self.pending is not None:
+            self.text_store.save(self.pending)
+            self.pending = None
+
+
+class SignatureStore:
+    """
+    Stato del rilevamento per URL normalizzato, in SQLite con journal WAL: firma, hash,
+    similarità, ultima data, testo semantico compresso, validatori HTTP e tempi.
+
+    Ogni istanza ha una sola connessione, condivisa tra i worker e protetta da un lock.
+    Ogni scrittura è una transazione breve confermata subito (con WAL e synchronous=NORMAL
+    il commit non fa fsync): il lock di scrittura non resta mai aperto tra una riga e
+    l'altra, così process_pages, la rielaborazione dalla GUI e il daemon della CLI possono
+    usare lo stesso database. Una scrittura concorrente attende fino a 'timeout' secondi.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            signature TEXT,
+            content_hash TEXT,
+            similarity REAL,
+            last_date TEXT,
+            semantic_text BLOB,
+            validators TEXT,
+            status TEXT,
+            elapsed REAL,
+            last_checked TEXT,
+            last_changed TEXT
+        )
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self._lock = threading.RLock()
+        ensure_directory_exists(os.path.dirname(path))
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self.SCHEMA)
+        self._conn.commit()
+        self._import_legacy_validators()
+
+    def _import_legacy_validators(self):
+        """Importa una sola volta i validatori dal vecchio cache/http_validators.json."""
+        legacy_path = os.path.join(os.path.dirname(self.path), "http_validators.json")
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            for url, validators in legacy.items():
+                self._upsert(url, commit=False, validators=json.dumps(validators or {}))
+            self.commit()
+            os.replace(legacy_path, legacy_path + ".migrated")
+            logging.info(f"[STORE] Importati {len(legacy)} validatori HTTP da {legacy_path}")
+        except Exception as e:
+            self._conn.rollback()
+            logging.warning(f"[STORE] Import dei validatori HTTP non riuscito: {e}")
+
+    def _row(self, url, columns):
+        with self._lock:
+            return self._conn.execute(f"SELECT {columns} FROM pages WHERE url = ?", (normalize_url(url),)).fetchone()
+
+    def _upsert(self, url, commit=True, **fields):
+        columns = ", ".join(fields)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in fields)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO pages (url, {columns}) VALUES (?{', ?' * len(fields)}) "
+                f"ON CONFLICT(url) DO UPDATE SET {updates}",
+                (normalize_url(url), *fields.values())
+            )
+            if commit:
+                self._conn.commit()
+
+    def get_signature(self, url):
+        row = self._row(url, "signature")
+        return row[0] if row else None
+
+    def get_validators(self, url):
+        """Validatori salvati per l'URL: None se mai controllato, {} se il server non ne fornisce."""
+        row = self._row(url, "validators")
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def set_validators(self, url, validators):
+        self._upsert(url, validators=json.dumps(validators or {}))
+
+    def load_text(self, url):
+        row = self._row(url, "semantic_text")
+        return zlib.decompress(row[0]).decode("utf-8") if row and row[0] is not None else None
+
+    def save_text(self, url, text):
+        self._upsert(url, semantic_text=zlib.compress(text.encode("utf-8")))
+
+    def semantic_text(self, url, filename_base):
+        return StoredSemanticText(self, url, filename_base)
+
+    def record_result(self, url, method, signature, status, elapsed, changed=False):
+        """Registra l'esito di un controllo; la firma si aggiorna solo se valorizzata."""
+        now = datetime.now().isoformat(timespec="seconds")
+        fields = {"status": status, "elapsed": round(elapsed, 3), "last_checked": now}
+        if signature:
+            fields["signature"] = signature
+            if method == "detection":
+                _, fields["content_hash"], fields["similarity"] = parse_detection_signature(signature)
+            else:
+                fields["last_date"] = signature
+        if changed:
+            fields["last_changed"] = now
+        self._upsert(url, **fields)
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+def get_signature_store_path():
+    return os.path.join(get_base_dir(), "cache", "signatures.db")
+
+
+# === Avanzamento dell'esecuzione ===
+
+class ProgressSink:
+    """
+    Destinazione degli eventi di avanzamento di process_pages.
+    I metodi di base non fanno nulla: le sottoclassi ridefiniscono solo quelli che servono.
+    """
+
+    def run_started(self, total, run_dir):
+        pass
+
+    def row_started(self, idx, url, country_name, signature, status):
+        pass
+
+    def row_finished(self, idx, record, status):
+        pass
+
+    def progress(self, completed, total):
+        pass
+
+    def run_failed(self, message):
+        pass
+
+    def run_finished(self, summary):
+        pass
+
+
+class TkProgressSink(ProgressSink):
+    """Avanzamento sui widget della scheda di elaborazione (tabella, barra, contatore)."""
+
+    def __init__(self, progress_table, progress_bar, progress_count, locale):
+        self.progress_table = progress_table
+        self.progress_bar = progress_bar
+        self.progress_count = progress_count
+        self.locale = locale
+
+    def run_started(self, total, run_dir):
+        self.progress_bar["maximum"] = total
+        self.progress_bar["value"] = 0
+        self.progress_count.config(text=f"0/{total}")
+
+    def show_row(self, iid, values):
+        # Con QueuedProgressSink l'inserimento può arrivare già con i valori finali
+        if self.progress_table.exists(iid):
+            self.progress_table.item(iid, values=values)
+        else:
+            self.progress_table.insert("", "end", iid=iid, values=values)
+
+    def row_started(self, idx, url, country_name, signature, status):
+        self.show_row(str(idx), (url, country_name, signature, status))
+
+    def row_finished(self, idx, record, status):
+        shown_date = record["Data precedentemente rilevata"] if "Errore" in record else record["Data Ultimo Aggiornamento"]
+        self.show_row(str(idx), (record["Url"], record["Nome Nazione"], shown_date, status))
+
+    def progress(self, completed, total):
+        update_progress(self.progress_bar, self.progress_count, completed, total)
+
+    def run_failed(self, message):
+        messagebox.showerror(self.locale.get("error_title", self.locale.get("error", "Errore")), message)
+
+    def run_finished(self, summary):
+        messagebox.showinfo(self.locale.get("process_completed_title", "Processo completato"),
+                            f"Output salvato: {summary['output_csv']}\nErrori: {summary['error_csv']}")
+
+
+class QueuedProgressSink(ProgressSink):
+    """
+    Canale thread-safe verso un sink Tk: i thread di lavoro accodano gli eventi,
+    il mainloop li applica a blocchi ogni 'interval_ms' tramite after().
+
+    In ogni blocco gli eventi della stessa riga si fondono (conta solo l'ultimo,
+    la riga è identificata dal suo iid stabile) e l'avanzamento viene scritto una
+    volta sola. run_started/run_failed/run_finished mantengono il loro ordine.
+    """
+
+    ROW_EVENTS = ("row_started", "row_finished")
+
+    def __init__(self, target, widget, interval_ms=100, max_events=5000):
+        self.target = target
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.max_events = max_events
+        self.events = queue.SimpleQueue()
+        self.closed = False
+
+    def run_started(self, total, run_dir):
+        self.events.put(("run_started", (total, run_dir)))
+
+    def row_started(self, idx, url, country_name, signature, status):
+        self.events.put(("row_started", (idx, url, country_name, signature, status)))
+
+    def row_finished(self, idx, record, status):
+        self.events.put(("row_finished", (idx, dict(record), status)))
+
+    def progress(self, completed, total):
+        self.events.put(("progress", (completed, total)))
+
+    def run_failed(self, message):
+        self.events.put(("run_failed", (message,)))
+
+    def run_finished(self, summary):
+        self.events.put(("run_finished", (summary,)))
+
+    def close(self):
+        """Chiamabile da qualunque thread: dopo l'ultimo blocco il polling si ferma."""
+        self.events.put(("close", ()))
+
+    def start(self):
+        """Avvia il polling; va chiamato dal thread Tk."""
+        self.widget.after(self.interval_ms, self.drain)
+
+    def drain(self):
+        rows, last_progress = {}, None
+
+        def flush():
+            nonlocal last_progress
+            for name, args in rows.values():
+                getattr(self.target, name)(*args)
+            rows.clear()
+            if last_progress is not None:
+                self.target.progress(*last_progress)
+                last_progress = None
+
+        try:
+            for _ in range(self.max_events):
+                try:
+                    name, args = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if name in self.ROW_EVENTS:
+                    rows[args[0]] = (name, args)
+                elif name == "progress":
+                    last_progress = args
+                else:
+                    flush()
+                    if name == "close":
+                        self.closed = True
+                    else:
+                        getattr(self.target, name)(*args)
+            flush()
+        except Exception as e:
+            logging.error(f"[PROGRESS] Errore aggiornando la GUI: {e}")
+        finally:
+            if not self.closed:
+                self.widget.after(self.interval_ms, self.drain)
+
+
+# === Journal di esecuzione (checkpoint / ripresa) ===
+
+class RunJournal:
+    """
+    Journal append-only (JSON Lines) delle righe completate da process_pages, salvato
+    nella cartella dell'esecuzione. Prima di ogni voce vengono svuotati i buffer dei file
+    collegati (output/errori CSV), così il journal non è mai avanti rispetto ai CSV, e la
+    voce ne registra le dimensioni ('sizes'): in ripresa i CSV vengono riportati a quelle
+    dimensioni, scartando le righe scritte dopo l'ultima voce. L'fsync su disco avviene a
+    blocchi.
+    """
+
+    FILENAME = "journal.jsonl"
+
+    def __init__(self, run_dir, companions=(), fsync_every=20, fsync_interval=2.0):
+        self.path = os.path.join(run_dir, self.FILENAME)
+        self.companions = list(companions)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, entry_type, **fields):
+        sizes = []
+        for f in self.companions:
+            f.flush()
+            sizes.append(os.fstat(f.fileno()).st_size)
+        entry = {"type": entry_type, "time": datetime.now().isoformat(timespec="seconds"), **fields}
+        if sizes:
+            entry["sizes"] = sizes
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        for f in self.companions + [self._file]:
+            f.flush()
+            os.fsync(f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    @staticmethod
+    def truncate_companions(entries, paths):
+        """
+        Riporta i file collegati alle dimensioni registrate dall'ultima voce del journal:
+        una riga scritta nei CSV ma non nel journal (crash tra le due scritture) verrebbe
+        altrimenti rielaborata e duplicata. I journal senza 'sizes' restano come sono.
+        """
+        sizes = next((e["sizes"] for e in reversed(entries) if "sizes" in e), None)
+        if sizes is None:
+            return
+        for path, size in zip(paths, sizes):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                logging.warning(f"[RESUME] {path}: scartati {os.path.getsize(path) - size} byte non registrati nel journal")
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    @classmethod
+    def read(cls, run_dir):
+        """Voci del journal; un'ultima riga troncata da un crash viene ignorata."""
+        entries = []
+        with open(os.path.join(run_dir, cls.FILENAME), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+        return entries
+
+
+# === Archivio dei contenuti (PDF/TXT deduplicati) ===
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA256 di un file letto a blocchi."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Archivio dei PDF/TXT indirizzato per contenuto, sotto html_save_path: ogni file è
+    salvato una sola volta in 'blobs/<sha[:2]>/<sha><ext>', qualunque sia l'esecuzione
+    che lo ha prodotto. Le esecuzioni puntano ai blob tramite il proprio RunManifest;
+    con 'link_into_runs' nella cartella dell'esecuzione resta anche un hard link al blob
+    con il nome originale (nessuno spazio in più), se il file system lo consente.
+    """
+
+    DIRNAME = "blobs"
+
+    def __init__(self, root, link_into_runs=True):
+        self.root = root
+        self.link_into_runs = link_into_runs
+        self._link_warned = False
+
+    def relative_path(self, sha256, ext):
+        """Percorso del blob relativo a 'root', con '/' come separatore (come nell'indice delle versioni)."""
+        return f"{self.DIRNAME}/{sha256[:2]}/{sha256}{ext}"
+
+    def blob_path(self, sha256, ext):
+        return os.path.join(self.root, self.DIRNAME, sha256[:2], sha256 + ext)
+
+    def put(self, path, sha256=None):
+        """
+        Porta il file 'path' nell'archivio e ne restituisce lo SHA256.
+
+        Con 'link_into_runs' il file dell'esecuzione diventa un hard link al blob; se il
+        file system non li supporta (FAT/exFAT, alcune condivisioni di rete, blob su un
+        altro volume) nella cartella dell'esecuzione resta una copia. Senza
+        'link_into_runs' il file viene spostato nell'archivio (o rimosso se già presente).
+        """
+        if sha256 is None:
+            sha256 = hash_file(path)
+        blob = self.blob_path(sha256, os.path.splitext(path)[1].lower())
+        if not self.link_into_runs:
+            if os.path.exists(blob):
+                os.remove(path)
+            else:
+                self._move_into(path, blob)
+            return sha256
+
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(path, blob)
+                return sha256
+            except FileExistsError:
+                pass  # salvato nel frattempo da un altro worker: si collega a quello
+            except OSError as e:
+                self._warn_no_links(path, e)
+                self._copy_into(path, blob)
+                return sha256
+
+        # Contenuto già archiviato: il file dell'esecuzione viene sostituito da un link al blob
+        link_tmp = f"{path}.{threading.get_ident()}.link"
+        try:
+            os.link(blob, link_tmp)
+            os.replace(link_tmp, path)
+        except OSError as e:
+            discard_file(link_tmp)
+            self._warn_no_links(path, e)
+        return sha256
+
+    def _move_into(self, path, blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.replace(path, blob)
+        except OSError:
+            # Cartella dell'esecuzione su un altro volume: copia atomica, poi rimozione
+            self._copy_into(path, blob)
+            os.remove(path)
+
+    @staticmethod
+    def _copy_into(path, blob):
+        # Nome temporaneo per processo e thread: più worker possono archiviare lo stesso contenuto
+        blob_tmp = f"{blob}.{os.getpid()}-{threading.get_ident()}.tmp"
+        shutil.copyfile(path, blob_tmp)
+        os.replace(blob_tmp, blob)
+
+    def _warn_no_links(self, path, error):
+        message = f"[ARCHIVE] Hard link non disponibile per {path}, nella cartella dell'esecuzione resta una copia: {error}"
+        if self._link_warned:
+            logging.debug(message)
+        else:
+            logging.warning(message)
+            self._link_warned = True
+
+    def put_bytes(self, data, ext):
+        """Salva 'data' come blob (se non già presente) e ne restituisce lo SHA256."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(sha256, ext)
+        if not os.path.exists(blob):
+            write_file_atomic(blob, data)
+        return sha256
+
+    def archive(self, manifest, url, country, pdf_path, pdf_sha256=None):
+        """
+        Porta nell'archivio il PDF finale e il TXT accanto, registrandoli nel manifest.
+        'pdf_sha256' evita di rileggere il PDF quando l'hash è già noto.
+        """
+        txt_path = pdf_path.replace(".pdf", ".txt")
+        pdf_sha256 = self.put(pdf_path, pdf_sha256)
+        txt_sha256 = self.put(txt_path) if os.path.exists(txt_path) else None
+        manifest.add(url, country=country, filename=os.path.basename(pdf_path), pdf=pdf_sha256, txt=txt_sha256)
+        return pdf_sha256
+
+
+class RunManifest:
+    """
+    manifest.json di un'esecuzione: per ogni URL i blob (SHA256) di PDF e TXT
+    nell'ArtifactStore. Viene riscritto atomicamente ogni 'save_every' voci e alla
+    chiusura; riprendendo un'esecuzione le voci già presenti restano.
+    """
+
+    FILENAME = "manifest.json"
+    VERSION = 1
+
+    def __init__(self, run_dir, save_every=20):
+        self.run_dir = run_dir
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._pending = 0
+        existing = self.read(run_dir)
+        self.artifacts = existing["artifacts"] if existing else {}
+
+    def add(self, url, **fields):
+        with self._lock:
+            self.artifacts[url] = {"time": datetime.now().isoformat(timespec="seconds"), **fields}
+            self._pending += 1
+            if self._pending >= self.save_every:
+                self._save()
+
+    def _save(self):
+        data = {"version": self.VERSION, "run": os.path.basename(self.run_dir), "artifacts": self.artifacts}
+        write_file_atomic(os.path.join(self.run_dir, self.FILENAME),
+                          json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8"))
+        self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._pending:
+                self._save()
+
+    @classmethod
+    def read(cls, run_dir):
+        """Contenuto del manifest di 'run_dir', None se assente o illeggibile."""
+        try:
+            with open(os.path.join(run_dir, cls.FILENAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"[ARCHIVE] Manifest illeggibile in {run_dir}: {e}")
+            return None
+
+
+def find_resumable_run(save_root, csv_path):
+    """
+    Ultima esecuzione in 'save_root' se è stata interrotta e riguarda lo stesso CSV.
+
+    Returns:
+        (run_dir, voci del journal) oppure None.
+    """
+    if not os.path.isdir(save_root):
+        return None
+    runs = sorted(
+        (d for d in os.listdir(save_root)
+         if d.isdigit() and os.path.exists(os.path.join(save_root, d, RunJournal.FILENAME))),
+        reverse=True
+    )
+    if not runs:
+        return None
+    run_dir = os.path.join(save_root, runs[0])
+    entries = RunJournal.read(run_dir)
+    header = next((e for e in entries if e.get("type") == "run"), {})
+    if header.get("csv_path") != os.path.abspath(csv_path) or any(e.get("type") == "done" for e in entries):
+        return None
+    return run_dir, entries
+
+
+# Function: process_pages
+# Description: Function to process pages.
+# Inputs: config, progress_table, progress_bar, progress_count, pause_event, stop_event, sink, close_logs
+# Output: [dict]
+# Called by: run_process_pages, webscraper_cli.run_once
+# Calls: Options, Service, ValueError, close_loggers, detect_page_change, ensure_directory_exists, enumerate, extract_date, get_base_dir, get_debug_driver, is_chrome_debug_running, len, load_config, open, count_csv_rows, iter_csv_rows, save_page_as_pdf_with_selenium, str, update_progress, urlparse, write_detection_log
+def process_pages(config, progress_table, progress_bar, progress_count, locale, pause_event=None, stop_event=None,
+                  sink=None, close_logs=True):
+    """
+    Esegue il crawl del CSV configurato.
+
+    L'avanzamento va a 'sink' (ProgressSink); senza sink si usano i widget Tk passati.
+    Restituisce un riepilogo (dict) dell'esecuzione, oppure None se il CSV non è leggibile.
+    """
+    import os
+    import csv
+    import time
+    import logging
+    import psutil
+    from datetime import datetime
+    from urllib.parse import urlparse
+
+    if sink is None:
+        sink = TkProgressSink(progress_table, progress_bar, progress_count, locale)
+
+    def is_url_safe(url):
+        from urllib.parse import urlparse
+        import ipaddress
+        parsed = urlparse(url)
+        try:
+            ipaddress.ip_address(parsed.hostname)
+            return False  # Blocca URL con IP diretti
+        except:
+            pass
+        return (
+            parsed.scheme in ["http", "https"]
+            and not any(x in parsed.path for x in ["..", "%", "<", ">", "\"", "'"])
+        )
+
+    def is_chrome_debug_running():
+        for proc in psutil.process_iter(['name', 'cmdline']):
+            try:
+                if 'chrome.exe' in proc.info['name'].lower():
+                    cmdline = ' '.join(proc.info['cmdline']).lower()
+                    if '--remote-debugging-port=9222' in cmdline:
+                        return True
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        return False
+
+    # Ripresa: stessa cartella e stessi CSV dell'ultima esecuzione interrotta
+    resumed = find_resumable_run(config["html_save_path"], config["csv_path"]) if config.get("resume_run", False) else None
+    if resumed:
+        save_path, journal_entries = resumed
+        timestamp_dir = os.path.basename(save_path)
+        done_urls = {e["url"] for e in journal_entries if e.get("type") == "row"}
+        logging.info(f"[RESUME] Ripresa di {save_path}: {len(done_urls)} URL già completati")
+    else:
+        if config.get("resume_run", False):
+            logging.info("[RESUME] Nessuna esecuzione interrotta da riprendere, si parte da zero")
+        timestamp_dir = datetime.now().strftime("%Y%m%d%H%M")
+        save_path = os.path.join(config["html_save_path"], timestamp_dir)
+        done_urls = set()
+    ensure_directory_exists(save_path)
+
+    try:
+        # Conteggio in streaming per la barra di avanzamento: le righe vengono poi lette
+        # di nuovo una alla volta mentre il crawl procede, senza tenerle tutte in memoria
+        total_rows = count_csv_rows(config["csv_path"])
+        input_rows = iter_csv_rows(config["csv_path"])
+    except Exception as e:
+        logging.error(locale.get("error_reading_csv", "Errore durante la lettura del CSV: {e}").format(e=e))
+        sink.run_failed(locale.get("error_reading_csv", "Errore durante la lettura del CSV: {e}").format(e=e))
+        return None
 
     site_configs = load_config().get("sites", {})
-    total_rows = len(raw_data)
-    progress_bar["maximum"] = total_rows
-    progress_bar["value"] = 0
-    progress_count.config(text=f"0/{total_rows}")
+    sink.run_started(total_rows, save_path)
 
     standard_keys = ["Url", "Nome Nazione", "Data precedentemente rilevata", "Data Ultimo Aggiornamento"]
     localized_keys = [locale.get(k.lower().replace(" ", "_"), k) for k in standard_keys]
@@ -968,193 +2500,466 @@ def process_pages(config, progress_table, progress_bar, progress_count, locale,
     chrome_path = config.get("chrome_path", r"C:\Program Files\Google\Chrome\Application\chrome.exe")
     timeout = config["timeout"]
 
+    # In modalità debug esiste una sola istanza Chrome: niente parallelismo
+    workers = 1 if use_debug else max(1, int(config.get("workers", 1)))
+    throttle = DomainThrottle(
+        site_configs,
+        default_concurrency=config.get("domain_max_concurrency", 2),
+        default_delay=config.get("domain_min_delay", 1.0)
+    )
+
+    use_http_precheck = config.get("http_precheck", True)
+    store = SignatureStore(get_signature_store_path())
+    # PDF/TXT finali deduplicati nell'archivio, la cartella dell'esecuzione tiene il manifest
+    artifacts = ArtifactStore(config["html_save_path"], config.get("artifact_links", True))
+    manifest = RunManifest(save_path)
+
     if use_debug:
         launch_chrome_debug_if_needed(chrome_path)
 
-    with open(output_csv_path, "w", encoding="utf-8", newline="") as outfile,open(error_csv_path, "w", encoding="utf-8", newline="") as errorfile:
+    def wait_while_paused():
+        """Attende la ripresa del processo; restituisce False se è stato richiesto lo stop."""
+        if pause_event:
+            while not pause_event.is_set():
+                if stop_event and stop_event.is_set():
+                    return False
+                time.sleep(0.5)
+        return not (stop_event and stop_event.is_set())
 
-        writer = csv.DictWriter(outfile, fieldnames=localized_keys, delimiter=';')
-        writer.writeheader()
-        error_writer = csv.DictWriter(errorfile, fieldnames=error_fieldnames, delimiter=';')
-        error_writer.writeheader()
+    def process_row(url, country_name, current_signature, domain, site_config):
+        """
+        Elabora una riga nel thread di un worker.
+        Restituisce (record, status) oppure None se il processo è stato fermato.
+        """
+        record = {
+            "Url": url,
+            "Nome Nazione": country_name,
+            "Data precedentemente rilevata": current_signature,
+            "Data Ultimo Aggiornamento": ""
+        }
 
-        for idx, row in enumerate(raw_data, start=1):
-            if stop_event and stop_event.is_set():
-                logging.info(locale.get("stop_requested", "Stop richiesto."))
-                break
-            if pause_event:
-                while not pause_event.is_set():
-                    if stop_event and stop_event.is_set():
-                        return
-                    time.sleep(0.5)
-
-            url = row[0].strip()
-            country_name = row[1].strip()
-            current_signature = row[3].strip()
-            if not is_url_safe(url):
-                warning_msg = locale.get("url_non_sicuro_ignorato", f"URL non sicuro ignorato: {url}").format(url=url)
-                logging.warning(warning_msg)
-                continue
-            if not is_domain_allowed(url, config.get("allowed_domains", [])):
-                logging.warning(f"Dominio non autorizzato: {url}")
-                continue
+        if not site_config:
+            return record, locale.get("config_not_found", "Config Not Found")
 
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.replace("www.", "")
-            site_config = site_configs.get(domain)
-
-            progress_table.insert("", "end", values=(url, country_name, current_signature, locale.get("starting", "Inizio...")))
-            progress_table.update_idletasks()
-
-            record = {
-                "Url": url,
-                "Nome Nazione": country_name,
-                "Data precedentemente rilevata": current_signature,
-                "Data Ultimo Aggiornamento": ""
-            }
-
-            if not site_config:
-                status = locale.get("config_not_found", "Config Not Found")
-                progress_table.item(progress_table.get_children()[-1], values=(url, country_name, current_signature, status))
-                writer.writerow({locale.get(k.lower().replace(" ", "_"), k): record[k] for k in standard_keys})
-                update_progress(progress_bar, progress_count, idx, total_rows)
-                continue
+        if not wait_while_paused():
+            return None
 
-            try:
-                driver = get_debug_driver(chrome_path) if use_debug else webdriver.Chrome(service=Service(os.path.join(os.getcwd(), "chromedriver.exe")), options=get_secure_chrome_options())
-                driver.get(url)
-                time.sleep(timeout)
+        started = time.monotonic()
+        method = site_config.get("update_method", "date").lower()
+        changed = False
+        try:
 
-                method = site_config.get("update_method", "date").lower()
+            filename_base = url.split('/')[-1].split('?')[0].split('#')[0]
+            filename = safe_join(save_path, f"{filename_base}.pdf")
 
-                filename_base = url.split('/')[-1].split('?')[0].split('#')[0]
-                filename = safe_join(save_path, f"{filename_base}.pdf")
+            # Rilevamento senza browser: l'HTML arriva dal client HTTP condiviso
+            browserless = method == "detection" and site_config.get("fetch_mode", "browser") == "http"
 
-                if method == "detection":
-                    changed, new_signature, reason, similarity = detect_page_change(driver, site_config, current_signature, filename_base)
-                    record["Data Ultimo Aggiornamento"] = new_signature
-
-                    if changed or not current_signature or config.get("force_download", False):
-                        saved = save_page_as_pdf_with_selenium(url, filename, timeout, config["log_file"])
-                        if saved:
-                            logging.warning(f"[DEBUG CHECK] PDF_MODE={config.get('pdf_mode')} | FILE={filename} | SAVED={saved}")
-                            # Salva file TXT accanto al PDF, sempre e comunque
-                            if saved:
-                                try:
-                                    extracted_text = extract_text_from_pdf(filename)
-                                    txt_output_path = filename.replace(".pdf", ".txt")
-                                    with open(txt_output_path, "w", encoding="utf-8") as f:
-                                        f.write(extracted_text)
-                                    logging.info(f"[TXT] Creato file testo: {txt_output_path}")
-                                except Exception as e:
-                                    logging.warning(f"[TXT] Errore durante salvataggio del TXT per {filename}: {e}")
-
-                            if config.get("pdf_mode", "with_links") == "no_links":
-                                sanitize_pdf_links(filename)
-                            elif config.get("pdf_mode") == "image":
-                                logging.info(f"[RASTER] Modalità 'PDF immagine' attiva per: {filename}")
-                                image_paths = convert_pdf_to_images_fitz(filename)
-                                if image_paths:
-                                    replace_pdf_with_images_fitz(filename, image_paths)
-                                else:
-                                    logging.warning(f"[RASTER] Conversione PDF→immagine fallita, file originale mantenuto: {filename}")
-                        else:
-                            logging.error(f"[ERROR] Salvataggio PDF fallito per {filename}")
-                        status = locale.get("PDF_Saved", "PDF salvato") if saved else locale.get("Error_saving_PDF", "Errore salvataggio PDF")
-                        write_detection_log(f"[{country_name} - {url}] Metodo: {site_config.get('detection_type')} | Cambiata: {changed} | Similarità: {similarity:.3f} | PDF: {'SÌ' if saved else 'NO'}")
-                    else:
-                        status = locale.get("no_change_detected", "Nessun cambiamento")
+            # Il testo semantico si conferma solo a PDF salvato (o se non serviva salvarlo)
+            text_store = DeferredSemanticText(store.semantic_text(url, filename_base))
+
+            # Pre-controllo HTTP condizionale: con risposta 304 il browser non serve
+            new_validators = None
+            response = None
+            known_validators = store.get_validators(url)
+            if browserless or (use_http_precheck and not site_config.get("requires_js")
+                               and not config.get("force_download", False) and known_validators != {}):
+                sent_validators = None if config.get("force_download", False) else known_validators
+                try:
+                    with throttle.slot(domain):
+                        not_modified, new_validators, response = http_conditional_check(
+                            url, sent_validators, timeout=config.get("http_timeout", 10),
+                            allowed_domains=config.get("allowed_domains", []))
+                except Exception as e:
+                    logging.info(f"[HTTP] Richiesta non riuscita per {url}, si usa il browser: {e}")
+                    browserless = False
                 else:
-                    try:
+                    if not_modified and current_signature:
+                        logging.info(f"[HTTP] 304 Not Modified, browser non necessario: {url}")
+                        store.set_validators(url, new_validators)
+                        record["Data Ultimo Aggiornamento"] = current_signature
+                        status = locale.get("not_modified_http", "Nessun cambiamento (HTTP 304)")
+                        store.record_result(url, method, current_signature, status, time.monotonic() - started)
+                        return record, status
+                    if not_modified:
+                        # 304 senza firma precedente: manca l'HTML da confrontare
+                        browserless = False
+
+            if browserless:
+                changed, new_signature, reason, similarity = detect_page_change_from_html(
+                    response.text(), site_config, current_signature, filename_base, text_store=text_store)
+                record["Data Ultimo Aggiornamento"] = new_signature
+                must_save = changed or not current_signature or config.get("force_download", False)
+                saved = None
+                if must_save:
+                    # Solo le pagine cambiate passano dal browser per la stampa PDF
+                    with throttle.slot(domain), pool.driver() as driver:
+                        load_page(driver, url, timeout, site_config)
+                        saved = print_page_to_pdf(driver, url, filename, debug_mode=config.get("debug_mode", False))
+            else:
+                # Un solo caricamento per URL: rilevamento e stampa PDF sulla stessa sessione
+                with throttle.slot(domain), pool.driver() as driver:
+                    load_page(driver, url, timeout, site_config)
+
+                    if method == "detection":
+                        changed, new_signature, reason, similarity = detect_page_change(
+                            driver, site_config, current_signature, filename_base, text_store=text_store)
+                        record["Data Ultimo Aggiornamento"] = new_signature
+                        must_save = changed or not current_signature or config.get("force_download", False)
+                    else:
                         new_date = extract_date(driver, site_config)
                         if new_date in [locale.get("date_not_found", "DATE_NOT_FOUND"), locale.get("date_not_parsed", "DATE_NOT_PARSED")]:
                             raise ValueError(new_date)
                         new_date_str = new_date.strftime("%Y-%m-%d %H:%M:%S")
                         record["Data Ultimo Aggiornamento"] = new_date_str
-                        if (new_date_str != current_signature) or config.get("force_download", False):
-                            saved = save_page_as_pdf_with_selenium(
-                                        url,
-                                        filename,
-                                        timeout,
-                                        debug_mode=config.get("debug_mode", False),
-                                        log_file=config["log_file"]
-                                    )
-                            if saved:
-                                # Salva file TXT accanto al PDF, sempre e comunque
-                                if saved:
-                                    try:
-                                        extracted_text = extract_text_from_pdf(filename)
-                                        txt_output_path = filename.replace(".pdf", ".txt")
-                                        with open(txt_output_path, "w", encoding="utf-8") as f:
-                                            f.write(extracted_text)
-                                        logging.info(f"[TXT] Creato file testo: {txt_output_path}")
-                                    except Exception as e:
-                                        logging.warning(f"[TXT] Errore durante salvataggio del TXT per {filename}: {e}")
-                                logging.warning(f"[DEBUG CHECK] PDF_MODE={config.get('pdf_mode')} | FILE={filename} | SAVED={saved}")
-                                if config.get("pdf_mode", "with_links") == "no_links":
-                                    sanitize_pdf_links(filename)
-                                elif config.get("pdf_mode") == "image":
-                                    logging.info(f"[RASTER] Modalità 'PDF immagine' attiva per: {filename}")
-                                    image_paths = convert_pdf_to_images_fitz(filename)
-                                    if image_paths:
-                                        replace_pdf_with_images_fitz(filename, image_paths)
-                                    else:
-                                        logging.warning(f"[RASTER] Conversione PDF→immagine fallita, file originale mantenuto: {filename}")
-                            else:
-                                logging.error(f"[ERROR] Salvataggio PDF fallito per {filename}")
+                        changed = new_date_str != current_signature
+                        must_save = changed or config.get("force_download", False)
+
+                    saved = print_page_to_pdf(driver, url, filename, debug_mode=config.get("debug_mode", False)) if must_save else None
+
+            # I validatori si aggiornano solo se la pagina è stata elaborata per intero,
+            # altrimenti un 304 al prossimo giro nasconderebbe il cambiamento
+            if new_validators is not None and (saved or not must_save):
+                store.set_validators(url, new_validators)
+
+            # Finalizzazione (TXT, modalità PDF, unica scrittura) dopo aver restituito il driver al pool
+            if must_save:
+                if saved and not finalize_pdf(saved.path, filename, config):
+                    saved = None
+                if saved:
+                    record["PDF"] = filename
+                    try:
+                        # Con PDF con link il file finale è quello stampato: hash già noto
+                        artifacts.archive(manifest, url, country_name, filename,
+                                          saved.sha256 if config.get("pdf_mode", "with_links") == "with_links" else None)
+                    except Exception as e:
+                        logging.error(f"[ARCHIVE] Archiviazione non riuscita per {filename}: {e}")
+                else:
+                    logging.error(f"[ERROR] Salvataggio PDF fallito per {filename}")
 
-                            status = locale.get("updated_and_pdf_saved", "Aggiornato e PDF salvato") if saved else locale.get("pdf_error", "Errore PDF")
-                        else:
-                            status = locale.get("no_update_needed", "Nessun aggiornamento necessario")
-                    except Exception as ex:
-                        record["Errore"] = str(ex)
-                        progress_table.item(progress_table.get_children()[-1], values=(url, country_name, current_signature, record["Errore"]))
-                        error_writer.writerow({locale.get(k.lower().replace(" ", "_"), k): record.get(k, "") for k in standard_keys} |
-                                              {locale.get("errore", "Errore"): record["Errore"]})
-                        writer.writerow({locale.get(k.lower().replace(" ", "_"), k): record.get(k, "") for k in standard_keys})
-                        driver.quit()
-                        update_progress(progress_bar, progress_count, idx, total_rows)
-                        continue
+                if method == "detection":
+                    status = locale.get("PDF_Saved", "PDF salvato") if saved else locale.get("Error_saving_PDF", "Errore salvataggio PDF")
+                    write_detection_log(f"[{country_name} - {url}] Metodo: {site_config.get('detection_type')} | Cambiata: {changed} | Similarità: {similarity:.3f} | PDF: {'SÌ' if saved else 'NO'}")
+                else:
+                    status = locale.get("updated_and_pdf_saved", "Aggiornato e PDF salvato") if saved else locale.get("pdf_error", "Errore PDF")
+            elif method == "detection":
+                status = locale.get("no_change_detected", "Nessun cambiamento")
+            else:
+                status = locale.get("no_update_needed", "Nessun aggiornamento necessario")
 
-                progress_table.item(progress_table.get_children()[-1], values=(url, country_name, record["Data Ultimo Aggiornamento"], status))
-                if not use_debug:
-                    driver.quit()
+            if must_save and not saved:
+                # Senza PDF la nuova firma non si registra: al prossimo giro la pagina
+                # risulta ancora cambiata e la cattura viene ritentata
+                record["Data Ultimo Aggiornamento"] = current_signature
+                record["Errore"] = status
+            else:
+                text_store.commit()
 
-            except Exception as e:
-                record["Errore"] = str(e)
-                progress_table.item(progress_table.get_children()[-1], values=(url, country_name, current_signature, str(e)))
+        except Exception as e:
+            record["Errore"] = str(e)
+            status = str(e)
+
+        signature = None if "Errore" in record else record["Data Ultimo Aggiornamento"]
+        store.record_result(url, method, signature, status, time.monotonic() - started, changed=changed)
+        return record, status
+
+    # In ripresa i CSV esistenti vengono estesi senza riscrivere l'intestazione
+    write_headers = not (resumed and os.path.exists(output_csv_path) and os.path.exists(error_csv_path))
+    csv_mode = "w" if write_headers else "a"
+    if not write_headers:
+        RunJournal.truncate_companions(journal_entries, [output_csv_path, error_csv_path])
+
+    with open(output_csv_path, csv_mode, encoding="utf-8", newline="") as outfile,open(error_csv_path, csv_mode, encoding="utf-8", newline="") as errorfile, \
+            closing(input_rows), shared_driver_pool(config) as pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl") as executor:
+
+        writer = csv.DictWriter(outfile, fieldnames=localized_keys, delimiter=';')
+        error_writer = csv.DictWriter(errorfile, fieldnames=error_fieldnames, delimiter=';')
+        if write_headers:
+            writer.writeheader()
+            error_writer.writeheader()
+
+        journal = RunJournal(save_path, companions=[outfile, errorfile])
+        if resumed:
+            journal.append("resume")
+        else:
+            journal.append("run", csv_path=os.path.abspath(config["csv_path"]), total=total_rows)
+
+        def write_result(idx, result):
+            record, status = result
+            if "Errore" in record:
                 error_writer.writerow({locale.get(k.lower().replace(" ", "_"), k): record.get(k, "") for k in standard_keys} |
                                       {locale.get("errore", "Errore"): record["Errore"]})
-
             writer.writerow({locale.get(k.lower().replace(" ", "_"), k): record.get(k, "") for k in standard_keys})
-            update_progress(progress_bar, progress_count, idx, total_rows)
+            journal.append("row", row=idx, url=record["Url"], status=status,
+                           error="Errore" in record, pdf=record.get("PDF"))
+            summary["processed"] += 1
+            summary["errors"] += "Errore" in record
+            summary["saved"] += "PDF" in record
+
+        rows = enumerate(input_rows, start=1)
+        rows_exhausted = False
+        stopping = False
+        window = workers * 4    # righe in volo + risultati in attesa di scrittura ordinata
+        pending = {}            # future -> indice riga
+        finished = {}           # indice riga -> (record, status) | None
+        next_to_write = 1
+        completed = 0
+        summary = {
+            "run_dir": save_path, "output_csv": output_csv_path, "error_csv": error_csv_path,
+            "total": total_rows, "completed": 0, "processed": 0, "errors": 0, "saved": 0,
+            "stopped": False, "resumed": bool(resumed)
+        }
+
+        while True:
+            if not stopping and stop_event and stop_event.is_set():
+                logging.info(locale.get("stop_requested", "Stop richiesto."))
+                stopping = True
+                for future in list(pending):
+                    if future.cancel():
+                        finished[pending.pop(future)] = None
+
+            # Riempie la finestra di lavoro rispettando l'ordine di input
+            while not stopping and not rows_exhausted and len(pending) + len(finished) < window:
+                try:
+                    idx, row = next(rows)
+                except StopIteration:
+                    rows_exhausted = True
+                    break
 
-    messagebox.showinfo(locale.get("process_completed_title", "Processo completato"),
-                        f"Output salvato: {output_csv_path}\nErrori: {error_csv_path}")
+                url = row[0].strip()
+                country_name = row[1].strip()
+                current_signature = row[3].strip()
+                if not is_url_safe(url):
+                    warning_msg = locale.get("url_non_sicuro_ignorato", f"URL non sicuro ignorato: {url}").format(url=url)
+                    logging.warning(warning_msg)
+                    finished[idx] = None
+                    completed += 1
+                    continue
+                if not is_domain_allowed(url, config.get("allowed_domains", [])):
+                    logging.warning(f"Dominio non autorizzato: {url}")
+                    finished[idx] = None
+                    completed += 1
+                    continue
+                if url in done_urls:
+                    sink.row_started(idx, url, country_name, current_signature,
+                                     locale.get("already_completed_previous_run", "Già completato nell'esecuzione interrotta"))
+                    finished[idx] = None
+                    completed += 1
+                    continue
+
+                parsed_url = urlparse(url)
+                domain = parsed_url.netloc.replace("www.", "")
+                site_config = site_configs.get(domain)
+                # La firma salvata nell'archivio prevale sulla colonna del CSV
+                current_signature = store.get_signature(url) or current_signature
+
+                sink.row_started(idx, url, country_name, current_signature, locale.get("starting", "Inizio..."))
+                future = executor.submit(process_row, url, country_name, current_signature, domain, site_config)
+                pending[future] = idx
+
+            if pending:
+                done, _ = wait(list(pending), timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = pending.pop(future)
+                    result = future.result()
+                    finished[idx] = result
+                    if result is not None:
+                        sink.row_finished(idx, *result)
+                    completed += 1
+            sink.progress(completed, total_rows)
+
+            # Scrive output_*.csv / errors_*.csv nell'ordine del CSV di input
+            while next_to_write in finished:
+                result = finished.pop(next_to_write)
+                if result is not None:
+                    write_result(next_to_write, result)
+                next_to_write += 1
+
+            if not pending and (rows_exhausted or stopping):
+                # Dopo uno stop restano solo risultati separati da righe annullate
+                for idx in sorted(finished):
+                    if finished[idx] is not None:
+                        write_result(idx, finished[idx])
+                # Senza 'done' l'esecuzione resta riprendibile
+                manifest.close()
+                journal.append("stopped" if stopping else "done")
+                journal.close()
+                summary["completed"] = completed
+                summary["stopped"] = stopping
+                break
+
+    try:
+        store.close()
+    except Exception as e:
+        logging.warning(f"[STORE] Impossibile salvare l'archivio delle firme: {e}")
+
+    sink.run_finished(summary)
     if config.get("use_debug_mode", False):
         close_chrome_debug()
-    close_loggers()
+    if close_logs:
+        close_loggers()
+    return summary
+
+class SignatureTextHasher(HTMLParser):
+    """
+    Normalizzatore HTML in streaming usato da generate_signature_hash.
+
+    Produce lo stesso testo di BeautifulSoup(html, "html.parser") dopo il decompose di
+    script/style/meta/noscript e get_text(" ", strip=True), ma senza costruire l'albero:
+    usa lo stesso tokenizer (html.parser) e ne replica le regole di annidamento,
+    passando ogni segmento di testo direttamente a sha256.
+    """
+
+    # Tag rimossi prima dell'estrazione del testo
+    REMOVED_TAGS = frozenset({"script", "style", "meta", "noscript"})
+    # Tag il cui testo diretto ha un tipo di stringa ignorato da get_text (rt/rp/template)
+    SKIPPED_TAGS = REMOVED_TAGS | {"rt", "rp", "template"}
+    # Tag vuoti HTML: chiusi subito dopo l'apertura, come fa BeautifulSoup
+    VOID_TAGS = frozenset({
+        "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame",
+        "hr", "image", "img", "input", "isindex", "keygen", "link", "menuitem", "meta",
+        "nextid", "param", "source", "spacer", "track", "wbr"
+    })
+    ENTITIES = {}
+    for _name, _char in sorted(HTML5_ENTITIES.items()):
+        ENTITIES.setdefault(_name[:-1] if _name.endswith(";") else _name, _char)
+    del _name, _char
+
+    _DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+    _HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._digest = hashlib.sha256()
+        self._empty = True
+        self._stack = []
+        self._open_counts = {}
+        self._skipped = 0
+        self._removed = 0
+        self._data = []
+        self._closed_void = []
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+    def _flush(self, cdata=False):
+        if not self._data:
+            return
+        text = "".join(self._data).strip()
+        self._data = []
+        if not text or (self._removed if cdata else self._skipped):
+            return
+        self._digest.update(text.encode("utf-8") if self._empty else f" {text}".encode("utf-8"))
+        self._empty = False
+
+    def _push(self, tag):
+        self._stack.append(tag)
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+        if tag in self.SKIPPED_TAGS:
+            self._skipped += 1
+            if tag in self.REMOVED_TAGS:
+                self._removed += 1
+
+    def _end(self, tag):
+        self._flush()
+        if not self._open_counts.get(tag):
+            return
+        while self._stack:
+            name = self._stack.pop()
+            self._open_counts[name] -= 1
+            if name in self.SKIPPED_TAGS:
+                self._skipped -= 1
+                if name in self.REMOVED_TAGS:
+                    self._removed -= 1
+            if name == tag:
+                break
+
+    def handle_starttag(self, tag, attrs, handle_void=True):
+        self._flush()
+        self._push(tag)
+        if handle_void and tag in self.VOID_TAGS:
+            self._end(tag)
+            self._closed_void.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_void=False)
+        self._end(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+        else:
+            self._end(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        base, reference = (16, self._HEX_REFERENCE) if name[:1] in "xX" else (10, self._DECIMAL_REFERENCE)
+        digits = name[1:] if base == 16 else name
+        extra = ""
+        try:
+            code = int(digits, base)
+        except ValueError:
+            match = reference.search(digits)
+            code = int(match.group(1), base) if match else None
+            extra = match.group(2) if match else digits
+
+        if code is None:
+            char = ""
+        elif code == 0 or code > 0x10FFFF or 0xD800 <= code <= 0xDFFF:
+            char = "\ufffd"
+        elif 0x80 <= code <= 0x9F:
+            # Riferimenti C1 scritti con la codifica Windows-1252
+            try:
+                char = bytes([code]).decode("cp1252")
+            except UnicodeDecodeError:
+                char = chr(code)
+        else:
+            char = chr(code)
+        self._data.append(char)
+        self._data.append(extra)
+
+    def handle_entityref(self, name):
+        self._data.append(self.ENTITIES.get(name, f"&{name}"))
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._data.append(data[len("CDATA["):])
+            self._flush(cdata=True)
+
+    # Commenti, doctype e processing instruction non fanno parte del testo
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
 
 # Function: generate_signature_hash
 # Description: Function to generate signature hash.
 # Inputs: html_content
 # Output: [call]
-# Called by: detect_page_change
-# Calls: BeautifulSoup, soup
+# Called by: detect_change
+# Calls: SignatureTextHasher
 def generate_signature_hash(html_content: str) -> str:
     """
-    Function: generate_signature_hash
-    Description: Function to generate signature hash.
-    Args:
-        html_content
-    Returns:
-        [call]
+    SHA-256 del testo visibile della pagina (senza script/style/meta/noscript),
+    calcolato in un solo passaggio senza costruire l'albero HTML.
     """
-    soup = BeautifulSoup(html_content, "html.parser")
-    for tag in soup(["script", "style", "meta", "noscript"]):
-        tag.decompose()
-    clean_text = soup.get_text(separator=" ", strip=True)
-    return hashlib.sha256(clean_text.encode("utf-8")).hexdigest()
+    hasher = SignatureTextHasher()
+    hasher.feed(html_content)
+    hasher.close()
+    return hasher.hexdigest()
 
 
 
@@ -1178,22 +2983,144 @@ def generate_signature_text(driver) -> str:
 
 
 
+# === Similarità testuale ===
+
+# Valori predefiniti delle opzioni di similarità (sovrascrivibili per sito in config.json)
+SIMILARITY_DEFAULTS = {
+    "similarity_method": "auto",   # auto | char | lines | tokens | minhash | simhash
+    "similarity_exact": "char",    # metodo esatto usato da "auto" sui testi brevi
+    "similarity_exact_long": "tokens",  # metodo esatto usato da "auto" vicino alla soglia sui testi lunghi
+    "similarity_margin": 0.05,     # distanza dalla soglia entro cui "auto" ricalcola in modo esatto
+    "similarity_exact_chars": 2000,  # testi più corti: "auto" usa sempre 'similarity_exact'
+    "similarity_min_shingles": 256,  # meno shingle di così: la stima MinHash non è affidabile
+    "similarity_shingle": 5,       # parole per shingle (minhash / simhash)
+    "similarity_sketch": 256,      # dimensione del campione MinHash (bottom-k)
+}
+
+
+def similarity_char(old_text, new_text, options):
+    """Comportamento storico: SequenceMatcher carattere per carattere (quadratico nel caso peggiore)."""
+    return difflib.SequenceMatcher(None, old_text, new_text).ratio()
+
+
+def _weighted_sequence_ratio(old_items, new_items, autojunk):
+    """Ratio di SequenceMatcher su sequenze di righe/parole, pesato sulla lunghezza in caratteri."""
+    total = sum(map(len, old_items)) + sum(map(len, new_items))
+    if not total:
+        return 1.0
+    matcher = difflib.SequenceMatcher(None, old_items, new_items, autojunk=autojunk)
+    matched = sum(len(item) for a, _, size in matcher.get_matching_blocks() for item in old_items[a:a + size])
+    return 2.0 * matched / total
+
+
+def similarity_lines(old_text, new_text, options):
+    old_lines = [line.strip() for line in old_text.splitlines() if line.strip()]
+    new_lines = [line.strip() for line in new_text.splitlines() if line.strip()]
+    return _weighted_sequence_ratio(old_lines, new_lines, autojunk=False)
+
+
+def similarity_tokens(old_text, new_text, options):
+    return _weighted_sequence_ratio(old_text.split(), new_text.split(), autojunk=True)
+
+
+def _stable_hash(text):
+    """Hash a 64 bit stabile tra processi (hash() dipende da PYTHONHASHSEED)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _shingle_hashes(text, size):
+    """Hash stabili degli shingle di 'size' parole consecutive."""
+    words = text.split()
+    if len(words) <= size:
+        return {_stable_hash(" ".join(words))} if words else set()
+    return {_stable_hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def similarity_minhash(old_text, new_text, options):
+    """
+    Stima MinHash (bottom-k) della similarità di Jaccard tra gli shingle, convertita
+    in coefficiente di Dice per essere confrontabile con ratio().
+    """
+    size = int(options["similarity_shingle"])
+    return similarity_minhash_sets(_shingle_hashes(old_text, size), _shingle_hashes(new_text, size), options)
+
+
+def similarity_minhash_sets(old_set, new_set, options):
+    """Stima MinHash su insiemi di shingle già calcolati."""
+    if not old_set or not new_set:
+        return 1.0 if old_set == new_set else 0.0
+    sketch = heapq.nsmallest(int(options["similarity_sketch"]), old_set | new_set)
+    jaccard = sum(1 for h in sketch if h in old_set and h in new_set) / len(sketch)
+    return 2.0 * jaccard / (1.0 + jaccard)
+
+
+def similarity_simhash(old_text, new_text, options):
+    """Stima SimHash a 64 bit: 1 - distanza di Hamming / 64."""
+    size = int(options["similarity_shingle"])
+
+    def fingerprint(hashes):
+        hashes = [h & 0xFFFFFFFFFFFFFFFF for h in hashes]
+        half = len(hashes) / 2
+        value = 0
+        for bit in range(64):
+            mask = 1 << bit
+            if sum(1 for h in hashes if h & mask) > half:
+                value |= mask
+        return value
+
+    old_set, new_set = _shingle_hashes(old_text, size), _shingle_hashes(new_text, size)
+    if not old_set or not new_set:
+        return 1.0 if old_set == new_set else 0.0
+    return 1.0 - bin(fingerprint(old_set) ^ fingerprint(new_set)).count("1") / 64.0
+
+
+SIMILARITY_ENGINES = {
+    "char": similarity_char,
+    "lines": similarity_lines,
+    "tokens": similarity_tokens,
+    "minhash": similarity_minhash,
+    "simhash": similarity_simhash,
+}
+
+
 # Function: compute_text_similarity
 # Description: Function to compute text similarity.
-# Inputs: old_text, new_text
+# Inputs: old_text, new_text, site_config
 # Output: [call]
-# Called by: detect_page_change
-# Calls: [none]
-def compute_text_similarity(old_text: str, new_text: str) -> float:
+# Called by: detect_change
+# Calls: SIMILARITY_ENGINES
+def compute_text_similarity(old_text: str, new_text: str, site_config: dict = None) -> float:
     """
-    Function: compute_text_similarity
-    Description: Function to compute text similarity.
-    Args:
-        old_text, new_text
-    Returns:
-        [call]
+    Similarità (0..1) tra due testi con il metodo scelto in 'similarity_method'.
+
+    Con "auto" i testi brevi (sotto 'similarity_exact_chars') usano 'similarity_exact':
+    con pochi shingle una sola parola cambiata ne altera una buona parte e la stima crolla.
+    Sui testi lunghi si usa la stima MinHash, lineare nella lunghezza; se cade entro
+    'similarity_margin' dalla 'detection_threshold' del sito (o gli shingle sono troppo
+    pochi) si ricalcola con 'similarity_exact_long', per parole: il confronto per
+    caratteri su centinaia di KB è lento e con autojunk sbaglia per difetto.
     """
-    return difflib.SequenceMatcher(None, old_text, new_text).ratio()
+    options = {**SIMILARITY_DEFAULTS, **{k: v for k, v in (site_config or {}).items() if k in SIMILARITY_DEFAULTS}}
+    if old_text == new_text:
+        return 1.0
+
+    method = options["similarity_method"]
+    if method != "auto":
+        return SIMILARITY_ENGINES.get(method, similarity_char)(old_text, new_text, options)
+
+    if min(len(old_text), len(new_text)) < int(options["similarity_exact_chars"]):
+        return SIMILARITY_ENGINES.get(options["similarity_exact"], similarity_char)(old_text, new_text, options)
+    exact = SIMILARITY_ENGINES.get(options["similarity_exact_long"], similarity_tokens)
+    size = int(options["similarity_shingle"])
+    old_set, new_set = _shingle_hashes(old_text, size), _shingle_hashes(new_text, size)
+    if min(len(old_set), len(new_set)) < int(options["similarity_min_shingles"]):
+        return exact(old_text, new_text, options)
+
+    threshold = float((site_config or {}).get("detection_threshold") or 0.900)
+    estimate = similarity_minhash_sets(old_set, new_set, options)
+    if abs(estimate - threshold) > float(options["similarity_margin"]):
+        return estimate
+    return exact(old_text, new_text, options)
 
 
 
@@ -1270,50 +3197,89 @@ def write_detection_log(message: str):
 # Inputs: driver, site_config, previous_signature
 # Output: [expression]
 # Called by: process_pages
-# Calls: build_detection_signature, compute_text_similarity, float, generate_signature_hash, generate_signature_text, parse_detection_signature
-def detect_page_change(driver, site_config: dict, previous_signature: str, filename_base: str) -> tuple[bool, str, str, float]:
+# Calls: detect_change, generate_signature_text
+def detect_page_change(driver, site_config: dict, previous_signature: str, filename_base: str, text_store=None) -> tuple[bool, str, str, float]:
     """
-    Determina se la pagina è cambiata usando hash e/o similarità semantica.
-    Salva o confronta i testi in 'semantics/' solo se richiesto dal metodo.
+    Determina se la pagina caricata nel browser è cambiata usando hash e/o similarità semantica.
 
     Args:
         driver: WebDriver attivo sulla pagina
         site_config: Configurazione del sito corrente
         previous_signature: Firma precedente (hash + similarity)
         filename_base: Nome base del file (senza estensione)
+        text_store: Dove leggere/salvare il testo semantico (default: semantics/<filename_base>.txt)
 
     Returns:
         (page_changed: bool, new_signature: str, reason: str, similarity: float)
     """
-    import os
+    return detect_change(driver.page_source, lambda: generate_signature_text(driver),
+                         site_config, previous_signature, filename_base, text_store)
+
 
+def detect_page_change_from_html(html_content: str, site_config: dict, previous_signature: str, filename_base: str, text_store=None) -> tuple[bool, str, str, float]:
+    """
+    Come detect_page_change, ma a partire dall'HTML scaricato via HTTP (senza Selenium).
+    """
+    return detect_change(html_content, lambda: extract_visible_text(html_content),
+                         site_config, previous_signature, filename_base, text_store)
+
+
+def extract_visible_text(html_content: str) -> str:
+    """
+    Approssima body.text di Selenium: testo visibile del <body>, una riga per blocco,
+    spazi compressi e righe vuote eliminate.
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    root = soup.body or soup
+    for tag in root(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    lines = (" ".join(line.split()) for line in root.get_text("\n").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+# Function: detect_change
+# Description: Core comune del rilevamento cambiamenti.
+# Inputs: html_content, read_text, site_config, previous_signature, filename_base, text_store
+# Output: [expression]
+# Called by: detect_page_change, detect_page_change_from_html
+# Calls: build_detection_signature, compute_text_similarity, float, generate_signature_hash, parse_detection_signature, SemanticTextFile
+def detect_change(html_content: str, read_text, site_config: dict, previous_signature: str, filename_base: str, text_store=None) -> tuple[bool, str, str, float]:
+    """
+    Determina se la pagina è cambiata usando hash e/o similarità semantica.
+    Salva o confronta il testo semantico solo se richiesto dal metodo.
+
+    Args:
+        html_content: HTML della pagina
+        read_text: Funzione senza argomenti che restituisce il testo visibile (chiamata solo se serve)
+        site_config: Configurazione del sito corrente
+        previous_signature: Firma precedente (hash + similarity)
+        filename_base: Nome base del file (senza estensione)
+        text_store: Oggetto con load()/save(text) per il testo semantico
+                    (default: semantics/<filename_base>.txt)
+
+    Returns:
+        (page_changed: bool, new_signature: str, reason: str, similarity: float)
+    """
     method = site_config.get("detection_type", "hash")
     threshold = float(site_config.get("detection_threshold", 0.900))
-
-    # Directory dove salvare i testi semantic
-    semantics_dir = os.path.join(get_base_dir(), "semantics")
-    ensure_directory_exists(semantics_dir)
-    txt_path = os.path.join(semantics_dir, f"{filename_base}.txt")
+    text_store = text_store or SemanticTextFile(filename_base)
 
     # Parsing firma precedente
     _, old_hash, old_sim = parse_detection_signature(previous_signature or "___1.0")
 
-    html_content = driver.page_source
     new_hash = generate_signature_hash(html_content) if method in ["hash", "both"] else "XXX"
-    new_text = generate_signature_text(driver) if method in ["semantic", "both"] else ""
+    new_text = read_text() if method in ["semantic", "both"] else ""
     similarity = 1.0
     old_text = ""
 
-    if method in ["semantic", "both"] and os.path.exists(txt_path):
-        with open(txt_path, "r", encoding="utf-8") as f:
-            old_text = f.read()
+    if method in ["semantic", "both"]:
+        old_text = text_store.load()
 
     if method == "semantic":
-        similarity = compute_text_similarity(old_text, new_text)
+        similarity = compute_text_similarity(old_text, new_text, site_config)
         if not old_text or similarity < threshold:
             # Cambiamento semantico
-            with open(txt_path, "w", encoding="utf-8") as f:
-                f.write(new_text)
+            text_store.save(new_text)
             page_changed = True
             reason = locale.get("similarity_below_threshold", "similarità {similarity:.3f} < {threshold:.3f}").format(similarity=similarity, threshold=threshold)
         else:
@@ -1328,18 +3294,16 @@ def detect_page_change(driver, site_config: dict, previous_signature: str, filen
         page_changed = False
         if new_hash != old_hash:
             if old_text:
-                similarity = compute_text_similarity(old_text, new_text)
+                similarity = compute_text_similarity(old_text, new_text, site_config)
                 if similarity < threshold:
                     page_changed = True
-                    with open(txt_path, "w", encoding="utf-8") as f:
-                        f.write(new_text)
+                    text_store.save(new_text)
                     reason = locale.get("hash_and_similarity_below_threshold", "hash differente e similarità {similarity:.3f} < {threshold:.3f}").format(similarity=similarity, threshold=threshold)
                 else:
                     reason = "Hash changed, semantic similarity ok"
             else:
                 page_changed = True
-                with open(txt_path, "w", encoding="utf-8") as f:
-                    f.write(new_text)
+                text_store.save(new_text)
                 reason = "Hash changed, no previous semantic text"
         else:
             reason = "Hash identical"
@@ -1419,11 +3383,17 @@ def extract_date(driver, site_config):
     """
     Estrae e analizza la data di aggiornamento da una pagina web.
     """
+    from selenium.common.exceptions import TimeoutException
+
     try:
         date_selector = identify_date_selector(site_config.get("date_selector", ""))
         logging.info(locale.get("using_date_selector_dateselector", f"Using date selector: {date_selector}"))
 
-        time.sleep(2)
+        # Attende l'elemento al massimo 2 secondi invece di una pausa fissa
+        try:
+            WebDriverWait(driver, 2, poll_frequency=0.1).until(lambda d: d.find_elements("xpath", date_selector))
+        except TimeoutException:
+            pass
 
         try:
             element = driver.find_element("xpath", date_selector)
@@ -1680,7 +3650,7 @@ def save_debug_level(self):
 # Description: Function to create a Treeview with standardized configuration and optional localized headers.
 # Inputs: parent, columns, column_width=150, minwidth=100, locale=None, locale_keys=None
 # Output: ttk.Treeview
-# Called by: setup_tab1, setup_tab2, setup_tab3, load_csv
+# Called by: setup_tab3
 # Calls: ttk.Treeview
 
 def build_treeview(parent, columns, column_width=150, minwidth=100, locale=None, locale_keys=None):
@@ -1719,6 +3689,302 @@ def build_treeview(parent, columns, column_width=150, minwidth=100, locale=None,
 
     return tree
 
+class VirtualTreeview:
+    """
+    Tabella virtualizzata per CSV grandi: le righe stanno in un modello in memoria
+    (iid -> valori) e il ttk.Treeview contiene solo la finestra visibile, ricreata a
+    ogni scorrimento. Ordinamento (clic sull'intestazione) e filtro lavorano sul
+    modello, non sui widget.
+
+    Espone la parte dell'API di Treeview usata dall'App (insert, item, exists, delete,
+    get_children, selection, heading, column, ["columns"]); il resto viene inoltrato
+    al Treeview interno.
+    """
+
+    def __init__(self, parent, columns, column_width=150, minwidth=100, locale=None, locale_keys=None,
+                 filter_label=None):
+        # Destroy previous children if regenerating
+        for widget in parent.winfo_children():
+            widget.destroy()
+
+        self.column_width = column_width
+        self.minwidth = minwidth
+        self.rows = {}
+        self.view = []
+        self.view_dirty = False
+        self.view_children = ()     # tuple(self.view), ricalcolata solo quando la vista cambia
+        self.view_positions = {}    # iid -> posizione in self.view
+        self.filter_text = ""
+        self.sort_column = None
+        self.sort_reverse = False
+        self.selected = set()
+        self.offset = 0
+        self.page_size = 40
+        self.next_key = 0
+        self.render_pending = False
+        self.filter_job = None
+        self.extend_selection = False
+
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill="x", side="top", pady=(0, 5))
+        self.filter_label = ttk.Label(filter_frame, text=filter_label or "Filtro:")
+        self.filter_label.pack(side="left")
+        self.filter_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.filter_var).pack(side="left", fill="x", expand=True, padx=(5, 0))
+        self.filter_var.trace_add("write", lambda *args: self._schedule_filter())
+
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings")
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.tree.pack(fill="both", expand=True, side="left")
+        self.scrollbar.pack(side="right", fill="y")
+        self.set_columns(columns, locale, locale_keys)
+
+        self.tree.bind("<Configure>", lambda event: self._schedule_render())
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", self._on_mousewheel)
+        self.tree.bind("<Button-5>", self._on_mousewheel)
+        self.tree.bind("<Button-1>", self._on_click, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        for keysym in ("Up", "Down", "Prior", "Next", "Home", "End"):
+            self.tree.bind(f"<{keysym}>", self._on_key)
+
+    def __getattr__(self, name):
+        if name == "tree":
+            raise AttributeError(name)
+        return getattr(self.tree, name)
+
+    def __getitem__(self, option):
+        return self.tree[option]
+
+    # --- Modello ---
+
+    def set_columns(self, columns, locale=None, locale_keys=None):
+        self.tree["columns"] = columns
+        for i, col in enumerate(columns):
+            if locale and locale_keys and i < len(locale_keys):
+                heading = locale.get(locale_keys[i], col)
+            else:
+                heading = col
+            self.tree.heading(col, text=heading, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, anchor="w", width=self.column_width, minwidth=self.minwidth, stretch=True)
+        self.sort_column = None
+        self.view_dirty = True
+        self._schedule_render()
+
+    def load(self, rows):
+        """Sostituisce tutte le righe con 'rows' (iid generati)."""
+        self.rows = {}
+        self.next_key = 0
+        for values in rows:
+            self.rows[self._new_key()] = list(values)
+        self.selected.clear()
+        self.offset = 0
+        self.view_dirty = True
+        self._schedule_render()
+
+    def insert(self, parent, index, iid=None, values=()):
+        key = str(iid) if iid is not None else self._new_key()
+        if key in self.rows:
+            raise tk.TclError(f"Item {key} already exists")
+        self.rows[key] = list(values)
+        if self.filter_text or self.sort_column is not None:
+            self.view_dirty = True
+        elif not self.view_dirty:
+            self.view_positions[key] = len(self.view)
+            self.view.append(key)
+            self.view_children = None
+        self._schedule_render()
+        return key
+
+    def item(self, iid, option=None, **kw):
+        # Come ttk.Treeview: un iid sconosciuto è un errore, non una riga nuova
+        if iid not in self.rows:
+            raise tk.TclError(f"Item {iid} not found")
+        if "values" in kw:
+            old_values, values = self.rows[iid], list(kw["values"])
+            self.rows[iid] = values
+            if self._changes_view(old_values, values):
+                self.view_dirty = True
+            self._schedule_render()
+            return None
+        values = self.rows[iid]
+        if option == "values":
+            return tuple(values)
+        return {"values": list(values)} if option is None else None
+
+    def exists(self, iid):
+        return iid in self.rows
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.rows.pop(iid, None)
+            self.selected.discard(iid)
+        self.view_dirty = True
+        self._schedule_render()
+
+    def get_children(self, item=""):
+        """iid delle righe che passano il filtro, nell'ordine mostrato."""
+        self._refresh_view()
+        if self.view_children is None:
+            self.view_children = tuple(self.view)
+        return self.view_children
+
+    def all_values(self):
+        """Tutte le righe del modello, nell'ordine di inserimento e senza filtro."""
+        return [list(values) for values in self.rows.values()]
+
+    def selection(self):
+        self._refresh_view()
+        positions = self.view_positions
+        return tuple(sorted((key for key in self.selected if key in positions), key=positions.__getitem__))
+
+    def see(self, iid):
+        self._refresh_view()
+        if iid not in self.view_positions:
+            return
+        index = self.view_positions[iid]
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.page_size:
+            self.offset = index - self.page_size + 1
+        self._render()
+
+    def sort_by(self, column):
+        self.sort_reverse = not self.sort_reverse if column == self.sort_column else False
+        self.sort_column = column
+        self.offset = 0
+        self.view_dirty = True
+        self._render()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().lower()
+        self.offset = 0
+        self.view_dirty = True
+        self._render()
+
+    def _new_key(self):
+        while f"I{self.next_key}" in self.rows:
+            self.next_key += 1
+        self.next_key += 1
+        return f"I{self.next_key - 1}"
+
+    @staticmethod
+    def _sort_key(value):
+        # Numeri prima e in ordine numerico, poi testo senza distinzione di maiuscole
+        try:
+            return (0, float(value), "")
+        except (TypeError, ValueError):
+            return (1, 0.0, str(value).lower())
+
+    def _changes_view(self, old_values, new_values):
+        """True se la modifica di una riga può cambiarne la posizione o la visibilità."""
+        if self.filter_text:
+            old_match = self.filter_text in "\x1f".join(map(str, old_values)).lower()
+            if old_match != (self.filter_text in "\x1f".join(map(str, new_values)).lower()):
+                return True
+        if self.sort_column is not None:
+            index = list(self.tree["columns"]).index(self.sort_column)
+            old_key = old_values[index] if index < len(old_values) else ""
+            return old_key != (new_values[index] if index < len(new_values) else "")
+        return False
+
+    def _refresh_view(self):
+        if not self.view_dirty:
+            return
+        keys = list(self.rows)
+        if self.filter_text:
+            keys = [k for k in keys if self.filter_text in "\x1f".join(map(str, self.rows[k])).lower()]
+        if self.sort_column is not None:
+            index = list(self.tree["columns"]).index(self.sort_column)
+            keys.sort(key=lambda k: self._sort_key(self.rows[k][index] if index < len(self.rows[k]) else ""),
+                      reverse=self.sort_reverse)
+        self.view = keys
+        self.view_children = None
+        self.view_positions = {key: i for i, key in enumerate(keys)}
+        self.view_dirty = False
+
+    # --- Finestra visibile ---
+
+    def _schedule_render(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.tree.after_idle(self._render)
+
+    def _measure_page(self):
+        shown = self.tree.get_children()
+        bbox = self.tree.bbox(shown[0]) if shown else None
+        if bbox:
+            top, row_height = bbox[1], bbox[3]
+            self.page_size = max(1, (self.tree.winfo_height() - top) // max(1, row_height))
+
+    def _render(self):
+        self.render_pending = False
+        self._refresh_view()
+        self._measure_page()
+        self.offset = max(0, min(self.offset, len(self.view) - self.page_size))
+
+        # Una riga in più per quella parzialmente visibile in fondo
+        window = self.view[self.offset:self.offset + self.page_size + 1]
+        shown = self.tree.get_children()
+        if list(shown) == window:
+            for key in window:
+                self.tree.item(key, values=self.rows[key])
+        else:
+            self.tree.delete(*shown)
+            for key in window:
+                self.tree.insert("", "end", iid=key, values=self.rows[key])
+        self.tree.selection_set([key for key in window if key in self.selected])
+
+        total = len(self.view)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.page_size) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.view))
+        elif args[0] == "scroll":
+            step = self.page_size if args[2] == "pages" else 1
+            self.offset += int(args[1]) * step
+        self._render()
+
+    def _on_mousewheel(self, event):
+        direction = -1 if event.num == 4 or getattr(event, "delta", 0) > 0 else 1
+        self.yview("scroll", 3 * direction, "units")
+        return "break"
+
+    def _on_click(self, event):
+        # Con Shift/Ctrl la selezione fuori dalla finestra visibile resta valida
+        self.extend_selection = bool(event.state & 0x0005)
+
+    def _on_select(self, event):
+        shown = set(self.tree.get_children())
+        picked = set(self.tree.selection())
+        if self.extend_selection:
+            self.selected = (self.selected - shown) | picked
+        elif picked != self.selected & shown:
+            self.selected = picked
+
+    def _on_key(self, event):
+        self._refresh_view()
+        if not self.view:
+            return "break"
+        focus = self.tree.focus()
+        index = self.view_positions.get(focus, self.offset)
+        moves = {"Up": -1, "Down": 1, "Prior": -self.page_size, "Next": self.page_size}
+        if event.keysym == "Home":
+            index = 0
+        elif event.keysym == "End":
+            index = len(self.view) - 1
+        else:
+            index = max(0, min(len(self.view) - 1, index + moves[event.keysym]))
+        key = self.view[index]
+        self.selected = {key}
+        self.see(key)
+        self.tree.focus(key)
+        return "break"
+
 def extract_text_from_pdf(pdf_path, locale=None):
     try:
         doc = fitz.open(pdf_path)
@@ -1732,71 +3998,909 @@ def extract_text_from_pdf(pdf_path, locale=None):
         return ""
 
 
+# === Diff per righe (VersioNice) ===
+
+# Passi di Myers (diagonali visitate e righe uguali percorse) per l'intero diff: esaurito
+# il budget, gli intervalli ancora aperti vengono trattati come sostituiti. Limita il caso
+# peggiore (testi quasi del tutto diversi senza righe uniche in comune) a meno di un secondo
+DIFF_MAX_STEPS = 500_000
+
+
+def _append_diff_op(ops, tag, i1, i2, j1, j2):
+    """Accoda un'operazione unendo quelle adiacenti (delete + insert -> replace)."""
+    if i1 == i2 and j1 == j2:
+        return
+    if ops:
+        last_tag, a1, a2, b1, b2 = ops[-1]
+        if last_tag == tag or (tag != "equal" and last_tag != "equal"):
+            ops[-1] = (tag if last_tag == tag else "replace", a1, i2, b1, j2)
+            return
+    ops.append((tag, i1, i2, j1, j2))
+
+
+def _unique_anchors(a, b, a0, a1, b0, b1):
+    """
+    Patience diff: righe presenti una sola volta in entrambi gli intervalli, ridotte alla
+    più lunga sottosequenza crescente (stesso ordine nei due testi).
+    """
+    count_a, count_b, pos_b = {}, {}, {}
+    for i in range(a0, a1):
+        count_a[a[i]] = count_a.get(a[i], 0) + 1
+    for j in range(b0, b1):
+        count_b[b[j]] = count_b.get(b[j], 0) + 1
+        pos_b[b[j]] = j
+    pairs = [(i, pos_b[a[i]]) for i in range(a0, a1) if count_a[a[i]] == 1 and count_b.get(a[i]) == 1]
+    if not pairs:
+        return []
+
+    tails, tail_index, previous = [], [], [None] * len(pairs)
+    for n, (i, j) in enumerate(pairs):
+        k = bisect.bisect_left(tails, j)
+        if k:
+            previous[n] = tail_index[k - 1]
+        if k == len(tails):
+            tails.append(j)
+            tail_index.append(n)
+        else:
+            tails[k] = j
+            tail_index[k] = n
+    anchors = []
+    n = tail_index[-1]
+    while n is not None:
+        anchors.append(pairs[n])
+        n = previous[n]
+    return anchors[::-1]
+
+
+def _middle_snake(a, a0, a1, b, b0, b1, budget):
+    """
+    Myers in spazio lineare: diagonale centrale del percorso minimo tra a[a0:a1] e b[b0:b1],
+    cercata in avanti e all'indietro insieme. Restituisce (x0, y0, x1, y1) assoluti,
+    oppure None se il budget condiviso (budget[0], passi rimasti) si esaurisce.
+    """
+    n, m = a1 - a0, b1 - b0
+    delta = n - m
+    odd = delta & 1
+    # Con budget[0] passi si arriva al più a d ~ sqrt(budget[0]): array limitati di conseguenza
+    limit = min((n + m + 1) // 2 + 1, int(max(budget[0], 0) ** 0.5) + 1)
+    offset = limit + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range(limit):
+        budget[0] -= 2 * d + 2
+        if budget[0] < 0:
+            return None
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            budget[0] -= x - x0
+            forward[offset + k] = x
+            if odd and delta - d < k < delta + d and x + backward[offset + delta - k] >= n:
+                return a0 + x0, b0 + y0, a0 + x, b0 + y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a1 - 1 - x] == b[b1 - 1 - y]:
+                x += 1
+                y += 1
+            budget[0] -= x - x0
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return a1 - x, b1 - y, a1 - x0, b1 - y0
+    return None
+
+
+def diff_lines(old_lines, new_lines, max_steps=DIFF_MAX_STEPS):
+    """
+    Diff per righe tra due liste di stringhe, con le operazioni nel formato di
+    SequenceMatcher.get_opcodes() (equal / delete / insert / replace).
+
+    Le righe vengono ridotte a interi (una tabella hash per riga distinta); gli
+    intervalli si dividono sulle righe uniche in entrambi i testi (patience diff) e
+    quelli senza righe uniche vanno a Myers in spazio lineare. Niente confronto fuzzy
+    dentro le righe come in ndiff: il costo è quasi lineare nei casi tipici, e i passi di
+    Myers dell'intero diff non superano 'max_steps' (poi i blocchi restano sostituiti).
+    """
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in old_lines]
+    b = [ids.setdefault(line, len(ids)) for line in new_lines]
+
+    ops = []
+    budget = [max_steps]
+    stack = [("patience", 0, len(a), 0, len(b))]
+    while stack:
+        kind, a0, a1, b0, b1 = stack.pop()
+        if kind in ("equal", "delete", "insert"):
+            _append_diff_op(ops, kind, a0, a1, b0, b1)
+            continue
+
+        # Prefisso e suffisso comuni
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            _append_diff_op(ops, "equal", a0, a0 + 1, b0, b0 + 1)
+            a0 += 1
+            b0 += 1
+        suffix = 0
+        while a1 - suffix > a0 and b1 - suffix > b0 and a[a1 - suffix - 1] == b[b1 - suffix - 1]:
+            suffix += 1
+        tasks = []  # in ordine di uscita, poi impilati al contrario
+        if a0 == a1 - suffix or b0 == b1 - suffix:
+            tasks.append(("delete", a0, a1 - suffix, b0, b0))
+            tasks.append(("insert", a1 - suffix, a1 - suffix, b0, b1 - suffix))
+        else:
+            anchors = _unique_anchors(a, b, a0, a1 - suffix, b0, b1 - suffix) if kind == "patience" else []
+            if anchors:
+                i, j = a0, b0
+                for anchor_i, anchor_j in anchors:
+                    tasks.append(("patience", i, anchor_i, j, anchor_j))
+                    tasks.append(("equal", anchor_i, anchor_i + 1, anchor_j, anchor_j + 1))
+                    i, j = anchor_i + 1, anchor_j + 1
+                tasks.append(("patience", i, a1 - suffix, j, b1 - suffix))
+            else:
+                snake = _middle_snake(a, a0, a1 - suffix, b, b0, b1 - suffix, budget) if budget[0] > 0 else None
+                if snake is None:
+                    tasks.append(("delete", a0, a1 - suffix, b0, b0))
+                    tasks.append(("insert", a1 - suffix, a1 - suffix, b0, b1 - suffix))
+                else:
+                    x0, y0, x1, y1 = snake
+                    tasks.append(("myers", a0, x0, b0, y0))
+                    tasks.append(("equal", x0, x1, y0, y1))
+                    tasks.append(("myers", x1, a1 - suffix, y1, b1 - suffix))
+        if suffix:
+            tasks.append(("equal", a1 - suffix, a1, b1 - suffix, b1))
+        stack.extend(reversed(tasks))
+    return ops
+
+
+def group_diff_hunks(opcodes, context=3):
+    """Operazioni raggruppate in blocchi con al più 'context' righe uguali attorno (come difflib)."""
+    codes = list(opcodes)
+    if not codes or all(tag == "equal" for tag, *_ in codes):
+        return []
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    hunks, group = [], []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * context:
+            group.append((tag, i1, i1 + context, j1, j1 + context))
+            hunks.append(group)
+            group = []
+            i1, j1 = i2 - context, j2 - context
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        hunks.append(group)
+    return hunks
+
+
 def diff_texts_colored(old_text, new_text):
-    diff = difflib.ndiff(old_text.splitlines(), new_text.splitlines())
+    old_lines, new_lines = old_text.splitlines(), new_text.splitlines()
     result = []
-    for line in diff:
-        if line.startswith("  "):
-            result.append(("black", line[2:]))
-        elif line.startswith("- "):
-            result.append(("red", line[2:]))
-        elif line.startswith("+ "):
-            result.append(("darkgreen", line[2:]))
+    for tag, i1, i2, j1, j2 in diff_lines(old_lines, new_lines):
+        if tag == "equal":
+            result.extend(("black", line) for line in new_lines[j1:j2])
+            continue
+        result.extend(("red", line) for line in old_lines[i1:i2])
+        result.extend(("darkgreen", line) for line in new_lines[j1:j2])
     return result
-def build_changes_index(base_path):
-    changes_dir = os.path.join(base_path, "changes")
-    os.makedirs(changes_dir, exist_ok=True)
-    output = {}
 
-    # 🔍 Costruisce elenco completo .txt già presenti
-    existing_txt_paths = set()
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.endswith(".txt"):
-                relative_txt = os.path.relpath(os.path.join(root, file), base_path)
-                existing_txt_paths.add(relative_txt.replace("\\", "/"))
 
-    for root, dirs, files in os.walk(base_path):
-        if root.startswith(changes_dir):
-            continue
+class DiffView:
+    """
+    Vista del diff su un tk.Text: blocchi con intestazione @@ e 'context' righe attorno
+    alle modifiche, righe invariate raccolte in una riga cliccabile che le espande.
+
+    Le righe vengono inserite a blocchi di CHUNK, e il blocco successivo solo quando lo
+    scorrimento si avvicina al fondo: anche due testi da qualche MB restano interattivi.
+    Il diff si calcola in un thread a parte; la vista lo controlla ogni POLL_MS e scarta
+    i risultati di un confronto già sostituito da uno più recente.
+    """
+
+    CHUNK = 500
+    POLL_MS = 50
+
+    def __init__(self, text, scrollbar, context=3, locale=None):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.context = context
+        self.locale = locale
+        self.rows = iter(())
+        self.old_lines = []
+        self.folds = 0
+        self.render_pending = False
+        self.generation = 0  # confronto mostrato (o in calcolo) più recente
+        self.text.tag_config("common", foreground="black")
+        self.text.tag_config("removed", foreground="red")
+        self.text.tag_config("added", foreground="darkgreen")
+        self.text.tag_config("hunk", foreground="#3a5a8c")
+        self.text.tag_config("fold", foreground="gray")
+        self.text.config(yscrollcommand=self._on_scroll)
+
+    def show(self, old_text, new_text, full_text_title=None):
+        """Mostra il diff tra i due testi, eventualmente seguito dal testo nuovo completo."""
+        self.generation += 1
+        old_lines, new_lines = old_text.splitlines(), new_text.splitlines()
+        result = {}
+
+        def compute():
+            try:
+                result["opcodes"] = diff_lines(old_lines, new_lines)
+            except Exception as e:
+                logging.error(f"[DIFF] Errore nel calcolo del confronto: {e}")
+                result["opcodes"] = None
+
+        threading.Thread(target=compute, name="diff", daemon=True).start()
+        self.old_lines = []
+        self._reset([("hunk", self.locale.get("diff_computing", "Confronto in corso...")
+                      if self.locale else "Confronto in corso...")])
+        self._poll(self.generation, result, old_lines, new_lines, full_text_title)
+
+    def show_text(self, text):
+        """Mostra un testo senza confronto."""
+        self.generation += 1  # un diff ancora in calcolo non sovrascrive questo testo
+        self.old_lines = []
+        self._reset(("common", line) for line in text.splitlines())
+
+    def _poll(self, generation, result, old_lines, new_lines, full_text_title):
+        if generation != self.generation:
+            return
+        if "opcodes" not in result:
+            self.text.after(self.POLL_MS, self._poll, generation, result, old_lines, new_lines, full_text_title)
+            return
+        self.old_lines = old_lines
+        if result["opcodes"] is None:
+            # Confronto fallito: si mostra comunque il testo nuovo
+            rows = (("common", line) for line in new_lines)
+        else:
+            rows = self._diff_rows(result["opcodes"], new_lines)
+            if full_text_title:
+                rows = itertools.chain(rows, [("title", ""), ("title", full_text_title), ("title", "")],
+                                       (("common", line) for line in new_lines))
+        self._reset(rows)
+
+    def _diff_rows(self, opcodes, new_lines):
+        shown = 0  # prima riga del testo vecchio non ancora mostrata
+        hunks = group_diff_hunks(opcodes, self.context)
+        for hunk in hunks:
+            first, last = hunk[0], hunk[-1]
+            if first[1] > shown:
+                yield ("fold", shown, first[1])
+            yield ("hunk", f"@@ -{first[1] + 1},{last[2] - first[1]} +{first[3] + 1},{last[4] - first[3]} @@")
+            for tag, i1, i2, j1, j2 in hunk:
+                if tag == "equal":
+                    for line in new_lines[j1:j2]:
+                        yield ("common", line)
+                    continue
+                for line in self.old_lines[i1:i2]:
+                    yield ("removed", line)
+                for line in new_lines[j1:j2]:
+                    yield ("added", line)
+            shown = last[2]
+        if hunks and shown < len(self.old_lines):
+            yield ("fold", shown, len(self.old_lines))
+        if not hunks:
+            yield ("hunk", self.locale.get("diff_no_changes", "Nessuna differenza tra le versioni.")
+                   if self.locale else "Nessuna differenza tra le versioni.")
+
+    def _reset(self, rows):
+        self.text.delete("1.0", "end")
+        for tag in self.text.tag_names():
+            if tag.startswith("fold_"):
+                self.text.tag_delete(tag)
+        self.rows = iter(rows)
+        self.folds = 0
+        self._render_more()
+
+    def _render_more(self):
+        self.render_pending = False
+        args = []
+        for row in itertools.islice(self.rows, self.CHUNK):
+            if row[0] == "fold":
+                _, i1, i2 = row
+                tag = f"fold_{self.folds}"
+                self.folds += 1
+                label = (self.locale.get("diff_unchanged_lines", "⋯ {count} righe invariate (clic per mostrarle) ⋯")
+                         if self.locale else "⋯ {count} righe invariate (clic per mostrarle) ⋯")
+                args += [label.format(count=i2 - i1) + "\n", ("fold", tag)]
+                self.text.tag_bind(tag, "<Button-1>", lambda event, t=tag, a=i1, b=i2: self._expand(t, a, b))
+            else:
+                tag, line = row
+                args += [line + "\n", "hunk" if tag == "title" else tag]
+        if args:
+            self.text.insert("end", *args)
+
+    def _expand(self, tag, i1, i2):
+        ranges = self.text.tag_ranges(tag)
+        if not ranges:
+            return
+        self.text.delete(ranges[0], ranges[1])
+        self.text.insert(ranges[0], "".join(line + "\n" for line in self.old_lines[i1:i2]), "common")
+        self.text.tag_delete(tag)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Vicino al fondo: si aggiunge il blocco successivo
+        if float(last) > 0.8 and not self.render_pending:
+            self.render_pending = True
+            self.text.after_idle(self._render_more)
+
+
+class ChangesIndex:
+    """
+    Indice delle versioni per VersioNice in changes/changes.db (SQLite con journal WAL),
+    aggiornato in modo incrementale.
+
+    Per ogni cartella sotto html_save_path si conserva una filigrana (mtime della cartella,
+    mtime e dimensione del manifest): una cartella con la stessa filigrana ha gli stessi
+    file e non viene riletta, si controllano solo le sue sottocartelle già note. Così un
+    aggiornamento costa in proporzione alle cartelle nuove o modificate.
+
+    I PDF senza TXT vengono registrati in attesa (txt_ready = 0) e compaiono tra le
+    versioni solo quando TextBackfillJob ne ha estratto il testo (-1: estrazione fallita).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS dirs (
+            path TEXT PRIMARY KEY,
+            parent TEXT,
+            watermark TEXT,
+            scanned TEXT
+        );
+        CREATE TABLE IF NOT EXISTS versions (
+            dir TEXT,
+            page TEXT,
+            country TEXT,
+            timestamp TEXT,
+            pdf_path TEXT,
+            txt_path TEXT,
+            sha256 TEXT,
+            txt_ready INTEGER DEFAULT 1,
+            PRIMARY KEY (dir, pdf_path)
+        );
+        CREATE INDEX IF NOT EXISTS versions_page ON versions (page, timestamp, dir);
+    """
+
+    SKIP_DIRS = ("changes", ArtifactStore.DIRNAME)
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.artifacts = ArtifactStore(base_path, link_into_runs=False)
+        changes_dir = os.path.join(base_path, "changes")
+        os.makedirs(changes_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(changes_dir, "changes.db"))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(versions)")}
+        if "txt_ready" not in columns:
+            self._conn.execute("ALTER TABLE versions ADD COLUMN txt_ready INTEGER DEFAULT 1")
+        self._written_dirs = set()  # cartelle senza manifest in cui sono stati scritti TXT
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _full_path(self, rel_dir):
+        return self.base_path if rel_dir == "." else os.path.join(self.base_path, rel_dir)
+
+    def _watermark(self, full_dir):
+        watermark = str(os.stat(full_dir).st_mtime_ns)
+        try:
+            manifest = os.stat(os.path.join(full_dir, RunManifest.FILENAME))
+            watermark += f":{manifest.st_mtime_ns}:{manifest.st_size}"
+        except FileNotFoundError:
+            pass
+        return watermark
+
+    def refresh(self):
+        """Aggiorna l'indice; restituisce il numero di cartelle rilette."""
+        with self._conn:
+            return self._refresh_dir(".", None)
+
+    def _refresh_dir(self, rel_dir, parent):
+        full_dir = self._full_path(rel_dir)
+        watermark = self._watermark(full_dir)
+        row = self._conn.execute("SELECT watermark FROM dirs WHERE path = ?", (rel_dir,)).fetchone()
+
+        if row and row[0] == watermark:
+            # Cartella invariata: stesse voci, si scende solo nelle sottocartelle già note
+            children = [c for (c,) in self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel_dir,))]
+            return sum(self._refresh_dir(child, rel_dir) for child in children if os.path.isdir(self._full_path(child)))
+
+        files, subdirs = [], []
+        with os.scandir(full_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not (rel_dir == "." and entry.name in self.SKIP_DIRS):
+                        subdirs.append(entry.name if rel_dir == "." else f"{rel_dir}/{entry.name}")
+                elif entry.is_file():
+                    files.append(entry.name)
+
+        self._conn.execute("DELETE FROM versions WHERE dir = ?", (rel_dir,))
+        self._conn.executemany("INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               self._scan_versions(rel_dir, full_dir, files))
+
+        # Sottocartelle sparite: via le loro voci e quelle dei discendenti
+        known = [c for (c,) in self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel_dir,))]
+        for gone in set(known) - set(subdirs):
+            self._forget(gone)
+
+        self._conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                           (rel_dir, parent, watermark, datetime.now().isoformat(timespec="seconds")))
+        return 1 + sum(self._refresh_dir(child, rel_dir) for child in subdirs)
+
+    def _forget(self, rel_dir):
+        for (child,) in self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel_dir,)).fetchall():
+            self._forget(child)
+        self._conn.execute("DELETE FROM versions WHERE dir = ?", (rel_dir,))
+        self._conn.execute("DELETE FROM dirs WHERE path = ?", (rel_dir,))
+
+    def _scan_versions(self, rel_dir, full_dir, files):
+        """
+        Righe di 'versions' per una cartella: dal manifest se c'è, altrimenti dai PDF.
+        Il testo non viene estratto qui: i PDF senza TXT restano in attesa.
+        """
+        manifest = RunManifest.read(full_dir) if RunManifest.FILENAME in files else None
+        if manifest is not None:
+            return [self._manifest_version(rel_dir, entry) for entry in manifest.get("artifacts", {}).values()]
+
+        rows = []
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        country = os.path.basename(os.path.dirname(full_dir))
+        names = set(files)
         for file in files:
-            if file.endswith(".pdf"):
-                pdf_path = os.path.join(root, file)
-                relative_pdf = os.path.relpath(pdf_path, base_path).replace("\\", "/")
-                timestamp = datetime.fromtimestamp(os.path.getmtime(pdf_path)).isoformat()
+            if not file.endswith(".pdf"):
+                continue
+            txt_file = file.replace(".pdf", ".txt")
+            timestamp = datetime.fromtimestamp(os.path.getmtime(os.path.join(full_dir, file))).isoformat()
+            rows.append((rel_dir, file.replace(".pdf", ""), country, timestamp,
+                         prefix + file, prefix + txt_file, None, int(txt_file in names)))
+        return rows
+
+    def _manifest_version(self, rel_dir, entry):
+        txt_sha256 = entry.get("txt")
+        return (rel_dir, os.path.splitext(entry["filename"])[0], entry.get("country", "Unknown"), entry["time"],
+                self.artifacts.relative_path(entry["pdf"], ".pdf"),
+                self.artifacts.relative_path(txt_sha256, ".txt") if txt_sha256 else None,
+                entry["pdf"], int(bool(txt_sha256)))
+
+    def pending_texts(self):
+        """Versioni ancora senza TXT: (dir, pdf_path, txt_path, sha256)."""
+        return self._conn.execute(
+            "SELECT dir, pdf_path, txt_path, sha256 FROM versions WHERE txt_ready = 0 ORDER BY dir").fetchall()
+
+    def text_paths(self, pending):
+        """
+        (PDF sorgente, file TXT da scrivere) per una versione in attesa. Per i blob il TXT
+        viene scritto accanto al PDF e poi spostato nell'archivio da mark_text_ready.
+        """
+        rel_dir, pdf_path, txt_path, sha256 = pending
+        if sha256:
+            pdf_blob = self.artifacts.blob_path(sha256, ".pdf")
+            return pdf_blob, pdf_blob[:-len(".pdf")] + ".estratto.txt"
+        return (os.path.join(self.base_path, *pdf_path.split("/")),
+                os.path.join(self.base_path, *txt_path.split("/")))
+
+    def mark_text_ready(self, pending, txt_file, duplicates=()):
+        """
+        Registra il TXT estratto: la versione diventa visibile, insieme a quelle in
+        'duplicates' (stesso blob PDF, quindi stesso TXT).
+        """
+        rel_dir, pdf_path, txt_path, sha256 = pending
+        if sha256:
+            txt_path = self.artifacts.relative_path(self.artifacts.put(txt_file), ".txt")
+        else:
+            self._written_dirs.add(rel_dir)
+        with self._conn:
+            self._conn.executemany("UPDATE versions SET txt_ready = 1, txt_path = ? WHERE dir = ? AND pdf_path = ?",
+                                   [(txt_path, item[0], item[1]) for item in (pending, *duplicates)])
+
+    def mark_text_failed(self, pending, duplicates=()):
+        """Estrazione fallita: la versione resta fuori dall'indice fino alla prossima rilettura della cartella."""
+        with self._conn:
+            self._conn.executemany("UPDATE versions SET txt_ready = -1 WHERE dir = ? AND pdf_path = ?",
+                                   [(item[0], item[1]) for item in (pending, *duplicates)])
+
+    def sync_written_watermarks(self):
+        """
+        Aggiorna il watermark delle cartelle in cui sono stati scritti i TXT, così il
+        prossimo refresh non le rilegge per intero. Solo se i PDF presenti sono ancora
+        quelli indicizzati: una cartella cambiata nel frattempo va riletta.
+        """
+        with self._conn:
+            for rel_dir in self._written_dirs:
+                full_dir = self._full_path(rel_dir)
+                try:
+                    names = set(os.listdir(full_dir))
+                    watermark = self._watermark(full_dir)
+                except OSError:
+                    continue
+                prefix = "" if rel_dir == "." else rel_dir + "/"
+                indexed = {pdf_path[len(prefix):] for (pdf_path,) in
+                           self._conn.execute("SELECT pdf_path FROM versions WHERE dir = ?", (rel_dir,))}
+                if RunManifest.FILENAME not in names and {n for n in names if n.endswith(".pdf")} == indexed:
+                    self._conn.execute("UPDATE dirs SET watermark = ? WHERE path = ?", (watermark, rel_dir))
+        self._written_dirs.clear()
+
+    def versions(self):
+        """
+        Versioni per pagina, nel formato del vecchio changes.json. Per le esecuzioni con
+        manifest si tiene una versione per contenuto: stesso PDF, o stesso testo della
+        versione precedente (Chrome mette data e ID nel PDF, una ristampa identica ha
+        byte diversi).
+        """
+        output = {}
+        seen = set()
+        for page, country, timestamp, pdf_path, txt_path, sha256 in self._conn.execute(
+                "SELECT page, country, timestamp, pdf_path, txt_path, sha256 FROM versions "
+                "WHERE txt_ready = 1 ORDER BY page, timestamp, dir"):
+            info = output.setdefault(page, {"country": country, "versions": []})
+            if sha256 and ((page, sha256) in seen or
+                           (info["versions"] and info["versions"][-1]["txt_path"] == txt_path)):
+                continue
+            seen.add((page, sha256))
+            info["versions"].append({"timestamp": timestamp, "pdf_path": pdf_path, "txt_path": txt_path})
+        return output
 
-                txt_path = relative_pdf.replace(".pdf", ".txt")
-                full_txt_path = os.path.join(base_path, txt_path)
 
-                # ✅ VERIFICA tramite lista pre-esistente
-                if txt_path in existing_txt_paths:
-                    logging.info(f"[SKIP] File .txt già presente: {txt_path}")
-                else:
-                    try:
-                        text = extract_text_from_pdf(pdf_path)
-                        os.makedirs(os.path.dirname(full_txt_path), exist_ok=True)
-                        with open(full_txt_path, "w", encoding="utf-8") as f:
-                            f.write(text)
-                        logging.info(f"[CREATO] {full_txt_path}")
-                    except Exception as e:
-                        logging.error(f"Errore nell'estrazione/scrittura di {file}: {e}")
-                        continue
+def extract_text_to_file(pdf_path, txt_path):
+    """
+    Unità di lavoro dei processi di TextBackfillJob: scrive atomicamente in 'txt_path'
+    il testo del PDF. Restituisce il numero di caratteri estratti.
+    """
+    with fitz.open(pdf_path) as doc:
+        text = "\n".join(page.get_text() for page in doc)
+    with open(txt_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(txt_path + ".tmp", txt_path)
+    return len(text)
+
+
+class TextBackfillJob:
+    """
+    Estrazione in background dei TXT mancanti dell'indice delle versioni, con un process
+    pool dedicato. Al pool vengono affidati al massimo 'window' PDF alla volta; ogni TXT è
+    scritto atomicamente dal processo che lo estrae e registrato nell'indice appena pronto.
+    Avanzamento in 'done'/'failed'/'total'; cancel() smette di inviare PDF al pool e
+    quelli non elaborati restano in attesa per il prossimo avvio.
+    """
+
+    def __init__(self, base_path, workers=2, window=None):
+        self.base_path = base_path
+        self.workers = max(1, workers)
+        self.window = window or self.workers * 4
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Avvia il job se ci sono TXT da estrarre; restituisce il numero di PDF in attesa."""
+        with ChangesIndex(self.base_path) as index:
+            self.total = len(index.pending_texts())
+        if self.total:
+            self._thread = threading.Thread(target=self.run, name="text-backfill", daemon=True)
+            self._thread.start()
+        return self.total
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        with ChangesIndex(self.base_path) as index:
+            pending = index.pending_texts()
+            self.total = len(pending)
+            # Più versioni possono puntare allo stesso blob PDF: una sola estrazione per blob,
+            # altrimenti i processi scriverebbero insieme lo stesso TXT
+            groups = {}
+            for item in pending:
+                groups.setdefault(item[3] or (item[0], item[1]), []).append(item)
+            queued = iter(groups.values())
+            in_flight = {}  # future -> (versioni in attesa, TXT)
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+            try:
+                while True:
+                    while not self.cancelled and len(in_flight) < self.window:
+                        group = next(queued, None)
+                        if group is None:
+                            break
+                        pdf_file, txt_file = index.text_paths(group[0])
+                        in_flight[pool.submit(extract_text_to_file, pdf_file, txt_file)] = (group, txt_file)
+                    if self.cancelled:
+                        for future in [f for f in in_flight if f.cancel()]:
+                            del in_flight[future]
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        (item, *duplicates), txt_file = in_flight.pop(future)
+                        try:
+                            future.result()
+                            index.mark_text_ready(item, txt_file, duplicates)
+                            self.done += 1 + len(duplicates)
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            index.mark_text_failed(item, duplicates)
+                            self.failed += 1 + len(duplicates)
+                            logging.error(f"Errore nell'estrazione/scrittura di {item[1]}: {e}")
+            except Exception as e:
+                logging.error(f"[CHANGES] Estrazione dei testi interrotta: {e}")
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+                index.sync_written_watermarks()
+        logging.info(f"[CHANGES] Testi estratti: {self.done}/{self.total}, errori: {self.failed}"
+                     f"{' (annullato)' if self.cancelled else ''}")
+
+
+def build_changes_index(base_path):
+    """
+    Aggiorna l'indice incrementale delle versioni (vedi ChangesIndex).
+    Restituisce il numero di cartelle nuove o modificate rilette.
+    """
+    with ChangesIndex(base_path) as index:
+        scanned = index.refresh()
+    logging.info(f"[CHANGES] Indice versioni aggiornato: {scanned} cartelle rilette")
+    return scanned
+
+
+def load_changes_index(base_path):
+    """Versioni per pagina dall'indice (dict vuoto se l'indice non è ancora stato costruito)."""
+    if not os.path.exists(os.path.join(base_path, "changes", "changes.db")):
+        return {}
+    with ChangesIndex(base_path) as index:
+        return index.versions()
+
+
+class PdfRenderCache:
+    """
+    Cache di rendering per VersioNice:
+    - documenti fitz aperti, LRU per numero ('max_documents');
+    - pagine renderizzate (immagini RGB), LRU con un budget di memoria ('max_bytes'),
+      con chiave (identità del file, pagina, zoom).
+    L'identità di un blob dell'archivio è il suo SHA256 (il contenuto non cambia mai);
+    per gli altri file è percorso, mtime e dimensione.
+
+    Un thread in background pre-renderizza le pagine chieste con prefetch(): vale solo
+    l'ultima richiesta, quelle vecchie vengono scartate. Tutto l'accesso a fitz passa da
+    un lock, perché un fitz.Document non va usato da due thread insieme.
+    """
+
+    BLOB_NAME = re.compile(r"[0-9a-f]{64}\.pdf")
+
+    def __init__(self, max_bytes=256 * 2 ** 20, max_documents=4):
+        self.max_bytes = max_bytes
+        self.max_documents = max_documents
+        self._docs = OrderedDict()    # chiave file -> (fitz.Document, dimensioni pagine)
+        self._pages = OrderedDict()   # (chiave file, pagina, zoom) -> PIL.Image
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._prefetch_cond = threading.Condition()
+        self._prefetch_queue = []     # (percorso, pagina, zoom)
+        self._prefetch_thread = None
+
+    def file_key(self, path):
+        name = os.path.basename(path)
+        if self.BLOB_NAME.fullmatch(name):
+            return name[:-len(".pdf")]
+        st = os.stat(path)
+        return f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}"
+
+    def _document(self, key, path):
+        entry = self._docs.get(key)
+        if entry is None:
+            doc = fitz.open(path)
+            entry = (doc, [(page.rect.width, page.rect.height) for page in doc])
+            self._docs[key] = entry
+            while len(self._docs) > self.max_documents:
+                old_key, (old_doc, sizes) = self._docs.popitem(last=False)
+                old_doc.close()
+        self._docs.move_to_end(key)
+        return entry
+
+    def page_sizes(self, path):
+        """Dimensioni (in punti) delle pagine del PDF."""
+        with self._lock:
+            return self._document(self.file_key(path), path)[1]
+
+    def page_image(self, path, number, zoom):
+        """Pagina 'number' renderizzata allo zoom dato (dalla cache se presente)."""
+        with self._lock:
+            return self._page_image(self.file_key(path), path, number, round(zoom, 3))
+
+    def _page_image(self, key, path, number, zoom):
+        cache_key = (key, number, zoom)
+        image = self._pages.get(cache_key)
+        if image is not None:
+            self._pages.move_to_end(cache_key)
+            return image
+
+        doc = self._document(key, path)[0]
+        pix = doc.load_page(number).get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+        self._pages[cache_key] = image
+        self._bytes += image.width * image.height * 3
+        while self._bytes > self.max_bytes and len(self._pages) > 1:
+            old_key, old_image = self._pages.popitem(last=False)
+            self._bytes -= old_image.width * old_image.height * 3
+        return image
+
+    def prefetch(self, path, numbers, zoom):
+        """Chiede il rendering in background di 'numbers' (sostituisce le richieste precedenti)."""
+        with self._prefetch_cond:
+            self._prefetch_queue = [(path, number, zoom) for number in numbers]
+            if self._prefetch_thread is None:
+                self._prefetch_thread = threading.Thread(target=self._prefetch_loop, name="pdf-prefetch", daemon=True)
+                self._prefetch_thread.start()
+            self._prefetch_cond.notify()
+
+    def _prefetch_loop(self):
+        while True:
+            with self._prefetch_cond:
+                while not self._prefetch_queue:
+                    self._prefetch_cond.wait()
+                path, number, zoom = self._prefetch_queue.pop(0)
+            try:
+                self.page_image(path, number, zoom)
+            except Exception as e:
+                logging.debug(f"[PDF] Prefetch della pagina {number} di {path} non riuscito: {e}")
 
-                url = os.path.basename(file).replace(".pdf", "")
-                country = os.path.basename(os.path.dirname(root))
+    def clear(self):
+        with self._lock:
+            for doc, sizes in self._docs.values():
+                doc.close()
+            self._docs.clear()
+            self._pages.clear()
+            self._bytes = 0
 
-                if url not in output:
-                    output[url] = {"country": country, "versions": []}
 
-                output[url]["versions"].append({
-                    "timestamp": timestamp,
-                    "pdf_path": relative_pdf,
-                    "txt_path": txt_path
-                })
+class PdfPageViewer:
+    """
+    Visualizzatore PDF virtualizzato su un tk.Canvas: l'area di scorrimento ha l'altezza
+    di tutto il documento (pagine segnate da riquadri vuoti), ma vengono renderizzate solo
+    le pagine che intersecano la parte visibile, più 'margin' pagine sopra e sotto.
+    Le pagine che escono dalla finestra vengono rimosse dal canvas.
+
+    Documenti e pagine renderizzate vengono da una PdfRenderCache: tornare a una versione
+    o a uno zoom già visti non rifà il rendering, e le 'prefetch' pagine oltre la finestra
+    vengono preparate in background.
+    """
+
+    GAP = 10  # pixel tra una pagina e l'altra
 
-    output_path = os.path.join(changes_dir, "changes.json")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    def __init__(self, canvas, scrollbar_y, cache=None, margin=1, prefetch=2):
+        self.canvas = canvas
+        self.scrollbar_y = scrollbar_y
+        self.cache = cache or PdfRenderCache()
+        self.margin = margin
+        self.prefetch = prefetch
+        self.path = None
+        self.zoom = 1.0
+        self.page_sizes = []   # (larghezza, altezza) in punti PDF
+        self.offsets = []      # y di ogni pagina sul canvas allo zoom corrente
+        self.rendered = {}     # pagina -> (id sul canvas, PhotoImage)
+        self.render_pending = False
+        self.canvas.config(yscrollcommand=self._on_scroll)
+        self.canvas.bind("<Configure>", lambda event: self._schedule_render(), add="+")
+
+    def open(self, path, zoom=None):
+        """Apre il PDF 'path' e mostra la prima pagina."""
+        self.close()
+        self.page_sizes = self.cache.page_sizes(path)
+        self.path = path
+        self.set_zoom(self.zoom if zoom is None else zoom, keep_position=False)
+
+    def close(self):
+        self._evict(set(self.rendered))
+        self.canvas.delete("all")
+        self.path = None
+        self.page_sizes = []
+        self.offsets = []
+
+    def set_zoom(self, zoom, keep_position=True):
+        """Ridispone le pagine al nuovo zoom mantenendo (in proporzione) la posizione."""
+        top = self.canvas.yview()[0] if keep_position else 0.0
+        self.zoom = zoom
+        self._evict(set(self.rendered))
+        self.canvas.delete("all")
+
+        self.offsets = []
+        y = 0
+        width = 0
+        for number, (page_width, page_height) in enumerate(self.page_sizes):
+            self.offsets.append(y)
+            w, h = round(page_width * zoom), round(page_height * zoom)
+            self.canvas.create_rectangle(0, y, w, y + h, outline="#cccccc", tags=("placeholder",))
+            y += h + self.GAP
+            width = max(width, w)
+        self.canvas.config(scrollregion=(0, 0, width, max(0, y - self.GAP)))
+        self.canvas.yview_moveto(top)
+        self._schedule_render()
+
+    def show_page(self, page_number):
+        """Porta la pagina 'page_number' in cima alla parte visibile."""
+        if not self.offsets:
+            return 0
+        page_number = max(0, min(page_number, len(self.offsets) - 1))
+        total = self.offsets[-1] + round(self.page_sizes[-1][1] * self.zoom)
+        self.canvas.yview_moveto(self.offsets[page_number] / max(1, total))
+        self._schedule_render()
+        return page_number
+
+    def current_page(self):
+        """Pagina in cima alla parte visibile."""
+        if not self.offsets:
+            return 0
+        return max(0, bisect.bisect_right(self.offsets, self.canvas.canvasy(0)) - 1)
+
+    def visible_pages(self):
+        """Pagine che intersecano la parte visibile, allargata di 'margin' pagine."""
+        if not self.offsets:
+            return range(0)
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        first = max(0, bisect.bisect_right(self.offsets, top) - 1 - self.margin)
+        last = min(len(self.offsets), bisect.bisect_right(self.offsets, bottom) + self.margin)
+        return range(first, last)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar_y.set(first, last)
+        self._schedule_render()
+
+    def _schedule_render(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.canvas.after_idle(self._render)
+
+    def _render(self):
+        self.render_pending = False
+        if self.path is None:
+            return
+        visible = self.visible_pages()
+        wanted = set(visible)
+        self._evict(set(self.rendered) - wanted)
+        for number in sorted(wanted - set(self.rendered)):
+            image = ImageTk.PhotoImage(self.cache.page_image(self.path, number, self.zoom))
+            item = self.canvas.create_image(0, self.offsets[number], anchor="nw", image=image)
+            self.rendered[number] = (item, image)
+
+        # Pagine appena fuori dalla finestra: prima quelle sotto (si scorre più spesso in giù)
+        below = range(visible.stop, min(len(self.offsets), visible.stop + self.prefetch))
+        above = range(max(0, visible.start - self.prefetch), visible.start)
+        if below or above:
+            self.cache.prefetch(self.path, list(below) + list(reversed(above)), self.zoom)
+
+    def _evict(self, pages):
+        for number in pages:
+            item, image = self.rendered.pop(number)
+            self.canvas.delete(item)
 
 
 class App:
@@ -1874,6 +4978,7 @@ class App:
             'button_browse_csv': "browse",
             'button_browse_save': "browse",
             'checkbox_force_download': "force_download_pdf_if_date_missing_or_unchanged",
+            'checkbox_resume_run': "resume_interrupted_run",
             'checkbox_debug_mode': "open_chrome_in_debug_mode",
             'button_add_record': "add_record",
             'button_remove_record': "remove_record",
@@ -1886,6 +4991,12 @@ class App:
             if widget:
                 widget.config(text=self.locale.get(locale_key, f"[{locale_key}]"))
 
+        # Filtri delle tabelle virtualizzate (Tab 1 e Tab 2)
+        for table_name in ('csv_table', 'progress_table'):
+            table = getattr(self, table_name, None)
+            if isinstance(table, VirtualTreeview):
+                table.filter_label.config(text=self.locale.get("filter_rows", "Filtro:"))
+
         # TAB 1 — CSV Table
         if hasattr(self, 'progress_table'):
             for col_id in self.progress_table["columns"]:
@@ -1955,6 +5066,10 @@ class App:
         # ✅ TAB 4 – Bottone "Aggiorna stato"
         if hasattr(self, 'update_versions_btn'):
             self.update_versions_btn.config(text=self.locale.get("update_state", "Aggiorna stato"))
+        if hasattr(self, 'cancel_backfill_btn'):
+            self.cancel_backfill_btn.config(text=self.locale.get("cancel_text_backfill", "Annulla estrazione testi"))
+        if hasattr(self, 'diff_view'):
+            self.diff_view.locale = self.locale
 
         # ✅ TAB 4 – Treeview header
         if hasattr(self, 'versions_tree'):
@@ -2019,6 +5134,15 @@ class App:
         )
         self.checkbox_force_download.pack(anchor="w", pady=5)
 
+        # Checkbox per riprendere l'ultima esecuzione interrotta
+        self.resume_run_var = tk.BooleanVar(value=self.config.get("resume_run", False))
+        self.checkbox_resume_run = tk.Checkbutton(
+            content_frame,
+            text=self.locale.get("resume_interrupted_run", "Riprendi l'ultima esecuzione interrotta"),
+            variable=self.resume_run_var
+        )
+        self.checkbox_resume_run.pack(anchor="w", pady=5)
+
         self.label_pdf_mode = tk.Label(
             content_frame,
             text=self.locale.get("pdf_mode", "Modalità PDF")
@@ -2061,10 +5185,11 @@ class App:
     
         # Inizializza tabella vuota (verrà popolata da load_csv)
         self.csv_columns = []
-        self.csv_table = build_treeview(
+        self.csv_table = VirtualTreeview(
             parent=self.csv_table_frame,
             columns=[],
-            locale=self.locale
+            locale=self.locale,
+            filter_label=self.locale.get("filter_rows", "Filtro:")
         )
 
         # Abilita il drag and drop su csv_table
@@ -2117,9 +5242,6 @@ class App:
             return
 
         from urllib.parse import urlparse
-        from selenium import webdriver
-        from selenium.webdriver.chrome.service import Service
-        from selenium.webdriver.chrome.options import Options
 
         # Recupera directory con timestamp dal file CSV più recente
         output_dir_csv = self.config.get("output_csv_path")
@@ -2140,146 +5262,133 @@ class App:
         if not os.path.exists(output_dir_with_timestamp):
             os.makedirs(output_dir_with_timestamp, exist_ok=True)
 
-        for item_id in selected:
-            row_values = self.progress_table.item(item_id, "values")
-            record = {
-                "Url": row_values[0],
-                "Nome Nazione": row_values[1],
-                "Data Ultimo Aggiornamento": row_values[2]
-            }
-
-            parsed_url = urlparse(record["Url"])
-            domain = parsed_url.netloc.replace("www.", "")
-            site_configs = load_config().get("sites", {})
-            site_config = site_configs.get(domain)
-
-            if not site_config:
-                messagebox.showerror(
-                    self.locale.get("error", "Errore"),
-                    f"{self.locale.get('config_not_found_for_domain', 'Nessuna configurazione trovata per il dominio')}: {domain}"
-                )
-                continue
+        store = SignatureStore(get_signature_store_path())
+        artifacts = ArtifactStore(self.config.get("html_save_path") or output_dir_csv,
+                                  self.config.get("artifact_links", True))
+        manifest = RunManifest(output_dir_with_timestamp)
+        csv_updates = {}  # Url -> nuova data, applicate all'output CSV in un solo passaggio
+        with shared_driver_pool(self.config) as pool:
+            for item_id in selected:
+                row_values = self.progress_table.item(item_id, "values")
+                record = {
+                    "Url": row_values[0],
+                    "Nome Nazione": row_values[1],
+                    "Data Ultimo Aggiornamento": row_values[2]
+                }
+
+                parsed_url = urlparse(record["Url"])
+                domain = parsed_url.netloc.replace("www.", "")
+                site_configs = load_config().get("sites", {})
+                site_config = site_configs.get(domain)
+
+                if not site_config:
+                    messagebox.showerror(
+                        self.locale.get("error", "Errore"),
+                        f"{self.locale.get('config_not_found_for_domain', 'Nessuna configurazione trovata per il dominio')}: {domain}"
+                    )
+                    continue
 
-            try:
-                options = Options()
-                options.add_argument("--headless")
-                options.add_argument("--disable-gpu")
-                options.add_argument("--disable-dev-shm-usage")
-                options.add_argument("--window-size=1920,1080")
-                options.add_argument("--disable-blink-features=AutomationControlled")
-                options.add_argument("--disable-javascript")
-                driver = webdriver.Chrome(
-                    service=Service(os.path.join(get_base_dir(), "chromedriver.exe")),
-                    options=options
-                )
+                try:
+                    status = ""
+                    started = time.monotonic()
+                    current_signature = record["Data Ultimo Aggiornamento"]
 
-                driver.get(record["Url"])
-                time.sleep(self.config.get("timeout", 5))
+                    update_method = site_config.get("update_method", "date")
+                    filename_base = record["Url"].split('/')[-1].split('?')[0].split('#')[0]
+                    pdf_filename = os.path.join(
+                        output_dir_with_timestamp,
+                        sanitize_filename(f"{record['Nome Nazione']}_{domain}.pdf")
+                    )
 
-                status = ""
-                current_signature = record["Data Ultimo Aggiornamento"]
+                    text_store = DeferredSemanticText(store.semantic_text(record["Url"], filename_base))
 
-                update_method = site_config.get("update_method", "date")
+                    # Rilevamento e stampa PDF sulla stessa pagina caricata
+                    with pool.driver() as driver:
+                        load_page(driver, record["Url"], self.config.get("timeout", 5), site_config)
 
-                do_reprocess = False
-                if update_method == "detection":
-                    changed, new_signature, reason, similarity = detect_page_change(
-                        driver, site_config, current_signature
-                    )
-                    record["Data Ultimo Aggiornamento"] = new_signature
-                    do_reprocess = changed or self.force_download_var.get()
-                elif update_method in ("semantic", "both"):
-                    changed, new_signature, reason, similarity = detect_page_change(
-                        driver, site_config, current_signature, method=update_method
-                    )
-                    record["Data Ultimo Aggiornamento"] = new_signature
-                    do_reprocess = changed or self.force_download_var.get()
-                else:
-                    new_date = extract_date(driver, site_config)
-                    if new_date in [
-                        self.locale.get("date_not_found", "DATE_NOT_FOUND"),
-                        self.locale.get("date_not_parsed", "DATE_NOT_PARSED")
-                    ]:
-                        status = self.locale.get("date_extraction_error", "Errore nella lettura della data")
                         do_reprocess = False
+                        if update_method in ("detection", "semantic", "both"):
+                            changed, new_signature, reason, similarity = detect_page_change(
+                                driver, site_config, current_signature, filename_base,
+                                text_store=text_store
+                            )
+                            record["Data Ultimo Aggiornamento"] = new_signature
+                            do_reprocess = changed or self.force_download_var.get()
+                        else:
+                            new_date = extract_date(driver, site_config)
+                            if new_date in [
+                                self.locale.get("date_not_found", "DATE_NOT_FOUND"),
+                                self.locale.get("date_not_parsed", "DATE_NOT_PARSED")
+                            ]:
+                                status = self.locale.get("date_extraction_error", "Errore nella lettura della data")
+                                do_reprocess = False
+                            else:
+                                new_date_str = new_date.strftime("%Y-%m-%d %H:%M:%S")
+                                record["Data Ultimo Aggiornamento"] = new_date_str
+                                do_reprocess = (new_date_str != current_signature) or self.force_download_var.get()
+
+                        saved = print_page_to_pdf(
+                            driver,
+                            record["Url"],
+                            pdf_filename,
+                            debug_mode=self.config.get("debug_mode", False)
+                        ) if do_reprocess else None
+
+                    capture_failed = False
+                    if do_reprocess:
+                        if saved and finalize_pdf(saved.path, pdf_filename, self.config):
+                            status = self.locale.get("updated_and_pdf_saved", "Aggiornato e PDF salvato")
+                            try:
+                                artifacts.archive(manifest, record["Url"], record["Nome Nazione"], pdf_filename)
+                            except Exception as e:
+                                logging.error(f"[ARCHIVE] Archiviazione non riuscita per {pdf_filename}: {e}")
+                        else:
+                            status = self.locale.get("pdf_error", "Errore PDF")
+                            capture_failed = True
                     else:
-                        new_date_str = new_date.strftime("%Y-%m-%d %H:%M:%S")
-                        record["Data Ultimo Aggiornamento"] = new_date_str
-                        do_reprocess = (new_date_str != current_signature) or self.force_download_var.get()
+                        if not status:
+                            status = self.locale.get("no_update_needed", "Nessun aggiornamento necessario")
 
-                if do_reprocess:
-                    pdf_filename = os.path.join(
-                        output_dir_with_timestamp,
-                        sanitize_filename(f"{record['Nome Nazione']}_{domain}.pdf")
-                    )
-                    saved = save_page_as_pdf_with_selenium(
+                    if capture_failed:
+                        # Come in process_pages: senza PDF restano firma e testo precedenti
+                        record["Data Ultimo Aggiornamento"] = current_signature
+                    else:
+                        text_store.commit()
+
+                    store.record_result(
                         record["Url"],
-                        pdf_filename,
-                        self.config["timeout"],
-                        debug_mode=self.config.get("debug_mode", False),
-                        log_file=self.config["log_file"]
+                        "detection" if update_method in ("detection", "semantic", "both") else "date",
+                        None if capture_failed else record["Data Ultimo Aggiornamento"], status,
+                        time.monotonic() - started,
+                        changed=record["Data Ultimo Aggiornamento"] != current_signature and do_reprocess
                     )
-                    if saved:
-                        try:
-                            extracted_text = extract_text_from_pdf(pdf_filename)
-                            txt_output_path = pdf_filename.replace(".pdf", ".txt")
-                            with open(txt_output_path, "w", encoding="utf-8") as f:
-                                f.write(extracted_text)
-                            logging.info(f"[TXT] Creato file testo: {txt_output_path}")
-                        except Exception as e:
-                            logging.warning(f"[TXT] Errore durante salvataggio del TXT per {pdf_filename}: {e}")
-
-                        if self.config.get("pdf_mode", "with_links") == "no_links":
-                            sanitize_pdf_links(pdf_filename)
-                        elif self.config.get("pdf_mode", "image"):
-                            logging.info(f"[RASTER] Modalità 'PDF immagine' attiva per: {pdf_filename}")
-                            image_paths = convert_pdf_to_images_fitz(pdf_filename)
-                            if image_paths:
-                                replace_pdf_with_images_fitz(pdf_filename, image_paths)
-                            else:
-                                logging.warning(f"[RASTER] Conversione PDF→immagine fallita, file originale mantenuto: {pdf_filename}")
 
-                        status = self.locale.get("updated_and_pdf_saved", "Aggiornato e PDF salvato")
-                    else:
-                        status = self.locale.get("pdf_error", "Errore PDF")
-                else:
-                    if not status:
-                        status = self.locale.get("no_update_needed", "Nessun aggiornamento necessario")
-
-                driver.quit()
-
-                self.progress_table.item(item_id, values=(
-                    record["Url"],
-                    record["Nome Nazione"],
-                    record["Data Ultimo Aggiornamento"],
-                    status
-                ))
-
-                if output_files:
-                    output_path = os.path.join(output_dir_csv, output_files[0])
-                    with open(output_path, "r", encoding="utf-8") as f:
-                        reader = list(csv.reader(f, delimiter=';'))
-                        headers = reader[0]
-                        rows = reader[1:]
-
-                    url_index = headers.index(self.locale.get("url", "Url"))
-                    date_index = headers.index(self.locale.get("last_updated_date", "Data Ultimo Aggiornamento"))
-
-                    for i, row in enumerate(rows):
-                        if row[url_index].strip() == record["Url"]:
-                            rows[i][date_index] = record["Data Ultimo Aggiornamento"]
-                            break
+                    self.progress_table.item(item_id, values=(
+                        record["Url"],
+                        record["Nome Nazione"],
+                        record["Data Ultimo Aggiornamento"],
+                        status
+                    ))
 
-                    with open(output_path, "w", encoding="utf-8", newline="") as f:
-                        writer = csv.writer(f, delimiter=';')
-                        writer.writerow(headers)
-                        writer.writerows(rows)
+                    csv_updates[record["Url"]] = record["Data Ultimo Aggiornamento"]
 
+                except Exception as e:
+                    logging.error(f"Errore durante la rielaborazione per {record['Url']}: {e}")
+                    messagebox.showerror(
+                        self.locale.get("error", "Errore"),
+                        f"{self.locale.get('error_during_process_e', 'Errore durante il processo')}: {e}")
+        manifest.close()
+        store.close()
+
+        # Colonne posizionali come in process_pages: 0 = Url, 3 = Data Ultimo Aggiornamento
+        if csv_updates:
+            output_path = os.path.join(output_dir_csv, output_files[0])
+            try:
+                patched = patch_csv_rows(output_path, csv_updates)
+                logging.info(f"[CSV] {patched} righe aggiornate in {output_path}")
             except Exception as e:
-                logging.error(f"Errore durante la rielaborazione per {record['Url']}: {e}")
-                messagebox.showerror(
-                    self.locale.get("error", "Errore"),
-                    f"{self.locale.get('error_during_process_e', 'Errore durante il processo')}: {e}")
+                logging.error(f"Errore durante l'aggiornamento di {output_path}: {e}")
+                messagebox.showerror(self.locale.get("error", "Errore"), f"{output_path}: {e}")
 
 
     def on_language_change(self, event=None):
@@ -2308,29 +5417,21 @@ class App:
         try:
             with open(path, newline='', encoding='utf-8') as csvfile:
                 reader = csv.reader(csvfile, delimiter=';')
-                rows = list(reader)
-    
-            if not rows:
-                messagebox.showwarning("CSV vuoto", "Il file CSV è vuoto.")
-                return
+                headers = next(reader, None)
     
-            headers = rows[0]
-            self.csv_columns = headers
+                if not headers:
+                    messagebox.showwarning("CSV vuoto", "Il file CSV è vuoto.")
+                    return
     
-            # Cancella contenuto esistente
-            for col in self.csv_table["columns"]:
-                self.csv_table.heading(col, text="")  # reset intestazioni
-            self.csv_table.delete(*self.csv_table.get_children())
+                self.csv_columns = headers
     
-            # Aggiorna colonne
-            self.csv_table["columns"] = headers
-            for col in headers:
-                self.csv_table.heading(col, text=col)
-                self.csv_table.column(col, width=120)
+                # Aggiorna colonne
+                self.csv_table.set_columns(headers)
+                for col in headers:
+                    self.csv_table.column(col, width=120)
     
-            # Aggiungi righe
-            for row in rows[1:]:
-                self.csv_table.insert("", "end", values=row)
+                # Le righe vanno direttamente nel modello: il Treeview mostra solo quelle visibili
+                self.csv_table.load(reader)
     
             # Salva il percorso attuale
             self.csv_path = path
@@ -2428,11 +5529,12 @@ class App:
         self.progress_table_frame.pack(fill="both", expand=True, padx=10, pady=10)
     
         columns = ["url", "country", "last_updated", "status"]
-        self.progress_table = build_treeview(
+        self.progress_table = VirtualTreeview(
             self.progress_table_frame,
             columns=columns,
             locale=self.locale,
-            locale_keys=columns
+            locale_keys=columns,
+            filter_label=self.locale.get("filter_rows", "Filtro:")
         )
     
     def start_process(self):
@@ -2445,15 +5547,24 @@ class App:
         self.config["html_save_path"] = self.save_path_var.get()
         self.config["timeout"] = self.timeout_var.get()
         self.config["force_download"] = self.force_download_var.get()
+        self.config["resume_run"] = self.resume_run_var.get()
     
         self.pause_event = threading.Event()
         self.pause_event.set()
         self.stop_event = threading.Event()
     
+        # I widget si aggiornano solo dal mainloop: il thread accoda gli eventi
+        sink = QueuedProgressSink(
+            TkProgressSink(self.progress_table, self.progress_bar, self.progress_count, self.locale),
+            self.root
+        )
+        sink.start()
+
         def wrapped_process():
             try:
-                self.run_process_pages(self.pause_event, self.stop_event)
+                self.run_process_pages(self.pause_event, self.stop_event, sink)
             finally:
+                sink.close()
                 logging.info(locale.get("process_ended_stopping_video", "Processo terminato. Fermiamo il video."))
                 self.video_player.stop()
     
@@ -2703,7 +5814,9 @@ class App:
                         messagebox.showerror("Errore", f"Errore nel parsing del campo 'Day Translations' per il sito {site}:\n{e}")
                         continue
     
+                    # Conserva le opzioni del sito non esposte nella tabella (es. max_concurrency)
                     sites_config[site] = {
+                        **original_config.get("sites", {}).get(site, {}),
                         "update_method": method,
                         "date_selector": selector,
                         "date_format": date_format,
@@ -2781,8 +5894,8 @@ class App:
                 writer = csv.writer(file, delimiter=';')
                 writer.writerow(localized_columns)  # Intestazioni localizzate
     
-                for item in self.csv_table.get_children():
-                    values = list(self.csv_table.item(item)["values"])
+                # Tutte le righe del modello, anche quelle nascoste dal filtro
+                for values in self.csv_table.all_values():
                     writer.writerow(values)
     
             messagebox.showinfo("Success", self.locale.get("csv_saved_successfully!", "CSV salvato con successo!"))
@@ -2793,13 +5906,14 @@ class App:
 
     def add_record(self):
         """Aggiunge una riga vuota alla tabella."""
-        self.csv_table.insert("", "end", values=[""] * len(self.csv_columns))
+        item_id = self.csv_table.insert("", "end", values=[""] * len(self.csv_columns))
+        self.csv_table.see(item_id)
 
     def remove_selected_record(self):
         """Rimuove la riga selezionata dalla tabella."""
         selected_item = self.csv_table.selection()
         if selected_item:
-            self.csv_table.delete(selected_item)
+            self.csv_table.delete(*selected_item)
 
 
     def add_site_row(self):
@@ -2886,7 +6000,7 @@ class App:
 
   
 
-    def run_process_pages(self, pause_event=None, stop_event=None):
+    def run_process_pages(self, pause_event=None, stop_event=None, sink=None):
         try:
             process_pages(
                 config=self.config,
@@ -2895,7 +6009,8 @@ class App:
                 progress_count=self.progress_count,
                 locale=self.locale,
                 pause_event=pause_event,
-                stop_event=stop_event
+                stop_event=stop_event,
+                sink=sink
             )
         except Exception as e:
             logging.error(locale.get("error_during_process_e", "Error during process: {e}").format(e=e))
@@ -3136,6 +6251,18 @@ class App:
             command=self.aggiorna_stato_versioni
         )
         self.update_versions_btn.pack(side="left")
+
+        # Estrazione in background dei testi mancanti (vedi TextBackfillJob)
+        self.text_backfill = None
+        self.cancel_backfill_btn = tk.Button(
+            top_frame,
+            text=self.locale.get("cancel_text_backfill", "Annulla estrazione testi"),
+            command=self.annulla_estrazione_testi,
+            state="disabled"
+        )
+        self.cancel_backfill_btn.pack(side="left", padx=5)
+        self.text_backfill_label = tk.Label(top_frame, text="")
+        self.text_backfill_label.pack(side="left", padx=5)
     
         center_frame = ttk.Frame(self.tab4)
         center_frame.pack(fill="both", expand=True, padx=10, pady=5)
@@ -3180,6 +6307,10 @@ class App:
         canvas_frame.grid_columnconfigure(0, weight=1)
     
         self.pdf_viewer_canvas.config(yscrollcommand=self.pdf_scroll_y.set, xscrollcommand=self.pdf_scroll_x.set)
+        # Solo le pagine visibili vengono renderizzate (vedi PdfPageViewer), con cache condivisa
+        self.pdf_viewer = PdfPageViewer(
+            self.pdf_viewer_canvas, self.pdf_scroll_y,
+            cache=PdfRenderCache(max_bytes=self.config.get("pdf_cache_mb", 256) * 2 ** 20))
     
 
         # Frame dedicato al box di testo + scrollbar (colonna destra)
@@ -3191,7 +6322,7 @@ class App:
         
         scrollbar = ttk.Scrollbar(right_frame, command=self.text_diff_box.yview)
         scrollbar.pack(side="right", fill="y")
-        self.text_diff_box.config(yscrollcommand=scrollbar.set)    
+        self.diff_view = DiffView(self.text_diff_box, scrollbar, locale=self.locale)
         self.pdf_zoom = 1.0
         self.versione_corrente_pdf = None
     
@@ -3237,25 +6368,61 @@ class App:
 
     def aggiorna_stato_versioni(self):
         try:
+            if self.text_backfill and self.text_backfill.is_alive():
+                messagebox.showinfo(
+                    self.locale.get("update_state", "Aggiorna stato"),
+                    self.locale.get("text_backfill_running", "Estrazione dei testi in corso: attendere o annullare.")
+                )
+                return
+
             base_path = self.save_path_var.get()
-            build_changes_index(base_path)
+            scanned = build_changes_index(base_path)
+            self.carica_treeview_versioni(base_path)
+
+            # I PDF senza TXT vengono elaborati in background, la GUI resta utilizzabile
+            self.text_backfill = TextBackfillJob(base_path, workers=self.config.get("index_text_workers", 2))
+            if self.text_backfill.start():
+                self.update_versions_btn.config(state="disabled")
+                self.cancel_backfill_btn.config(state="normal")
+                self.aggiorna_avanzamento_testi()
 
             messagebox.showinfo(
                 self.locale.get("update_complete", "Aggiornamento completato"),
-                self.locale.get("changes_json_created", "File changes.json aggiornato.")
+                self.locale.get("changes_index_updated", "Indice delle versioni aggiornato: {count} cartelle nuove o modificate.").format(count=scanned)
             )
 
-            self.carica_treeview_versioni(base_path)
-
         except Exception as e:
             messagebox.showerror(self.locale.get("error_title", "Errore"), str(e))
 
+    def aggiorna_avanzamento_testi(self):
+        job = self.text_backfill
+        self.text_backfill_label.config(text=self.locale.get(
+            "text_backfill_progress", "Estrazione testi: {done}/{total} (errori: {failed})"
+        ).format(done=job.done, total=job.total, failed=job.failed))
+        if job.is_alive():
+            self.root.after(500, self.aggiorna_avanzamento_testi)
+            return
+        # Job terminato (o annullato): le nuove versioni entrano nell'albero
+        self.update_versions_btn.config(state="normal")
+        self.cancel_backfill_btn.config(state="disabled")
+        if job.cancelled:
+            self.text_backfill_label.config(text=self.locale.get(
+                "text_backfill_cancelled", "Estrazione testi annullata: {done}/{total}").format(done=job.done, total=job.total))
+        self.carica_treeview_versioni(job.base_path)
+
+    def annulla_estrazione_testi(self):
+        if self.text_backfill and self.text_backfill.is_alive():
+            self.text_backfill.cancel()
+            self.cancel_backfill_btn.config(state="disabled")
+
     def carica_treeview_versioni(self, base_path):
+        data = load_changes_index(base_path)
         changes_path = os.path.join(base_path, "changes", "changes.json")
-        if os.path.exists(changes_path):
+        if not data and os.path.exists(changes_path):
+            # Indice delle versioni precedenti a changes.db
             with open(changes_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
-
+        if data:
             self.versions_tree.delete(*self.versions_tree.get_children())
 
             for url, info in data.items():
@@ -3292,9 +6459,6 @@ class App:
             base_dir = self.save_path_var.get()
             full_txt_path = os.path.join(base_dir, relative_txt_path)
     
-            # Reset casella testo
-            self.text_diff_box.delete("1.0", "end")
-    
             # Prova a fare il diff con la versione precedente
             siblings = self.versions_tree.get_children(parent_id)
             idx = siblings.index(item_id)
@@ -3306,8 +6470,7 @@ class App:
                         old_text = f.read()
                     with open(full_txt_path, "r", encoding="utf-8") as f:
                         new_text = f.read()
-                    self.confronta_testi(old_text, new_text)
-                    self.text_diff_box.insert("end", "\n\n--- Versione selezionata completa ---\n\n" + new_text)
+                    self.diff_view.show(old_text, new_text, full_text_title="--- Versione selezionata completa ---")
                 except Exception as e:
                     logging.warning(f"Errore confronto versioni: {e}")
             else:
@@ -3315,7 +6478,7 @@ class App:
                 try:
                     with open(full_txt_path, "r", encoding="utf-8") as f:
                         new_text = f.read()
-                    self.text_diff_box.insert("end", new_text)
+                    self.diff_view.show_text(new_text)
                 except Exception as e:
                     logging.warning(f"Errore caricamento versione: {e}")
 
@@ -3323,54 +6486,14 @@ class App:
 
 
     def visualizza_pdf_pagina(self, relative_path, page_number=0):
-        try:
-            self.pdf_viewer_canvas.delete("all")
-            full_path = os.path.join(self.save_path_var.get(), relative_path)
-            if not relative_path or not self.save_path_var.get():
-                logging.error(locale.get("missing_base_or_relative_pdf_path"))
-
-                return            
-            doc = fitz.open(full_path)
-    
-            if page_number < 0:
-                page_number = 0
-            elif page_number >= len(doc):
-                page_number = len(doc) - 1
-    
-            self.current_pdf_page = page_number
-            self.total_pdf_pages = len(doc)
-    
-            zoom = self.pdf_zoom
-            mat = fitz.Matrix(zoom, zoom)
-            page = doc.load_page(page_number)
-            pix = page.get_pixmap(matrix=mat)
-            img = Image.open(io.BytesIO(pix.tobytes("png")))
-    
-            img_tk = ImageTk.PhotoImage(img)
-            self.pdf_viewer_canvas.image = img_tk
-            self.pdf_viewer_canvas.create_image(0, 0, anchor="nw", image=img_tk)
-            self.pdf_viewer_canvas.config(scrollregion=(0, 0, img.width, img.height))
-    
-        except Exception as e:
-            messagebox.showerror(self.locale.get("error_loading_pdf", "Errore caricamento PDF"), str(e))
-
-
-
-
+        """Mostra il PDF a partire dalla pagina 'page_number'."""
+        self.visualizza_pdf(relative_path)
+        if self.pdf_viewer.path is not None:
+            self.current_pdf_page = self.pdf_viewer.show_page(page_number)
+            self.total_pdf_pages = len(self.pdf_viewer.page_sizes)
 
     def confronta_testi(self, old_text, new_text):
-        self.text_diff_box.delete("1.0", "end")
-        diff = difflib.ndiff(old_text.splitlines(), new_text.splitlines())
-        for line in diff:
-            if line.startswith("  "):
-                self.text_diff_box.insert("end", line[2:] + "\n", ("common",))
-            elif line.startswith("- "):
-                self.text_diff_box.insert("end", line[2:] + "\n", ("removed",))
-            elif line.startswith("+ "):
-                self.text_diff_box.insert("end", line[2:] + "\n", ("added",))
-        self.text_diff_box.tag_config("common", foreground="black")
-        self.text_diff_box.tag_config("removed", foreground="red")
-        self.text_diff_box.tag_config("added", foreground="darkgreen")
+        self.diff_view.show(old_text, new_text)
 
 
     def visualizza_pdf(self, relative_path):
@@ -3379,88 +6502,215 @@ class App:
             if not base_path or not relative_path:
                 logging.error("Percorso base o relativo PDF mancante.")
                 return
-    
-            self.pdf_viewer_canvas.delete("all")
+
             full_path = os.path.join(base_path, relative_path)
-    
-            doc = fitz.open(full_path)
-            zoom = self.pdf_zoom
-            mat = fitz.Matrix(zoom, zoom)
-    
-            images = []
-            total_height = 0
-            max_width = 0
-    
-            for page in doc:
-                pix = page.get_pixmap(matrix=mat)
-                img = Image.open(io.BytesIO(pix.tobytes("png")))
-                images.append(img)
-                total_height += img.height
-                max_width = max(max_width, img.width)
-    
-            combined = Image.new("RGB", (max_width, total_height), "white")
-    
-            y_offset = 0
-            for img in images:
-                combined.paste(img, (0, y_offset))
-                y_offset += img.height
-    
-            img_tk = ImageTk.PhotoImage(combined)
-            self.pdf_viewer_canvas.image = img_tk
-            self.pdf_viewer_canvas.create_image(0, 0, anchor="nw", image=img_tk)
-            self.pdf_viewer_canvas.config(scrollregion=(0, 0, max_width, total_height))
-    
+            if self.pdf_viewer.path == full_path:
+                # Stesso documento (zoom_in/zoom_out): si ridispongono solo le pagine
+                self.pdf_viewer.set_zoom(self.pdf_zoom)
+            else:
+                self.pdf_viewer.open(full_path, zoom=self.pdf_zoom)
+            self.total_pdf_pages = len(self.pdf_viewer.page_sizes)
+
         except Exception as e:
             messagebox.showerror(self.locale.get("error_loading_pdf", "Errore caricamento PDF"), str(e))
 
 
 
-def convert_pdf_to_images_fitz(pdf_path, dpi=150):
+RASTER_DEFAULTS = {
+    "raster_format": "auto",          # auto | jpeg | png (Flate, senza perdita)
+    "raster_jpeg_quality": 85,
+    "raster_flate_level": 1,          # zlib: 1 è ~2,5x più veloce di 6 per un file ~8% più grande
+    "raster_max_pixels": 25_000_000   # tetto per pagina: oltre si riduce la risoluzione
+}
+
+
+def raster_page_is_photographic(pix, sample_rows=32, threshold=0.3):
+    """
+    Stima economica del contenuto della pagina: comprime con zlib una trentina di
+    righe di pixel; se si riducono poco la pagina è fotografica (meglio JPEG),
+    altrimenti è testo/grafica piatta (meglio Flate, senza perdita).
+    """
+    samples = pix.samples_mv
+    step = max(1, pix.height // sample_rows)
+    sample = b"".join(samples[y * pix.stride:(y + 1) * pix.stride] for y in range(0, pix.height, step))
+    return len(zlib.compress(sample, 1)) > len(sample) * threshold
+
+
+def encode_raster_page(pix, options):
+    """
+    Codifica il pixmap RGB di una pagina. Restituisce ("jpeg", byte JPEG) oppure
+    ("flate", campioni compressi con zlib), pronti per essere inseriti nel PDF così come sono.
+    JPEG è codificato da PIL (libjpeg-turbo), molto più veloce dell'encoder di MuPDF.
+    """
+    raster_format = options["raster_format"]
+    if raster_format == "jpeg" or (raster_format == "auto" and raster_page_is_photographic(pix)):
+        image = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=options["raster_jpeg_quality"])
+        return "jpeg", buffer.getvalue()
+    return "flate", zlib.compress(pix.samples_mv, options["raster_flate_level"])
+
+
+def insert_raster_page(doc, page, pixel_size, encoding, data):
+    """Inserisce l'immagine codificata a tutta pagina senza far ricomprimere nulla a MuPDF."""
+    if encoding == "jpeg":
+        page.insert_image(page.rect, stream=data)
+        return
+    width, height = pixel_size
+    xref = doc.get_new_xref()
+    doc.update_object(xref, f"<</Type/XObject/Subtype/Image/Width {width}/Height {height}"
+                            f"/ColorSpace/DeviceRGB/BitsPerComponent 8>>")
+    doc.update_stream(xref, data, new=True, compress=False)
+    # update_stream con compress=False toglie /Filter: va impostato dopo
+    doc.xref_set_key(xref, "Filter", "/FlateDecode")
+    page.insert_image(page.rect, xref=xref)
+
+
+def open_pdf_source(source):
+    """Apre un PDF da percorso oppure da byte in memoria."""
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def iter_raster_pages(source, first, last, dpi, options):
+    """
+    Renderizza e codifica una alla volta le pagine [first, last) del PDF (percorso o byte),
+    aprendolo per conto proprio. Produce (dimensioni pagina in punti, dimensioni in pixel,
+    codifica, byte) per ogni pagina.
+    """
+    with open_pdf_source(source) as src:
+        for number in range(first, last):
+            page = src[number]
+            # Pagine molto grandi: risoluzione ridotta per restare nel tetto di pixel
+            page_dpi = dpi
+            pixels = (page.rect.width * dpi / 72) * (page.rect.height * dpi / 72)
+            if pixels > options["raster_max_pixels"]:
+                page_dpi = max(36, int(dpi * (options["raster_max_pixels"] / pixels) ** 0.5))
+            pix = page.get_pixmap(dpi=page_dpi, alpha=False)
+            encoding, data = encode_raster_page(pix, options)
+            pixel_size = (pix.width, pix.height)
+            pix = None
+            yield (page.rect.width, page.rect.height), pixel_size, encoding, data
+
+
+def rasterize_page_range(source, first, last, dpi, options):
+    """
+    Unità di lavoro dei processi di get_raster_pool: le pagine [first, last) codificate,
+    in una lista da restituire al processo principale.
+    """
+    return list(iter_raster_pages(source, first, last, dpi, options))
+
+
+# === Process pool per la rasterizzazione ===
+_raster_pool = None
+_raster_pool_workers = 0
+_raster_pool_lock = threading.Lock()
+
+RASTER_PARALLEL_MIN_PAGES = 8  # sotto questa soglia avviare i processi costa più del guadagno
+
+
+def get_raster_pool(workers):
+    """ProcessPoolExecutor condiviso da tutte le rasterizzazioni (anche da più thread di crawl)."""
+    global _raster_pool, _raster_pool_workers
+    with _raster_pool_lock:
+        if _raster_pool is None or _raster_pool_workers != workers:
+            if _raster_pool is not None:
+                _raster_pool.shutdown(wait=False)
+            _raster_pool = ProcessPoolExecutor(max_workers=workers)
+            _raster_pool_workers = workers
+        return _raster_pool
+
+
+def shutdown_raster_pool(broken=None):
+    """Chiude il pool; con 'broken' solo se è ancora quello che ha fallito."""
+    global _raster_pool
+    with _raster_pool_lock:
+        if _raster_pool is not None and (broken is None or _raster_pool is broken):
+            _raster_pool.shutdown(wait=False, cancel_futures=True)
+            _raster_pool = None
+
+
+atexit.register(shutdown_raster_pool)
+
+
+def split_page_ranges(page_count, shards):
+    """Divide [0, page_count) in al più 'shards' intervalli contigui di dimensione simile."""
+    shards = max(1, min(shards, page_count))
+    bounds = [page_count * i // shards for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards) if bounds[i] < bounds[i + 1]]
+
+
+def rasterize_pdf_bytes(source, dpi=150, options=None, workers=1):
     """
-    Converte ogni pagina del PDF in una immagine PNG usando PyMuPDF.
-    Restituisce la lista dei file immagine generati.
+    Versione interamente rasterizzata di un PDF (percorso o byte), costruita in memoria.
+
+    Con workers > 1 le pagine vengono divise in intervalli contigui (due per processo,
+    per bilanciare pagine di costo diverso) renderizzati e codificati in parallelo dal
+    process pool; ogni processo apre il documento per conto suo. I risultati vengono
+    uniti nell'ordine delle pagine; le dimensioni delle pagine restano quelle originali.
+    Restituisce (byte del nuovo PDF, numero di pagine), oppure (None, 0) se fallisce.
     """
-    image_paths = []
+    options = {**RASTER_DEFAULTS, **(options or {})}
     try:
-        doc = fitz.open(pdf_path)
-        for i in range(len(doc)):
-            page = doc.load_page(i)
-            pix = page.get_pixmap(dpi=dpi)
-            img_path = f"{os.path.splitext(pdf_path)[0]}_page{i+1}.png"
-            pix.save(img_path)
-            image_paths.append(img_path)
-        doc.close()
-        logging.info(f"[RASTER] {len(image_paths)} pagine convertite in immagini.")
-        return image_paths
+        with open_pdf_source(source) as src:
+            page_count = len(src)
+        if not page_count:
+            logging.warning(locale.get("raster_no_valid_image_original_pdf_retained",
+                                       "[RASTER] Nessuna immagine valida, PDF originale non modificato."))
+            return None, 0
+
+        shards = None
+        if workers > 1 and page_count >= RASTER_PARALLEL_MIN_PAGES:
+            pool = get_raster_pool(workers)
+            try:
+                futures = [pool.submit(rasterize_page_range, source, first, last, dpi, options)
+                           for first, last in split_page_ranges(page_count, workers * 2)]
+                shards = [future.result() for future in futures]
+            except BrokenProcessPool as e:
+                # Un processo è morto (memoria, crash di MuPDF): si ricrea il pool alla prossima
+                logging.warning(f"[RASTER] Process pool non disponibile, rasterizzazione seriale: {e}")
+                shutdown_raster_pool(pool)
+        if shards is None:
+            # Seriale: ogni pagina entra nel documento appena codificata, senza accumularle
+            shards = [iter_raster_pages(source, 0, page_count, dpi, options)]
+
+        with fitz.open() as out:
+            for shard in shards:
+                for page_size, pixel_size, encoding, data in shard:
+                    new_page = out.new_page(width=page_size[0], height=page_size[1])
+                    insert_raster_page(out, new_page, pixel_size, encoding, data)
+            raster_bytes = out.tobytes(garbage=3, deflate=True)
+        logging.info(f"[RASTER] PDF ricreato da immagini ({page_count} pagine, {dpi} dpi, {workers} processi)")
+        return raster_bytes, page_count
     except Exception as e:
-        logging.error(f"[RASTER] Errore durante la conversione PDF in immagini con fitz: {e}")
-        return []
+        logging.error(f"[RASTER] Errore durante la rasterizzazione del PDF con fitz: {e}")
+        return None, 0
 
-def replace_pdf_with_images_fitz(pdf_path, image_paths):
+
+def rasterize_pdf_fitz(pdf_path, dpi=150, options=None, workers=1):
     """
-    Ricostruisce un nuovo PDF interamente rasterizzato da immagini.
-    Sovrascrive il PDF originale.
+    Sostituisce il PDF su disco con la sua versione rasterizzata (vedi rasterize_pdf_bytes),
+    atomicamente. Restituisce il numero di pagine (0 se fallisce).
     """
+    raster_bytes, pages = rasterize_pdf_bytes(pdf_path, dpi, options, workers)
+    if raster_bytes is None:
+        return 0
     try:
-        images = [Image.open(p).convert("RGB") for p in image_paths]
-        if images:
-            images[0].save(pdf_path, save_all=True, append_images=images[1:])
-            logging.info(f"[RASTER] PDF ricreato da immagini: {pdf_path}")
-            # Rimuovi i PNG temporanei
-            for img in image_paths:
-                os.remove(img)
-            try:
-                os.chmod(pdf_path, 0o600)
-            except:
-                pass
-        else:
-            # logging.warning("[RASTER] Nessuna immagine valida, PDF originale non modificato.")
-            logging.warning(locale.get("raster_no_valid_image_original_pdf_retained"))
+        write_file_atomic(pdf_path, raster_bytes)
     except Exception as e:
-        logging.error(f"[RASTER] Errore durante la ricostruzione PDF da immagini: {e}")
+        logging.error(f"[RASTER] Errore durante il salvataggio di {pdf_path}: {e}")
+        return 0
+    try:
+        os.chmod(pdf_path, 0o600)
+    except OSError:
+        pass
+    return pages
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # eseguibile PyInstaller: i processi di rasterizzazione ripartono da qui
+    get_startup_config()  # config.json non valido: errore prima di aprire la finestra
     root = TkinterDnD.Tk()
 #     root = tk.Tk()
     app = App(root)
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Esecuzione senza interfaccia grafica (cron, servizi) del motore di webscraper_NEW.
+
+Uso (dalla cartella code/ o da qualunque directory):
+    python webscraper_cli.py run [--csv FILE] [--output DIR] [--workers N] [--resume] [--force]
+    python webscraper_cli.py daemon --interval 3600 [stesse opzioni]
+
+Avanzamento: --progress text|jsonl|none, --metrics FILE (formato textfile di Prometheus).
+
+Codici di uscita:
+    0  esecuzione completata senza errori sulle righe
+    1  esecuzione completata con righe in errore (vedi errors_*.csv)
+    2  configurazione o CSV di input non validi
+    3  esecuzione interrotta (SIGINT/SIGTERM); riprendibile con --resume
+    4  errore imprevisto
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+EXIT_OK = 0
+EXIT_ROW_ERRORS = 1
+EXIT_CONFIG = 2
+EXIT_STOPPED = 3
+EXIT_FAILURE = 4
+
+
+class TextProgressSink:
+    """Una riga leggibile per ogni URL completato."""
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.total = 0
+
+    def run_started(self, total, run_dir):
+        self.total = total
+        print(f"Esecuzione: {run_dir} ({total} righe)", file=self.stream, flush=True)
+
+    def row_started(self, idx, url, country_name, signature, status):
+        pass
+
+    def row_finished(self, idx, record, status):
+        print(f"[{idx}/{self.total}] {record['Url']} - {status}", file=self.stream, flush=True)
+
+    def progress(self, completed, total):
+        pass
+
+    def run_failed(self, message):
+        print(message, file=sys.stderr, flush=True)
+
+    def run_finished(self, summary):
+        print(f"Elaborate {summary['processed']} righe, {summary['errors']} errori, {summary['saved']} PDF salvati"
+              f"{' (interrotta)' if summary['stopped'] else ''}", file=self.stream, flush=True)
+        print(f"Output: {summary['output_csv']}\nErrori: {summary['error_csv']}", file=self.stream, flush=True)
+
+
+class JsonLinesProgressSink:
+    """Un oggetto JSON per evento, per log strutturati o altri processi."""
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self._last_progress = 0
+
+    def _emit(self, event, **fields):
+        self.stream.write(json.dumps({"event": event, "time": time.time(), **fields}, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def run_started(self, total, run_dir):
+        self._emit("run_started", total=total, run_dir=run_dir)
+
+    def row_started(self, idx, url, country_name, signature, status):
+        self._emit("row_started", row=idx, url=url, country=country_name, signature=signature, status=status)
+
+    def row_finished(self, idx, record, status):
+        self._emit("row_finished", row=idx, url=record["Url"], country=record["Nome Nazione"], status=status,
+                   signature=record["Data Ultimo Aggiornamento"], error=record.get("Errore"), pdf=record.get("PDF"))
+
+    def progress(self, completed, total):
+        # process_pages notifica l'avanzamento a ogni giro: si emette solo quando cambia
+        if completed != self._last_progress:
+            self._last_progress = completed
+            self._emit("progress", completed=completed, total=total)
+
+    def run_failed(self, message):
+        self._emit("run_failed", message=message)
+
+    def run_finished(self, summary):
+        self._emit("run_finished", **summary)
+
+
+class MetricsProgressSink:
+    """
+    Contatori dell'esecuzione scritti a fine run in formato textfile di Prometheus
+    (es. per il textfile collector di node_exporter). Scrittura atomica.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.started = None
+        self.statuses = {}
+
+    def run_started(self, total, run_dir):
+        self.started = time.time()
+        self.statuses = {}
+
+    def row_started(self, idx, url, country_name, signature, status):
+        pass
+
+    def row_finished(self, idx, record, status):
+        outcome = "error" if "Errore" in record else ("saved" if "PDF" in record else "unchanged")
+        self.statuses[outcome] = self.statuses.get(outcome, 0) + 1
+
+    def progress(self, completed, total):
+        pass
+
+    def run_failed(self, message):
+        self._write({"webscraper_run_failed": 1})
+
+    def run_finished(self, summary):
+        metrics = {
+            "webscraper_run_failed": 0,
+            "webscraper_run_stopped": int(summary["stopped"]),
+            "webscraper_run_rows_total": summary["total"],
+            "webscraper_run_rows_processed": summary["processed"],
+            "webscraper_run_errors": summary["errors"],
+            "webscraper_run_pdf_saved": summary["saved"],
+            "webscraper_run_duration_seconds": round(time.time() - (self.started or time.time()), 3),
+        }
+        for outcome, count in self.statuses.items():
+            metrics[f'webscraper_run_rows{{outcome="{outcome}"}}'] = count
+        self._write(metrics)
+
+    def _write(self, metrics):
+        metrics["webscraper_run_last_timestamp_seconds"] = int(time.time())
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for name, value in metrics.items():
+                f.write(f"{name} {value}\n")
+        os.replace(tmp_path, self.path)
+
+
+class MultiSink:
+    """Inoltra ogni evento a più sink."""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def __getattr__(self, name):
+        def dispatch(*args, **kwargs):
+            for sink in self.sinks:
+                getattr(sink, name)(*args, **kwargs)
+        return dispatch
+
+
+def build_sink(args):
+    sinks = []
+    if args.progress == "text":
+        sinks.append(TextProgressSink())
+    elif args.progress == "jsonl":
+        sinks.append(JsonLinesProgressSink())
+    if args.metrics:
+        sinks.append(MetricsProgressSink(args.metrics))
+    return MultiSink(sinks)
+
+
+def run_once(ws, config, sink, stop_event):
+    """Un'esecuzione completa; restituisce il codice di uscita."""
+    try:
+        summary = ws.process_pages(config, None, None, None, ws.locale,
+                                   stop_event=stop_event, sink=sink, close_logs=False)
+    except Exception as e:
+        logging.exception(f"[CLI] Errore imprevisto: {e}")
+        return EXIT_FAILURE
+    if summary is None:
+        return EXIT_CONFIG
+    if summary["stopped"]:
+        return EXIT_STOPPED
+    return EXIT_ROW_ERRORS if summary["errors"] else EXIT_OK
+
+
+def install_signal_handlers(stop_event):
+    def request_stop(signum, frame):
+        logging.info(f"[CLI] Segnale {signum} ricevuto, arresto dopo le righe in corso")
+        stop_event.set()
+
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), request_stop)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="config.json da usare (default: quello accanto allo script)")
+    common.add_argument("--csv", help="CSV di input (sovrascrive csv_path)")
+    common.add_argument("--output", help="Cartella di output (sovrascrive html_save_path)")
+    common.add_argument("--workers", type=int, help="Righe elaborate in parallelo (sovrascrive workers)")
+    common.add_argument("--resume", action="store_true", help="Riprende l'ultima esecuzione interrotta")
+    common.add_argument("--force", action="store_true", help="Salva il PDF anche se la pagina non è cambiata")
+    common.add_argument("--progress", choices=["text", "jsonl", "none"], default="text", help="Formato dell'avanzamento su stdout")
+    common.add_argument("--metrics", help="File in cui scrivere le metriche (formato Prometheus)")
+    common.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Livello dei log su stderr")
+
+    commands.add_parser("run", parents=[common], help="Esegue una volta ed esce")
+    daemon = commands.add_parser("daemon", parents=[common], help="Ripete l'esecuzione a intervalli regolari")
+    daemon.add_argument("--interval", type=int, default=3600, help="Secondi tra l'inizio di due esecuzioni")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config_path = os.path.abspath(args.config) if args.config else None
+
+    # config.json, locales.json e le cartelle di lavoro sono relativi allo script, come per la GUI
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(args.log_level)
+
+    try:
+        import webscraper_NEW as ws
+        if config_path:
+            ws.CONFIG_FILE = config_path
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = ws.validate_config(json.load(f))
+            ws.locale = ws.load_locale(config.get("language", "en"))
+        else:
+            config = dict(ws.config)
+    except Exception as e:
+        print(f"Configurazione non valida: {e}", file=sys.stderr)
+        return EXIT_CONFIG
+
+    if args.csv:
+        config["csv_path"] = os.path.abspath(args.csv)
+    if args.output:
+        config["html_save_path"] = os.path.abspath(args.output)
+    if args.workers:
+        config["workers"] = args.workers
+    config["resume_run"] = args.resume
+    config["force_download"] = args.force
+
+    stop_event = threading.Event()
+    install_signal_handlers(stop_event)
+    sink = build_sink(args)
+
+    if args.command == "run":
+        return run_once(ws, config, sink, stop_event)
+
+    # Daemon: un'esecuzione ogni 'interval' secondi fino a SIGINT/SIGTERM
+    while True:
+        started = time.monotonic()
+        exit_code = run_once(ws, config, sink, stop_event)
+        logging.info(f"[CLI] Esecuzione terminata con codice {exit_code}")
+        if exit_code == EXIT_CONFIG:
+            return exit_code
+        # Stop durante l'esecuzione o l'attesa: si esce con l'esito dell'ultima esecuzione
+        if stop_event.wait(max(0, args.interval - (time.monotonic() - started))):
+            return exit_code
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # processi di rasterizzazione in un eseguibile congelato
+    sys.exit(main())
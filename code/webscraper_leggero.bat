@@ -22,15 +22,26 @@ echo ============================================
   --name webscraper ^
   --icon=%ICON_NAME% ^
   --hidden-import=selenium ^
+  --hidden-import=selenium.webdriver ^
+  --hidden-import=selenium.webdriver.chrome.service ^
+  --hidden-import=selenium.webdriver.chrome.options ^
+  --hidden-import=selenium.webdriver.support.ui ^
+  --hidden-import=selenium.common.exceptions ^
   --hidden-import=tkinter ^
+  --hidden-import=tkinter.filedialog ^
+  --hidden-import=tkinter.messagebox ^
+  --hidden-import=tkinter.ttk ^
+  --hidden-import=tkinterdnd2 ^
   --hidden-import=dateutil.parser ^
   --hidden-import=webdriver_manager ^
+  --hidden-import=webdriver_manager.chrome ^
   --hidden-import=psutil ^
   --hidden-import=PIL.Image ^
   --hidden-import=PIL.ImageTk ^
   --hidden-import=imageio ^
   --hidden-import=imageio.plugins.ffmpeg ^
   --hidden-import=bs4 ^
+  --hidden-import=fitz ^
   --hidden-import=numpy.core._methods ^
   --hidden-import=numpy.lib.format ^
   --hidden-import=sklearn ^